@@ -37,6 +37,7 @@ from cli.utils import (
 )
 from tradingagents.default_config import DEFAULT_CONFIG
 from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.streaming import ThrottledStreamHandler, TokenStreamAccumulator
 from tradingagents.utils.logging_manager import get_logger
 
 # 加载环境变量
@@ -1227,6 +1228,10 @@ def run_analysis():
             ui.show_user_message(f"📊 缓存状态: {preparation_result.cache_status}", "dim")
             logger.info(f"股票数据预获取成功: {preparation_result.stock_name}")
 
+            # 本次分析的后续工具调用复用预获取阶段已拉取的数据
+            from tradingagents.dataflows.run_data_context import activate_run_data_context
+            activate_run_data_context(preparation_result.data_context)
+
         except Exception as e:
             ui.show_error(f"❌ 数据预获取过程中发生错误: {str(e)}")
             ui.show_warning("💡 请检查网络连接或稍后重试")
@@ -1241,7 +1246,21 @@ def run_analysis():
         init_agent_state = graph.propagator.create_initial_state(
             selections["ticker"], selections["analysis_date"]
         )
-        args = graph.propagator.get_graph_args()
+        # 同时订阅 values 和 messages 流，报告在生成过程中即可逐步显示
+        # 启用检查点时按股票和日期生成固定的分析ID，中断后重新运行同一分析会从断点继续
+        cli_analysis_id, resumable = graph.find_checkpoint_id(
+            f"cli_{selections['ticker']}_{selections['analysis_date']}"
+        )
+        if cli_analysis_id:
+            if resumable:
+                # 输入为 None 时 LangGraph 从检查点的下一个节点继续
+                init_agent_state = None
+                ui.show_user_message(f"💾 发现未完成的分析，从断点继续（检查点ID: {cli_analysis_id}）", "yellow")
+            else:
+                ui.show_user_message(f"💾 检查点ID: {cli_analysis_id}，中断后重新运行相同的股票和日期即可从断点继续", "dim")
+        args = graph.propagator.get_graph_args(
+            stream_mode=["values", "messages"], analysis_id=cli_analysis_id
+        )
 
         ui.show_success("数据获取准备完成")
 
@@ -1264,7 +1283,21 @@ def run_analysis():
         # 跟踪已完成的分析师，避免重复提示
         completed_analysts = set()
 
-        for chunk in graph.graph.stream(init_agent_state, **args):
+        # 流式token输出：节流后写入报告面板
+        def show_streaming_section(event):
+            message_buffer.update_report_section(event.section, event.text)
+            update_display(layout)
+
+        token_stream = TokenStreamAccumulator()
+        stream_handler = ThrottledStreamHandler(show_streaming_section, interval=0.5)
+
+        for stream_mode, chunk in graph.graph.stream(init_agent_state, **args):
+            if stream_mode == "messages":
+                event = token_stream.feed(*chunk)
+                if event is not None:
+                    stream_handler(event)
+                continue
+
             if len(chunk["messages"]) > 0:
                 # Get the last message from the chunk
                 last_message = chunk["messages"][-1]
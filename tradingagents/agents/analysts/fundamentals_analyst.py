@@ -15,70 +15,8 @@ logger = get_logger("default")
 
 # 导入Google工具调用处理器
 from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
-
-
-def _get_company_name_for_fundamentals(ticker: str, market_info: dict) -> str:
-    """
-    为基本面分析师获取公司名称
-
-    Args:
-        ticker: 股票代码
-        market_info: 市场信息字典
-
-    Returns:
-        str: 公司名称
-    """
-    try:
-        if market_info['is_china']:
-            # 中国A股：使用统一接口获取股票信息
-            from tradingagents.dataflows.interface import get_china_stock_info_unified
-            stock_info = get_china_stock_info_unified(ticker)
-
-            # 解析股票名称
-            if "股票名称:" in stock_info:
-                company_name = stock_info.split("股票名称:")[1].split("\n")[0].strip()
-                logger.debug(f"📊 [基本面分析师] 从统一接口获取中国股票名称: {ticker} -> {company_name}")
-                return company_name
-            else:
-                logger.warning(f"⚠️ [基本面分析师] 无法从统一接口解析股票名称: {ticker}")
-                return f"股票代码{ticker}"
-
-        elif market_info['is_hk']:
-            # 港股：使用改进的港股工具
-            try:
-                from tradingagents.dataflows.improved_hk_utils import get_hk_company_name_improved
-                company_name = get_hk_company_name_improved(ticker)
-                logger.debug(f"📊 [基本面分析师] 使用改进港股工具获取名称: {ticker} -> {company_name}")
-                return company_name
-            except Exception as e:
-                logger.debug(f"📊 [基本面分析师] 改进港股工具获取名称失败: {e}")
-                # 降级方案：生成友好的默认名称
-                clean_ticker = ticker.replace('.HK', '').replace('.hk', '')
-                return f"港股{clean_ticker}"
-
-        elif market_info['is_us']:
-            # 美股：使用简单映射或返回代码
-            us_stock_names = {
-                'AAPL': '苹果公司',
-                'TSLA': '特斯拉',
-                'NVDA': '英伟达',
-                'MSFT': '微软',
-                'GOOGL': '谷歌',
-                'AMZN': '亚马逊',
-                'META': 'Meta',
-                'NFLX': '奈飞'
-            }
-
-            company_name = us_stock_names.get(ticker.upper(), f"美股{ticker}")
-            logger.debug(f"📊 [基本面分析师] 美股名称映射: {ticker} -> {company_name}")
-            return company_name
-
-        else:
-            return f"股票{ticker}"
-
-    except Exception as e:
-        logger.error(f"❌ [基本面分析师] 获取公司名称失败: {e}")
-        return f"股票{ticker}"
+# 导入运行级代码上下文
+from tradingagents.utils.symbol_context import get_symbol_context
 
 
 def create_fundamentals_analyst(llm, toolkit):
@@ -94,8 +32,6 @@ def create_fundamentals_analyst(llm, toolkit):
         logger.debug(f"📊 [DEBUG] 当前状态中的消息数量: {len(state.get('messages', []))}")
         logger.debug(f"📊 [DEBUG] 现有基本面报告: {state.get('fundamentals_report', 'None')}")
 
-        # 获取股票市场信息
-        from tradingagents.utils.stock_utils import StockUtils
         logger.info(f"📊 [基本面分析师] 正在分析股票: {ticker}")
 
         # 添加详细的股票代码追踪日志
@@ -103,15 +39,16 @@ def create_fundamentals_analyst(llm, toolkit):
         logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(ticker))}")
         logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(ticker))}")
 
-        market_info = StockUtils.get_market_info(ticker)
-        logger.info(f"🔍 [股票代码追踪] StockUtils.get_market_info 返回的市场信息: {market_info}")
+        symbol_context = get_symbol_context(state)
+        market_info = symbol_context["market_info"]
+        logger.info(f"🔍 [股票代码追踪] 代码上下文中的市场信息: {market_info}")
 
         logger.debug(f"📊 [DEBUG] 股票类型检查: {ticker} -> {market_info['market_name']} ({market_info['currency_name']}")
         logger.debug(f"📊 [DEBUG] 详细市场信息: is_china={market_info['is_china']}, is_hk={market_info['is_hk']}, is_us={market_info['is_us']}")
         logger.debug(f"📊 [DEBUG] 工具配置检查: online_tools={toolkit.config['online_tools']}")
 
         # 获取公司名称
-        company_name = _get_company_name_for_fundamentals(ticker, market_info)
+        company_name = symbol_context["company_name"]
         logger.debug(f"📊 [DEBUG] 公司名称: {ticker} -> {company_name}")
 
         # 选择工具
@@ -132,7 +69,7 @@ def create_fundamentals_analyst(llm, toolkit):
             logger.debug(f"📊 [DEBUG] 🔧 统一工具将自动处理: {market_info['market_name']}")
         else:
             # 离线模式：优先使用FinnHub数据，SimFin作为补充
-            if is_china:
+            if market_info['is_china']:
                 # A股使用本地缓存数据
                 tools = [
                     toolkit.get_china_stock_data,
@@ -21,8 +21,8 @@ def create_bear_researcher(llm, memory):
 
         # 使用统一的股票类型检测
         company_name = state.get('company_of_interest', 'Unknown')
-        from tradingagents.utils.stock_utils import StockUtils
-        market_info = StockUtils.get_market_info(company_name)
+        from tradingagents.utils.symbol_context import get_symbol_context
+        market_info = get_symbol_context(state)["market_info"]
         is_china = market_info['is_china']
         is_hk = market_info['is_hk']
         is_us = market_info['is_us']
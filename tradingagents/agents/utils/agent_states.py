@@ -54,6 +54,7 @@ class RiskDebateState(TypedDict):
 class AgentState(MessagesState):
     company_of_interest: Annotated[str, "Company that we are interested in trading"]
     trade_date: Annotated[str, "What date we are trading at"]
+    symbol_context: Annotated[dict, "Company name and market info resolved once per analysis run"]
 
     sender: Annotated[str, "Agent that sent this message"]
 
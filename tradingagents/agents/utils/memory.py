@@ -12,24 +12,45 @@ from typing import Dict, Optional
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("agents.utils.memory")
 
+# 本地嵌入模型的批量编码大小
+LOCAL_EMBEDDING_BATCH_SIZE = 32
+
 
 class ChromaDBManager:
-    """单例ChromaDB管理器，避免并发创建集合的冲突"""
+    """ChromaDB管理器，每个存储目录（或内存模式）一个单例，避免并发创建集合的冲突"""
 
-    _instance = None
+    _instances: Dict[Optional[str], "ChromaDBManager"] = {}
     _lock = threading.Lock()
-    _collections: Dict[str, any] = {}
-    _client = None
 
-    def __new__(cls):
-        if cls._instance is None:
+    def __new__(cls, persist_directory: Optional[str] = None):
+        if persist_directory not in cls._instances:
             with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(ChromaDBManager, cls).__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+                if persist_directory not in cls._instances:
+                    instance = super(ChromaDBManager, cls).__new__(cls)
+                    instance._initialized = False
+                    instance._collections = {}
+                    instance._client = None
+                    cls._instances[persist_directory] = instance
+        return cls._instances[persist_directory]
+
+    def __init__(self, persist_directory: Optional[str] = None):
+        if not self._initialized and persist_directory:
+            # 持久化客户端：记忆保存在磁盘上，重启后保留，多个工作进程可共享
+            os.makedirs(persist_directory, exist_ok=True)
+            settings = Settings(allow_reset=True, anonymized_telemetry=False)
+            try:
+                self._client = chromadb.PersistentClient(path=persist_directory, settings=settings)
+            except AttributeError:
+                # 旧版chromadb没有PersistentClient
+                self._client = chromadb.Client(Settings(
+                    allow_reset=True,
+                    anonymized_telemetry=False,
+                    is_persistent=True,
+                    persist_directory=persist_directory
+                ))
+            logger.info(f"📚 [ChromaDB] 持久化客户端初始化完成: {persist_directory}")
+            self._initialized = True
 
-    def __init__(self):
         if not self._initialized:
             try:
                 # 自动检测操作系统版本并使用最优配置
@@ -107,6 +128,41 @@ class ChromaDBManager:
             return collection
 
 
+_vector_stores: Dict[tuple, object] = {}
+_vector_stores_lock = threading.Lock()
+
+
+def get_vector_store(name: str, config: Dict):
+    """
+    按配置获取记忆向量存储，同一进程内同名存储共享一个实例
+
+    memory_backend:
+        chroma  - Chroma持久化客户端（默认）
+        flat    - 本地NumPy平铺索引，memory_index=hnsw 时使用HNSW加速
+        memory  - Chroma内存客户端，重启后记忆丢失
+    """
+    from .vector_store import ChromaVectorStore, FlatVectorStore
+
+    backend = str(config.get("memory_backend", "chroma")).lower()
+    memory_dir = config.get("memory_dir") or os.path.join(config.get("data_cache_dir", "."), "memory")
+    memory_dir = os.path.abspath(memory_dir)
+    key = (backend, memory_dir, name)
+
+    with _vector_stores_lock:
+        store = _vector_stores.get(key)
+        if store is None:
+            if backend == "flat":
+                store = FlatVectorStore(os.path.join(memory_dir, name), index=config.get("memory_index", "flat"))
+            elif backend == "memory":
+                store = ChromaVectorStore(ChromaDBManager().get_or_create_collection(name))
+            else:
+                chroma_dir = os.path.join(memory_dir, "chroma")
+                store = ChromaVectorStore(ChromaDBManager(chroma_dir).get_or_create_collection(name))
+            logger.info(f"📚 [记忆存储] {name} 使用 {backend} 后端")
+            _vector_stores[key] = store
+        return store
+
+
 class FinancialSituationMemory:
     def __init__(self, name, config):
         self.config = config
@@ -120,7 +176,16 @@ class FinancialSituationMemory:
         # 初始化降级选项标志
         self.fallback_available = False
         
-        if self.llm_provider == "dashscope" or self.llm_provider == "alibaba":
+        # 嵌入后端：remote（按LLM提供商调用嵌入API，默认）或 local（本地CPU模型，可离线使用）
+        self.embedding_backend = str(config.get("memory_embedding_backend", "remote")).lower()
+        self._local_model = None
+
+        if self.embedding_backend == "local":
+            from tradingagents.utils.news_model_registry import SENTENCE_MODEL_NAME
+            self.embedding = config.get("memory_embedding_model") or SENTENCE_MODEL_NAME
+            self.client = "LOCAL"
+            logger.info(f"💡 记忆功能使用本地嵌入模型: {self.embedding}")
+        elif self.llm_provider == "dashscope" or self.llm_provider == "alibaba":
             self.embedding = "text-embedding-v3"
             self.client = None  # DashScope不需要OpenAI客户端
 
@@ -290,9 +355,42 @@ class FinancialSituationMemory:
                 self.client = "DISABLED"
                 logger.warning(f"⚠️ 未找到OPENAI_API_KEY，记忆功能已禁用")
 
-        # 使用单例ChromaDB管理器
-        self.chroma_manager = ChromaDBManager()
-        self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        # 按配置选择向量存储后端（默认Chroma持久化）；不同嵌入模型的向量维度和空间都不同，
+        # 每个嵌入模型的记忆单独存放，切换提供商后不会写入或查询其他模型的向量
+        # 记忆功能被禁用的分支可能没有设置嵌入模型
+        embedding_model = getattr(self, 'embedding', None) or 'disabled'
+        model_hash = hashlib.sha1(embedding_model.encode('utf-8')).hexdigest()[:8]
+        store_name = f"{name}_{'local' if self.embedding_backend == 'local' else 'remote'}_{model_hash}"
+        self.situation_store = get_vector_store(store_name, config)
+
+    def _get_local_model(self):
+        """获取本地嵌入模型（进程内共享，默认ONNX + int8量化）；加载失败时禁用记忆功能"""
+        if self._local_model is None and self.client == "LOCAL":
+            from tradingagents.utils.news_model_registry import get_news_model_registry
+            self._local_model = get_news_model_registry().get_sentence_model(
+                self.embedding,
+                backend=self.config.get("memory_model_backend", "onnx"),
+                quantize=self.config.get("memory_model_quantize", True),
+            )
+            if self._local_model is None:
+                self.client = "DISABLED"
+                logger.warning(f"⚠️ 本地嵌入模型不可用，记忆功能已禁用")
+        return self._local_model
+
+    def _local_embeddings(self, texts):
+        """用本地模型批量编码文本，失败时返回空向量"""
+        model = self._get_local_model()
+        if model is None:
+            return [[0.0] * 1024 for _ in texts]
+        try:
+            vectors = model.encode(list(texts), batch_size=LOCAL_EMBEDDING_BATCH_SIZE,
+                                   normalize_embeddings=True, convert_to_numpy=True)
+            logger.debug(f"✅ 本地embedding成功，数量: {len(texts)}，维度: {vectors.shape[-1]}")
+            return [vector.tolist() for vector in vectors]
+        except Exception as e:
+            logger.error(f"❌ 本地embedding异常: {str(e)}")
+            logger.warning(f"⚠️ 记忆功能降级，返回空向量")
+            return [[0.0] * 1024 for _ in texts]
 
     def _smart_text_truncation(self, text, max_length=8192):
         """智能文本截断，保持语义完整性和缓存兼容性"""
@@ -380,6 +478,9 @@ class FinancialSituationMemory:
             'strategy': 'no_truncation_with_fallback'  # 标记策略
         }
 
+        if self.client == "LOCAL":
+            return self._local_embeddings([text])[0]
+
         if (self.llm_provider == "dashscope" or
             self.llm_provider == "alibaba" or
             (self.llm_provider == "google" and self.client is None) or
@@ -525,6 +626,24 @@ class FinancialSituationMemory:
                 logger.warning(f"⚠️ 记忆功能降级，返回空向量")
                 return [0.0] * 1024
 
+    def get_embeddings(self, texts):
+        """批量获取embedding：本地模型一次编码整批文本，远程API逐条调用"""
+        if self.client != "LOCAL":
+            return [self.get_embedding(text) for text in texts]
+
+        embeddings = [[0.0] * 1024 for _ in texts]
+        valid = [
+            i for i, text in enumerate(texts)
+            if text and isinstance(text, str) and
+            not (self.enable_embedding_length_check and len(text) > self.max_embedding_length)
+        ]
+        if len(valid) < len(texts):
+            logger.warning(f"⚠️ {len(texts) - len(valid)}条文本为空或过长，跳过向量化")
+        if valid:
+            for i, embedding in zip(valid, self._local_embeddings([texts[i] for i in valid])):
+                embeddings[i] = embedding
+        return embeddings
+
     def get_embedding_config_status(self):
         """获取向量缓存配置状态"""
         return {
@@ -539,85 +658,90 @@ class FinancialSituationMemory:
         """获取最后处理的文本信息"""
         return getattr(self, '_last_text_info', None)
 
-    def add_situations(self, situations_and_advice):
-        """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
+    def add_situations(self, situations_and_advice, metadata: Optional[Dict] = None):
+        """
+        Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)
+
+        metadata 为附加到每条记忆的元数据（如 ticker、market），用于检索时过滤；
+        相同的情景和建议以内容哈希为 id，重复写入时覆盖而不是重复追加
+        """
 
         situations = []
         advice = []
         ids = []
         embeddings = []
 
-        offset = self.situation_collection.count()
+        situations_and_advice = list(situations_and_advice)
+        batch_embeddings = self.get_embeddings([situation for situation, _ in situations_and_advice])
 
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
+        for (situation, recommendation), embedding in zip(situations_and_advice, batch_embeddings):
+            if not any(embedding):
+                # 嵌入失败（空向量）的记忆无法被检索到，不写入
+                logger.debug(f"⚠️ 情景embedding为空向量，跳过写入记忆")
+                continue
             situations.append(situation)
             advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
-
-        self.situation_collection.add(
-            documents=situations,
-            metadatas=[{"recommendation": rec} for rec in advice],
-            embeddings=embeddings,
-            ids=ids,
-        )
-
-    def get_memories(self, current_situation, n_matches=1):
-        """Find matching recommendations using embeddings with smart truncation handling"""
-        
+            ids.append(hashlib.sha1(f"{situation}\n{recommendation}".encode("utf-8")).hexdigest())
+            embeddings.append(embedding)
+
+        if not ids:
+            return
+
+        try:
+            self.situation_store.upsert(
+                ids=ids,
+                documents=situations,
+                embeddings=embeddings,
+                metadatas=[{"recommendation": rec, **(metadata or {})} for rec in advice],
+            )
+        except Exception as e:
+            # 例如降级嵌入模型的向量维度与存储不一致；写入记忆失败不影响分析流程
+            logger.error(f"❌ 记忆写入失败: {str(e)}")
+
+    def get_memories(self, current_situation, n_matches=1, ticker: Optional[str] = None,
+                     market: Optional[str] = None):
+        """Find matching recommendations using embeddings with smart truncation handling
+
+        ticker / market 不为空时只在对应股票或市场的记忆中检索
+        """
+
         # 获取当前情况的embedding
         query_embedding = self.get_embedding(current_situation)
-        
+
         # 检查是否为空向量（记忆功能被禁用或出错）
         if all(x == 0.0 for x in query_embedding):
             logger.debug(f"⚠️ 查询embedding为空向量，返回空结果")
             return []
-        
-        # 检查是否有足够的数据进行查询
-        collection_count = self.situation_collection.count()
-        if collection_count == 0:
-            logger.debug(f"📭 记忆库为空，返回空结果")
-            return []
-        
-        # 调整查询数量，不能超过集合中的文档数量
-        actual_n_matches = min(n_matches, collection_count)
-        
+
+        where = {key: value for key, value in (("ticker", ticker), ("market", market)) if value}
+
         try:
-            # 执行相似度查询
-            results = self.situation_collection.query(
-                query_embeddings=[query_embedding],
-                n_results=actual_n_matches
-            )
-            
-            # 处理查询结果
+            # 执行相似度查询（结果数量由存储按实际文档数截断）
+            results = self.situation_store.query(query_embedding, n_results=n_matches, where=where or None)
+            if not results:
+                logger.debug(f"📭 没有匹配的记忆，返回空结果")
+                return []
+
             memories = []
-            if results and 'documents' in results and results['documents']:
-                documents = results['documents'][0]
-                metadatas = results.get('metadatas', [[]])[0]
-                distances = results.get('distances', [[]])[0]
-                
-                for i, doc in enumerate(documents):
-                    metadata = metadatas[i] if i < len(metadatas) else {}
-                    distance = distances[i] if i < len(distances) else 1.0
-                    
-                    memory_item = {
-                        'situation': doc,
-                        'recommendation': metadata.get('recommendation', ''),
-                        'similarity': 1.0 - distance,  # 转换为相似度分数
-                        'distance': distance
-                    }
-                    memories.append(memory_item)
-                
-                # 记录查询信息
-                if hasattr(self, '_last_text_info') and self._last_text_info.get('was_truncated'):
-                    logger.info(f"🔍 截断文本查询完成，找到{len(memories)}个相关记忆")
-                    logger.debug(f"📊 原文长度: {self._last_text_info['original_length']}, "
-                               f"处理后长度: {self._last_text_info['processed_length']}")
-                else:
-                    logger.debug(f"🔍 记忆查询完成，找到{len(memories)}个相关记忆")
-            
+            for result in results:
+                distance = result.get('distance', 1.0)
+                memories.append({
+                    'situation': result['document'],
+                    'recommendation': result['metadata'].get('recommendation', ''),
+                    'similarity': 1.0 - distance,  # 转换为相似度分数
+                    'distance': distance
+                })
+
+            # 记录查询信息
+            if hasattr(self, '_last_text_info') and self._last_text_info.get('was_truncated'):
+                logger.info(f"🔍 截断文本查询完成，找到{len(memories)}个相关记忆")
+                logger.debug(f"📊 原文长度: {self._last_text_info['original_length']}, "
+                           f"处理后长度: {self._last_text_info['processed_length']}")
+            else:
+                logger.debug(f"🔍 记忆查询完成，找到{len(memories)}个相关记忆")
+
             return memories
-            
+
         except Exception as e:
             logger.error(f"❌ 记忆查询失败: {str(e)}")
             return []
@@ -625,7 +749,7 @@ class FinancialSituationMemory:
     def get_cache_info(self):
         """获取缓存相关信息，用于调试和监控"""
         info = {
-            'collection_count': self.situation_collection.count(),
+            'collection_count': self.situation_store.count(),
             'client_status': 'enabled' if self.client != "DISABLED" else 'disabled',
             'embedding_model': self.embedding,
             'provider': self.llm_provider
@@ -0,0 +1,374 @@
+"""
+记忆向量存储后端
+- ChromaVectorStore：包装 Chroma 集合（持久化客户端或内存客户端）
+- FlatVectorStore：本地磁盘 NumPy 平铺索引，向量追加写入 float32 文件并以 memmap 读取，
+  文档和元数据保存在 SQLite（WAL）中；多进程共享同一目录，写入以 BEGIN IMMEDIATE 串行化，
+  读取无锁。安装 hnswlib 时可选 HNSW 近似索引加速无过滤条件的查询
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("agents.utils.memory")
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    hnswlib = None
+    HNSWLIB_AVAILABLE = False
+
+
+HNSW_EF_CONSTRUCTION = 100
+HNSW_EF_SEARCH = 64
+# 单次同步新增/覆盖的行数达到该值时把HNSW索引保存到磁盘
+HNSW_SAVE_THRESHOLD = 1000
+
+
+def _clean_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """去掉值为 None 的字段（Chroma 不接受 None 元数据）"""
+    return {key: value for key, value in (metadata or {}).items() if value is not None}
+
+
+class ChromaVectorStore:
+    """Chroma 集合适配器"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str],
+               embeddings: Sequence[Sequence[float]], metadatas: Sequence[Dict[str, Any]]):
+        self.collection.upsert(
+            ids=list(ids),
+            documents=list(documents),
+            embeddings=[list(map(float, embedding)) for embedding in embeddings],
+            metadatas=[_clean_metadata(metadata) for metadata in metadatas],
+        )
+
+    def query(self, embedding: Sequence[float], n_results: int = 1,
+              where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        n_results = min(n_results, self.count())
+        if n_results <= 0:
+            return []
+
+        kwargs = {}
+        where = _clean_metadata(where)
+        if len(where) == 1:
+            kwargs["where"] = where
+        elif len(where) > 1:
+            kwargs["where"] = {"$and": [{key: value} for key, value in where.items()]}
+
+        results = self.collection.query(query_embeddings=[list(embedding)], n_results=n_results, **kwargs)
+        if not results or not results.get("documents"):
+            return []
+
+        documents = results["documents"][0]
+        metadatas = (results.get("metadatas") or [[]])[0] or []
+        distances = (results.get("distances") or [[]])[0] or []
+        ids = (results.get("ids") or [[]])[0] or []
+        return [
+            {
+                "id": ids[i] if i < len(ids) else None,
+                "document": doc,
+                "metadata": metadatas[i] if i < len(metadatas) and metadatas[i] else {},
+                "distance": distances[i] if i < len(distances) else 1.0,
+            }
+            for i, doc in enumerate(documents)
+        ]
+
+
+class _Snapshot:
+    """某一版本的只读索引快照，查询线程之间共享"""
+
+    def __init__(self, version: int, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                 columns: Dict[str, Dict[Any, np.ndarray]], vectors: np.ndarray):
+        self.version = version
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.columns = columns
+        self.vectors = vectors
+
+
+class FlatVectorStore:
+    """本地磁盘平铺向量索引（余弦相似度），可选 HNSW"""
+
+    def __init__(self, directory: str, index: str = "flat"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / "items.sqlite"
+        self.vector_path = self.directory / "vectors.f32"
+        self.use_hnsw = index == "hnsw" and HNSWLIB_AVAILABLE
+        if index == "hnsw" and not HNSWLIB_AVAILABLE:
+            logger.warning("⚠️ [向量存储] hnswlib 未安装，使用平铺索引")
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._snapshot: Optional[_Snapshot] = None
+        self._hnsw = None
+        self._hnsw_version = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """每个线程复用一个只读连接，查询时检查版本不必重复建立连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _init_db(self):
+        with closing(self._connect()) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT UNIQUE NOT NULL,
+                    document TEXT,
+                    metadata TEXT,
+                    ticker TEXT,
+                    market TEXT,
+                    version INTEGER NOT NULL,
+                    updated_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_ticker ON items(ticker);
+                CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+                INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', '0');
+            """)
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def upsert(self, ids: Sequence[str], documents: Sequence[str],
+               embeddings: Sequence[Sequence[float]], metadatas: Sequence[Dict[str, Any]]):
+        """批量写入；id 已存在时原位覆盖向量和元数据"""
+        # 同一批内重复的 id 以最后一条为准
+        items = {}
+        for item_id, document, embedding, metadata in zip(ids, documents, embeddings, metadatas):
+            items[str(item_id)] = (document, embedding, _clean_metadata(metadata))
+        if not items:
+            return
+
+        vectors = self._normalize(np.asarray([item[1] for item in items.values()], dtype=np.float32))
+        dim = vectors.shape[1]
+
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored_dim = self._meta(conn, "dim")
+                if stored_dim is None:
+                    conn.execute("INSERT INTO store_meta (key, value) VALUES ('dim', ?)", (str(dim),))
+                elif int(stored_dim) != dim:
+                    raise ValueError(f"向量维度不一致: 存储为 {stored_dim}，写入为 {dim}")
+
+                version = int(self._meta(conn, "version")) + 1
+                placeholders = ",".join("?" * len(items))
+                existing = dict(conn.execute(
+                    f"SELECT id, row FROM items WHERE id IN ({placeholders})", list(items)
+                ).fetchall())
+                next_row = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+                rows = []
+                for item_id in items:
+                    if item_id in existing:
+                        rows.append(existing[item_id])
+                    else:
+                        rows.append(next_row)
+                        next_row += 1
+
+                # 先写向量再提交元数据：读者只会看到向量已落盘的行
+                mode = "r+b" if self.vector_path.exists() else "w+b"
+                with open(self.vector_path, mode) as f:
+                    for row, vector in zip(rows, vectors):
+                        f.seek(row * dim * 4)
+                        f.write(vector.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                now = time.time()
+                conn.executemany("""
+                    INSERT INTO items (row, id, document, metadata, ticker, market, version, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        document = excluded.document, metadata = excluded.metadata,
+                        ticker = excluded.ticker, market = excluded.market,
+                        version = excluded.version, updated_at = excluded.updated_at
+                """, [
+                    (row, item_id, document, json.dumps(metadata, ensure_ascii=False),
+                     metadata.get("ticker"), metadata.get("market"), version, now)
+                    for row, (item_id, (document, _, metadata)) in zip(rows, items.items())
+                ])
+                conn.execute("UPDATE store_meta SET value = ? WHERE key = 'version'", (str(version),))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _refresh(self) -> Optional[_Snapshot]:
+        """存储版本变化（本进程或其他进程写入）时重新加载快照"""
+        conn = self._reader()
+        version = int(self._meta(conn, "version"))
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+            conn.execute("BEGIN")
+            try:
+                version = int(self._meta(conn, "version"))
+                dim = self._meta(conn, "dim")
+                rows = conn.execute(
+                    "SELECT id, document, metadata, ticker, market, version FROM items ORDER BY row"
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+
+            if rows and dim:
+                vectors = np.memmap(self.vector_path, dtype=np.float32, mode="r", shape=(len(rows), int(dim)))
+            else:
+                vectors = np.zeros((0, int(dim or 0)), dtype=np.float32)
+
+            self._snapshot = _Snapshot(
+                version=version,
+                ids=[row[0] for row in rows],
+                documents=[row[1] for row in rows],
+                metadatas=[json.loads(row[2]) if row[2] else {} for row in rows],
+                columns={
+                    "ticker": self._inverted_index(row[3] for row in rows),
+                    "market": self._inverted_index(row[4] for row in rows),
+                },
+                vectors=vectors,
+            )
+            if self.use_hnsw and rows:
+                self._update_hnsw(vectors, np.array([row[5] for row in rows]))
+            return self._snapshot
+
+    @staticmethod
+    def _inverted_index(values) -> Dict[Any, np.ndarray]:
+        """字段值 -> 行号数组，按股票/市场过滤时直接取候选行"""
+        index: Dict[Any, List[int]] = {}
+        for row, value in enumerate(values):
+            if value is not None:
+                index.setdefault(value, []).append(row)
+        return {value: np.array(rows, dtype=np.int64) for value, rows in index.items()}
+
+    def _update_hnsw(self, vectors: np.ndarray, row_versions: np.ndarray):
+        """把自上次同步后新增或覆盖的行写入 HNSW 索引；索引定期保存到磁盘，其他进程启动时直接加载"""
+        count, dim = vectors.shape
+        if self._hnsw is None:
+            self._hnsw = hnswlib.Index(space="ip", dim=dim)
+            saved = self._latest_saved_hnsw()
+            if saved is not None:
+                saved_version, path = saved
+                self._hnsw.load_index(str(path), max_elements=max(1024, count * 2))
+                self._hnsw_version = saved_version
+                logger.debug(f"[向量存储] 加载HNSW索引: {path.name}")
+            else:
+                self._hnsw.init_index(max_elements=max(1024, count * 2), ef_construction=HNSW_EF_CONSTRUCTION, M=16)
+                self._hnsw_version = 0
+            self._hnsw.set_ef(HNSW_EF_SEARCH)
+        elif count > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(count * 2)
+
+        changed = np.nonzero(row_versions > self._hnsw_version)[0]
+        if len(changed):
+            self._hnsw.add_items(np.asarray(vectors[changed]), changed)
+        self._hnsw_version = int(row_versions.max())
+        if len(changed) >= HNSW_SAVE_THRESHOLD:
+            self._save_hnsw()
+
+    def _latest_saved_hnsw(self):
+        saved = []
+        for path in self.directory.glob("index-*.hnsw"):
+            try:
+                saved.append((int(path.stem.split("-", 1)[1]), path))
+            except ValueError:
+                continue
+        return max(saved) if saved else None
+
+    def _save_hnsw(self):
+        """以存储版本命名保存索引，只保留最新一份"""
+        path = self.directory / f"index-{self._hnsw_version}.hnsw"
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            self._hnsw.save_index(str(tmp_path))
+            os.replace(tmp_path, path)
+            for old_path in self.directory.glob("index-*.hnsw"):
+                if old_path != path:
+                    old_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"⚠️ [向量存储] HNSW索引保存失败: {e}")
+
+    def count(self) -> int:
+        snapshot = self._refresh()
+        return len(snapshot.ids) if snapshot else 0
+
+    def query(self, embedding: Sequence[float], n_results: int = 1,
+              where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """余弦相似度检索，where 为字段相等过滤（如 {"ticker": "000001"}）"""
+        snapshot = self._refresh()
+        if snapshot is None or not snapshot.ids or n_results <= 0:
+            return []
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        where = _clean_metadata(where)
+
+        candidates = None
+        if where:
+            for key, value in where.items():
+                if key in snapshot.columns:
+                    rows = snapshot.columns[key].get(value, np.zeros(0, dtype=np.int64))
+                else:
+                    source = range(len(snapshot.ids)) if candidates is None else candidates
+                    rows = np.array([row for row in source if snapshot.metadatas[row].get(key) == value],
+                                    dtype=np.int64)
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+                if len(candidates) == 0:
+                    return []
+
+        if candidates is None and self.use_hnsw and self._hnsw is not None:
+            labels, distances = self._hnsw.knn_query(query, k=min(n_results, len(snapshot.ids)))
+            rows, similarities = labels[0], 1.0 - distances[0]
+        else:
+            vectors = snapshot.vectors if candidates is None else snapshot.vectors[candidates]
+            scores = np.asarray(vectors @ query)
+            k = min(n_results, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            rows = top if candidates is None else candidates[top]
+            similarities = scores[top]
+
+        return [
+            {
+                "id": snapshot.ids[row],
+                "document": snapshot.documents[row],
+                "metadata": snapshot.metadatas[row],
+                "distance": float(1.0 - similarity),
+            }
+            for row, similarity in zip(rows, similarities)
+        ]
@@ -541,10 +541,97 @@ def format_hk_stock_data_akshare(symbol: str, data: pd.DataFrame, start_date: st
         return f"❌ AKShare港股数据格式化失败: {symbol}"
 
 
+# 新闻库中东方财富新闻的来源标识，以及每次从库中取出的最新新闻条数（与接口单次返回量相当）
+EM_NEWS_SOURCE = "eastmoney"
+EM_NEWS_WINDOW = 100
+
+
+def _fetch_stock_news_em_remote(symbol: str, start_time: datetime) -> pd.DataFrame:
+    """调用AKShare接口获取东方财富个股新闻（30秒超时）"""
+    provider = get_akshare_provider()
+    if not provider.connected:
+        logger.error(f"[东方财富新闻] ❌ AKShare未连接，无法获取东方财富新闻")
+        return None
+
+    logger.info(f"[东方财富新闻] 📰 准备调用AKShare API获取个股新闻: {symbol}")
+
+    # 使用线程超时包装（兼容Windows）
+    import threading
+    import time
+
+    result = [None]
+    exception = [None]
+
+    def fetch_news():
+        try:
+            logger.debug(f"[东方财富新闻] 线程开始执行 stock_news_em API调用: {symbol}")
+            thread_start = time.time()
+            result[0] = provider.ak.stock_news_em(symbol=symbol)
+            thread_end = time.time()
+            logger.debug(f"[东方财富新闻] 线程执行完成，耗时: {thread_end - thread_start:.2f}秒")
+        except Exception as e:
+            logger.error(f"[东方财富新闻] 线程执行异常: {e}")
+            exception[0] = e
+
+    # 启动线程
+    thread = threading.Thread(target=fetch_news)
+    thread.daemon = True
+    logger.debug(f"[东方财富新闻] 启动线程获取新闻数据")
+    thread.start()
+
+    # 等待30秒
+    logger.debug(f"[东方财富新闻] 等待线程完成，最长等待30秒")
+    thread.join(timeout=30)
+
+    if thread.is_alive():
+        # 超时了
+        elapsed_time = (datetime.now() - start_time).total_seconds()
+        logger.warning(f"[东方财富新闻] ⚠️ 获取超时（30秒）: {symbol}，总耗时: {elapsed_time:.2f}秒")
+        raise Exception(f"东方财富个股新闻获取超时（30秒）: {symbol}")
+    elif exception[0]:
+        # 有异常
+        elapsed_time = (datetime.now() - start_time).total_seconds()
+        logger.error(f"[东方财富新闻] ❌ API调用异常: {exception[0]}，总耗时: {elapsed_time:.2f}秒")
+        raise exception[0]
+    # 成功
+    return result[0]
+
+
+def _news_em_store_items(news_df: pd.DataFrame):
+    """把东方财富新闻DataFrame转换为新闻库记录（原始行保存在 payload 中）"""
+    title_col = '新闻标题' if '新闻标题' in news_df.columns else '标题'
+    content_col = '新闻内容' if '新闻内容' in news_df.columns else '内容'
+    time_col = '发布时间' if '发布时间' in news_df.columns else '时间'
+    url_col = '新闻链接' if '新闻链接' in news_df.columns else '链接'
+    fetched = datetime.now()
+    for row in news_df.to_dict('records'):
+        yield {
+            'title': str(row.get(title_col, '') or ''),
+            'content': str(row.get(content_col, '') or ''),
+            'url': str(row.get(url_col, '') or ''),
+            'publish_time': row.get(time_col) or fetched,
+            'payload': row,
+        }
+
+
+def _load_news_em_from_store(store, symbol: str, columns=None) -> pd.DataFrame:
+    items = store.query(EM_NEWS_SOURCE, symbol, limit=EM_NEWS_WINDOW)
+    rows = [item['payload'] for item in items if item.get('payload')]
+    if not rows:
+        return pd.DataFrame()
+    news_df = pd.DataFrame(rows)
+    if columns is not None:
+        news_df = news_df[[c for c in columns if c in news_df.columns]]
+    return news_df
+
+
 def get_stock_news_em(symbol: str, max_news: int = 10) -> pd.DataFrame:
     """
     使用AKShare获取东方财富个股新闻
 
+    刷新间隔内重复获取同一股票时直接读取本地新闻库；过期后重新请求接口，
+    只把游标之后新出现的新闻写入库中，再从库中取最新的新闻
+
     Args:
         symbol: 股票代码，如 "600000" 或 "300059"
         max_news: 最大新闻数量，默认10条
@@ -556,56 +643,47 @@ def get_stock_news_em(symbol: str, max_news: int = 10) -> pd.DataFrame:
     logger.info(f"[东方财富新闻] 开始获取股票 {symbol} 的东方财富新闻数据")
     
     try:
-        provider = get_akshare_provider()
-        if not provider.connected:
-            logger.error(f"[东方财富新闻] ❌ AKShare未连接，无法获取东方财富新闻")
-            return pd.DataFrame()
+        from .news_store import get_news_store
+        store = get_news_store()
+        news_df = None
 
-        logger.info(f"[东方财富新闻] 📰 准备调用AKShare API获取个股新闻: {symbol}")
+        if store is not None and store.is_fresh(EM_NEWS_SOURCE, symbol):
+            news_df = _load_news_em_from_store(store, symbol)
+            logger.info(f"[东方财富新闻] 📦 从本地新闻库读取: {symbol}, {len(news_df)}条")
 
-        # 使用线程超时包装（兼容Windows）
-        import threading
-        import time
-
-        result = [None]
-        exception = [None]
-
-        def fetch_news():
+        if news_df is None or news_df.empty:
             try:
-                logger.debug(f"[东方财富新闻] 线程开始执行 stock_news_em API调用: {symbol}")
-                thread_start = time.time()
-                result[0] = provider.ak.stock_news_em(symbol=symbol)
-                thread_end = time.time()
-                logger.debug(f"[东方财富新闻] 线程执行完成，耗时: {thread_end - thread_start:.2f}秒")
-            except Exception as e:
-                logger.error(f"[东方财富新闻] 线程执行异常: {e}")
-                exception[0] = e
-
-        # 启动线程
-        thread = threading.Thread(target=fetch_news)
-        thread.daemon = True
-        logger.debug(f"[东方财富新闻] 启动线程获取新闻数据")
-        thread.start()
-
-        # 等待30秒
-        logger.debug(f"[东方财富新闻] 等待线程完成，最长等待30秒")
-        thread.join(timeout=30)
-
-        if thread.is_alive():
-            # 超时了
-            elapsed_time = (datetime.now() - start_time).total_seconds()
-            logger.warning(f"[东方财富新闻] ⚠️ 获取超时（30秒）: {symbol}，总耗时: {elapsed_time:.2f}秒")
-            raise Exception(f"东方财富个股新闻获取超时（30秒）: {symbol}")
-        elif exception[0]:
-            # 有异常
-            elapsed_time = (datetime.now() - start_time).total_seconds()
-            logger.error(f"[东方财富新闻] ❌ API调用异常: {exception[0]}，总耗时: {elapsed_time:.2f}秒")
-            raise exception[0]
-        else:
-            # 成功
-            news_df = result[0]
+                news_df = _fetch_stock_news_em_remote(symbol, start_time)
+            except Exception as fetch_error:
+                # 接口失败时退回库中已有的新闻
+                news_df = _load_news_em_from_store(store, symbol) if store is not None else pd.DataFrame()
+                if news_df.empty:
+                    raise
+                logger.warning(f"[东方财富新闻] ⚠️ 接口获取失败，使用本地新闻库中的 {len(news_df)} 条新闻: {fetch_error}")
+            else:
+                if news_df is None:
+                    return pd.DataFrame()
+                if store is not None and not news_df.empty:
+                    try:
+                        inserted = store.ingest(EM_NEWS_SOURCE, symbol, _news_em_store_items(news_df))
+                        logger.info(f"[东方财富新闻] 📦 新闻库新增 {inserted} 条: {symbol}")
+                        news_df = _load_news_em_from_store(store, symbol, columns=list(news_df.columns))
+                    except Exception as store_error:
+                        logger.warning(f"⚠️ [东方财富新闻] 新闻库写入失败: {store_error}")
 
         if news_df is not None and not news_df.empty:
+            # 去除转载、标题微调等近似重复的新闻
+            from tradingagents.utils.news_dedup import deduplicate_items, CONTENT_PREFIX_CHARS
+            title_col = '新闻标题' if '新闻标题' in news_df.columns else '标题'
+            content_col = '新闻内容' if '新闻内容' in news_df.columns else '内容'
+            rows = news_df.to_dict('records')
+            kept_positions = deduplicate_items(
+                list(range(len(rows))),
+                key=lambda pos: f"{rows[pos].get(title_col, '')} {str(rows[pos].get(content_col, ''))[:CONTENT_PREFIX_CHARS]}",
+                scope=symbol,
+            )
+            news_df = news_df.iloc[kept_positions]
+
             # 限制新闻数量为最新的max_news条
             if len(news_df) > max_news:
                 news_df = news_df.head(max_news)
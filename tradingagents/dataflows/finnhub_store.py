@@ -0,0 +1,169 @@
+"""
+Finnhub 离线数据二进制存储
+把 finnhub_data 下的 ``*_data_formatted.json`` 一次性转换为按日期排序的紧凑二进制文件，
+通过内存映射读取：日期键二分查找定位区间，只解析区间内的记录，已打开的文件在进程内 LRU 缓存
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 文件布局：
+#   MAGIC | <II 记录数 N, 日期键宽度 W> | N 个定宽日期键（\0 填充） | N+1 个 <Q 偏移 | 记录数据（紧凑 JSON）
+_MAGIC = b"FHB1"
+_HEADER = struct.Struct("<II")
+_OFFSET = struct.Struct("<Q")
+_HEADER_SIZE = len(_MAGIC) + _HEADER.size
+
+STORE_DIR_NAME = ".store"
+DEFAULT_LRU_SIZE = 64
+
+
+def convert_json_to_store(json_path: str, store_path: str):
+    """把 ``{日期: [记录, ...]}`` 格式的 JSON 转换为二进制存储，空记录的日期直接丢弃"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    items = sorted(((key, value) for key, value in data.items() if len(value) > 0), key=lambda item: item[0])
+    width = max((len(key.encode("utf-8")) for key, _ in items), default=0)
+
+    keys = bytearray()
+    offsets = bytearray()
+    payload = bytearray()
+    for key, value in items:
+        keys += key.encode("utf-8").ljust(width, b"\0")
+        offsets += _OFFSET.pack(len(payload))
+        payload += json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    offsets += _OFFSET.pack(len(payload))
+
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp_path = store_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER.pack(len(items), width))
+        f.write(keys)
+        f.write(offsets)
+        f.write(payload)
+    os.replace(tmp_path, store_path)
+    logger.debug(f"📦 [Finnhub存储] 已转换 {os.path.basename(json_path)}: {len(items)} 个日期")
+
+
+class _StoreFile:
+    """单个二进制存储文件的只读内存映射视图"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self.mtime = os.fstat(self._file.fileno()).st_mtime
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的Finnhub存储文件: {path}")
+        self.count, self.width = _HEADER.unpack_from(self._mm, len(_MAGIC))
+        self._offsets_start = _HEADER_SIZE + self.count * self.width
+        self._payload_start = self._offsets_start + (self.count + 1) * _OFFSET.size
+
+    def key(self, index: int) -> bytes:
+        start = _HEADER_SIZE + index * self.width
+        return self._mm[start:start + self.width].rstrip(b"\0")
+
+    def _bisect(self, target: bytes, right: bool) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = self.key(mid)
+            if key < target or (right and key == target):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def value(self, index: int):
+        begin, end = (
+            _OFFSET.unpack_from(self._mm, self._offsets_start + i * _OFFSET.size)[0]
+            for i in (index, index + 1)
+        )
+        return json.loads(self._mm[self._payload_start + begin:self._payload_start + end])
+
+    def range(self, start_date: str, end_date: str) -> Dict[str, List]:
+        lo = self._bisect(start_date.encode("utf-8"), right=False)
+        hi = self._bisect(end_date.encode("utf-8"), right=True)
+        return {self.key(i).decode("utf-8"): self.value(i) for i in range(lo, hi)}
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class FinnhubStore:
+    """Finnhub 离线数据存储，按 (代码, 数据类型, 周期) 提供日期区间查询"""
+
+    def __init__(self, lru_size: int = DEFAULT_LRU_SIZE):
+        self.lru_size = lru_size
+        self._files: "OrderedDict[str, _StoreFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _paths(ticker: str, data_type: str, data_dir: str, period: Optional[str]) -> Tuple[str, str]:
+        if period:
+            file_name = f"{ticker}_{period}_data_formatted"
+        else:
+            file_name = f"{ticker}_data_formatted"
+        json_path = os.path.join(data_dir, "finnhub_data", data_type, f"{file_name}.json")
+        store_path = os.path.join(data_dir, "finnhub_data", STORE_DIR_NAME, data_type, f"{file_name}.bin")
+        return json_path, store_path
+
+    def _open(self, json_path: str, store_path: str) -> _StoreFile:
+        json_mtime = os.path.getmtime(json_path)
+
+        store_file = self._files.get(store_path)
+        if store_file is not None and store_file.mtime >= json_mtime:
+            self._files.move_to_end(store_path)
+            return store_file
+        if store_file is not None:
+            store_file.close()
+            del self._files[store_path]
+
+        if not os.path.exists(store_path) or os.path.getmtime(store_path) < json_mtime:
+            convert_json_to_store(json_path, store_path)
+
+        store_file = _StoreFile(store_path)
+        self._files[store_path] = store_file
+        if len(self._files) > self.lru_size:
+            _, evicted = self._files.popitem(last=False)
+            evicted.close()
+        return store_file
+
+    def get_range(self, ticker: str, start_date: str, end_date: str, data_type: str,
+                  data_dir: str, period: Optional[str] = None) -> Dict[str, List]:
+        """
+        查询日期区间 [start_date, end_date] 内的非空记录
+
+        Raises:
+            FileNotFoundError: 原始JSON数据文件不存在
+        """
+        json_path, store_path = self._paths(ticker, data_type, data_dir, period)
+        with self._lock:
+            return self._open(json_path, store_path).range(start_date, end_date)
+
+
+_finnhub_store: Optional[FinnhubStore] = None
+_finnhub_store_lock = threading.Lock()
+
+
+def get_finnhub_store() -> FinnhubStore:
+    """获取全局Finnhub存储实例"""
+    global _finnhub_store
+    if _finnhub_store is None:
+        with _finnhub_store_lock:
+            if _finnhub_store is None:
+                _finnhub_store = FinnhubStore()
+    return _finnhub_store
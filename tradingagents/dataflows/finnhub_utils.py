@@ -1,10 +1,10 @@
 import json
-import os
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .finnhub_store import get_finnhub_store
 
 
 def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=None):
@@ -18,28 +18,12 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         period (str): Default to none, if there is a period specified, should be annual or quarterly.
     """
 
-    if period:
-        data_path = os.path.join(
-            data_dir,
-            "finnhub_data",
-            data_type,
-            f"{ticker}_{period}_data_formatted.json",
-        )
-    else:
-        data_path = os.path.join(
-            data_dir, "finnhub_data", data_type, f"{ticker}_data_formatted.json"
-        )
-
     try:
-        if not os.path.exists(data_path):
-            logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {data_path}")
-            logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
-            return {}
-        
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        logger.error(f"❌ [ERROR] 文件未找到: {data_path}")
+        # 从内存映射的二进制存储中按日期区间读取（首次访问时由JSON转换生成）
+        return get_finnhub_store().get_range(ticker, start_date, end_date, data_type, data_dir, period)
+    except FileNotFoundError as e:
+        logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {e.filename}")
+        logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
         return {}
     except json.JSONDecodeError as e:
         logger.error(f"❌ [ERROR] JSON解析错误: {e}")
@@ -47,10 +31,3 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
     except Exception as e:
         logger.error(f"❌ [ERROR] 读取数据文件时发生错误: {e}")
         return {}
-
-    # filter keys (date, str in format YYYY-MM-DD) by the date range (str, str in format YYYY-MM-DD)
-    filtered_data = {}
-    for key, value in data.items():
-        if start_date <= key <= end_date and len(value) > 0:
-            filtered_data[key] = value
-    return filtered_data
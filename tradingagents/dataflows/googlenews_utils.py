@@ -1,7 +1,8 @@
 import json
+import re
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
 import random
 from tenacity import (
@@ -29,27 +30,110 @@ def is_rate_limited(response):
 )
 def make_request(url, headers):
     """Make a request with retry logic for rate limiting and connection issues"""
-    # Random delay before each request to avoid detection
-    time.sleep(random.uniform(2, 6))
     # 添加超时参数，设置连接超时和读取超时
     response = requests.get(url, headers=headers, timeout=(10, 30))  # 连接超时10秒，读取超时30秒
     return response
 
 
+_RELATIVE_DATE = re.compile(r"(\d+)\s*(minute|min|hour|day|week|分钟|小时|天|周)", re.IGNORECASE)
+_RELATIVE_UNITS = {
+    "minute": "minutes", "min": "minutes", "分钟": "minutes",
+    "hour": "hours", "小时": "hours",
+    "day": "days", "天": "days",
+    "week": "weeks", "周": "weeks",
+}
+
+
+def _parse_result_date(text, fetched_at, window_start, window_end):
+    """把搜索结果中的日期（"3 days ago"、"Mar 5, 2024"、"2024年3月5日"等）解析到检索区间内"""
+    parsed = None
+    match = _RELATIVE_DATE.search(text or "")
+    if match:
+        unit = _RELATIVE_UNITS[match.group(2).lower()]
+        parsed = fetched_at - timedelta(**{unit: int(match.group(1))})
+    else:
+        for fmt in ("%b %d, %Y", "%d %b %Y", "%Y年%m月%d日", "%Y-%m-%d"):
+            try:
+                parsed = datetime.strptime((text or "").strip(), fmt)
+                break
+            except ValueError:
+                continue
+    latest = window_end + timedelta(hours=23, minutes=59, seconds=59)
+    if parsed is None or parsed > latest:
+        return latest
+    return max(parsed, window_start)
+
+
 def getNewsData(query, start_date, end_date):
     """
     Scrape Google News search results for a given query and date range.
     query: str - search query
     start_date: str - start date in the format yyyy-mm-dd or mm/dd/yyyy
     end_date: str - end date in the format yyyy-mm-dd or mm/dd/yyyy
+
+    Results are kept in the local news store per query: days already covered are
+    served from the store and only the missing tail of the range is scraped.
     """
-    if "-" in start_date:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        start_date = start_date.strftime("%m/%d/%Y")
-    if "-" in end_date:
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        end_date = end_date.strftime("%m/%d/%Y")
+    start_day = datetime.strptime(start_date, "%Y-%m-%d" if "-" in start_date else "%m/%d/%Y")
+    end_day = datetime.strptime(end_date, "%Y-%m-%d" if "-" in end_date else "%m/%d/%Y")
+
+    from .news_store import get_news_store
+    store = get_news_store()
+    if store is None:
+        news_results, _ = _scrape_news_pages(query, start_day.strftime("%m/%d/%Y"), end_day.strftime("%m/%d/%Y"))
+        return news_results
+
+    source = "google"
+    start_key, end_key = start_day.strftime("%Y-%m-%d"), end_day.strftime("%Y-%m-%d")
+    cursor = store.get_cursor(source, query) or {}
+    covered_from, covered_to = cursor.get("coverage_start"), cursor.get("coverage_end")
+    # 覆盖区间的最后一天在当天抓取时可能不完整，之后抓取过或仍在刷新间隔内才视为完整
+    last_fetch_day = datetime.fromtimestamp(cursor["fetched_at"]).strftime("%Y-%m-%d") if cursor.get("fetched_at") else None
+    last_day_complete = bool(covered_to) and (
+        (last_fetch_day is not None and last_fetch_day > covered_to) or store.is_fresh(source, query)
+    )
+
+    fetch_from = start_day
+    if covered_from and covered_from <= start_key and covered_to and covered_to >= start_key:
+        if covered_to > end_key or (covered_to == end_key and last_day_complete):
+            # 区间已完整覆盖
+            fetch_from = None
+        else:
+            # 只补抓覆盖区间之后的部分（最后一天可能不完整时从该天开始）
+            fetch_from = datetime.strptime(covered_to, "%Y-%m-%d")
+            if last_day_complete:
+                fetch_from += timedelta(days=1)
+
+    if fetch_from is None:
+        logger.info(f"[Google新闻] 📦 从本地新闻库读取: {query}, {start_key} 至 {end_key}")
+    else:
+        fetched_at = datetime.now()
+        results, complete = _scrape_news_pages(query, fetch_from.strftime("%m/%d/%Y"), end_day.strftime("%m/%d/%Y"))
+        items = [
+            {
+                "title": news["title"],
+                "content": news["snippet"],
+                "url": news["link"],
+                "publish_time": _parse_result_date(news["date"], fetched_at, fetch_from, end_day),
+                "payload": news,
+            }
+            for news in results
+        ]
+        try:
+            store.ingest(source, query, items,
+                         coverage=(fetch_from.strftime("%Y-%m-%d"), end_key) if complete else None)
+        except Exception as e:
+            logger.warning(f"⚠️ [Google新闻] 新闻库写入失败: {e}")
+            return results
+
+    return [item["payload"] for item in store.query(source, query, start_key, end_key) if item.get("payload")]
+
 
+def _scrape_news_pages(query, start_date, end_date):
+    """
+    Scrape all Google News result pages for a query and date range (mm/dd/yyyy).
+    Returns (results, complete) where complete is False if any page failed.
+    """
     headers = {
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -59,8 +143,12 @@ def getNewsData(query, start_date, end_date):
     }
 
     news_results = []
+    complete = True
     page = 0
     while True:
+        if page > 0:
+            # Random delay between pages to avoid detection
+            time.sleep(random.uniform(2, 6))
         offset = page * 10
         url = (
             f"https://www.google.com/search?q={query}"
@@ -107,6 +195,7 @@ def getNewsData(query, start_date, end_date):
             page += 1
 
         except requests.exceptions.Timeout as e:
+            complete = False
             logger.error(f"连接超时: {e}")
             # 不立即中断，记录错误后继续尝试下一页
             page += 1
@@ -115,6 +204,7 @@ def getNewsData(query, start_date, end_date):
                 break
             continue
         except requests.exceptions.ConnectionError as e:
+            complete = False
             logger.error(f"连接错误: {e}")
             # 不立即中断，记录错误后继续尝试下一页
             page += 1
@@ -123,7 +213,8 @@ def getNewsData(query, start_date, end_date):
                 break
             continue
         except Exception as e:
+            complete = False
             logger.error(f"获取Google新闻失败: {e}")
             break
 
-    return news_results
+    return news_results, complete
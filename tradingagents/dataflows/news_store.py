@@ -0,0 +1,296 @@
+"""
+本地增量新闻库
+各新闻源（东方财富、Google新闻、RSS）抓取到的新闻按 (来源, 股票) 写入 SQLite，
+并记录每个 (来源, 股票) 的游标：最新发布时间（高水位）、已覆盖的日期区间和最近抓取时间。
+游标未过期时直接从本地库返回新闻，过期后只需补抓游标之后的新内容；
+标题和正文建立 FTS5（trigram）全文索引，用于按股票代码/名称检索
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+DEFAULT_REFRESH_MINUTES = 15
+DEFAULT_RETENTION_DAYS = 30
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_items (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    title TEXT,
+    content TEXT,
+    url TEXT,
+    publish_time TEXT,
+    payload TEXT,
+    fetched_at REAL,
+    UNIQUE (source, ticker, item_key)
+);
+CREATE INDEX IF NOT EXISTS idx_news_items_time ON news_items (source, ticker, publish_time);
+CREATE TABLE IF NOT EXISTS news_cursors (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    high_water TEXT,
+    coverage_start TEXT,
+    coverage_end TEXT,
+    fetched_at REAL,
+    PRIMARY KEY (source, ticker)
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+    title, content, content='news_items', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS news_items_ai AFTER INSERT ON news_items BEGIN
+    INSERT INTO news_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS news_items_ad AFTER DELETE ON news_items BEGIN
+    INSERT INTO news_fts (news_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+"""
+
+
+def format_publish_time(value: Any) -> Optional[str]:
+    """把 datetime / Timestamp / 字符串统一为 ``YYYY-MM-DD HH:MM:SS``，无法解析时返回 None"""
+    if value is None or value == "":
+        return None
+    if hasattr(value, "strftime"):
+        try:
+            return value.strftime(TIME_FORMAT)
+        except ValueError:
+            return None
+    text = str(value).strip()
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(text, fmt).strftime(TIME_FORMAT)
+        except ValueError:
+            continue
+    return None
+
+
+def _item_key(item: Dict[str, Any]) -> str:
+    """新闻去重键：优先使用链接，没有链接时使用标题的哈希"""
+    url = item.get("url") or ""
+    if url:
+        return url
+    return "title:" + hashlib.sha1((item.get("title") or "").encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """SQLite 增量新闻库"""
+
+    def __init__(self, path: Optional[str] = None, refresh_minutes: float = DEFAULT_REFRESH_MINUTES,
+                 retention_days: float = DEFAULT_RETENTION_DAYS):
+        if path is None:
+            try:
+                from tradingagents.dataflows.config import get_config
+                cache_dir = get_config().get("data_cache_dir")
+            except Exception:
+                cache_dir = None
+            cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), "data_cache")
+            path = os.path.join(cache_dir, "news_store.sqlite")
+        self.path = path
+        self.refresh_seconds = refresh_minutes * 60
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            # 旧版 SQLite 不支持 trigram 分词器，检索退化为 LIKE
+            logger.warning(f"⚠️ [新闻库] 全文索引不可用，使用LIKE检索: {e}")
+            self.fts_enabled = False
+        self._conn.commit()
+
+    # ---- 游标 ----
+
+    def get_cursor(self, source: str, ticker: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM news_cursors WHERE source = ? AND ticker = ?", (source, ticker)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_fresh(self, source: str, ticker: str, max_age_seconds: Optional[float] = None) -> bool:
+        """该 (来源, 股票) 最近一次抓取是否仍在刷新间隔内"""
+        cursor = self.get_cursor(source, ticker)
+        if not cursor or cursor.get("fetched_at") is None:
+            return False
+        max_age = self.refresh_seconds if max_age_seconds is None else max_age_seconds
+        return time.time() - cursor["fetched_at"] < max_age
+
+    # ---- 写入 ----
+
+    def ingest(self, source: str, ticker: str, items: Iterable[Dict[str, Any]],
+               coverage: Optional[Tuple[str, str]] = None) -> int:
+        """
+        写入新抓取的新闻并推进游标
+
+        Args:
+            source: 新闻来源标识
+            ticker: 股票代码（或查询词），全市场新闻源使用空字符串
+            items: 新闻字典，包含 title / content / url / publish_time / payload（原始记录）
+            coverage: 本次抓取完整覆盖的日期区间 (YYYY-MM-DD, YYYY-MM-DD)，与已有区间相连时合并
+
+        Returns:
+            int: 新增的新闻条数
+        """
+        now = time.time()
+        rows = []
+        high_water = None
+        for item in items:
+            publish_time = format_publish_time(item.get("publish_time"))
+            if publish_time and (high_water is None or publish_time > high_water):
+                high_water = publish_time
+            rows.append((
+                source, ticker, _item_key(item),
+                item.get("title") or "", item.get("content") or "", item.get("url") or "",
+                publish_time,
+                json.dumps(item.get("payload"), ensure_ascii=False, default=str) if item.get("payload") is not None else None,
+                now,
+            ))
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO news_items "
+                "(source, ticker, item_key, title, content, url, publish_time, payload, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            inserted = self._conn.total_changes - before
+
+            # 清理超出保留期（按抓取时间）的新闻；有清理时旧的覆盖区间不再可靠
+            pruned = self._conn.execute(
+                "DELETE FROM news_items WHERE source = ? AND ticker = ? AND fetched_at < ?",
+                (source, ticker, now - self.retention_days * 86400),
+            ).rowcount
+
+            existing = self._conn.execute(
+                "SELECT * FROM news_cursors WHERE source = ? AND ticker = ?", (source, ticker)
+            ).fetchone()
+            existing = dict(existing) if existing else {}
+            if existing.get("high_water") and (high_water is None or existing["high_water"] > high_water):
+                high_water = existing["high_water"]
+            coverage_start, coverage_end = (None, None) if pruned else (existing.get("coverage_start"), existing.get("coverage_end"))
+            if coverage:
+                if coverage_start and coverage_end and coverage[0] <= coverage_end and coverage[1] >= coverage_start:
+                    coverage_start, coverage_end = min(coverage_start, coverage[0]), max(coverage_end, coverage[1])
+                else:
+                    coverage_start, coverage_end = coverage
+            self._conn.execute(
+                "INSERT OR REPLACE INTO news_cursors "
+                "(source, ticker, high_water, coverage_start, coverage_end, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (source, ticker, high_water, coverage_start, coverage_end, now),
+            )
+            self._conn.commit()
+
+        logger.debug(f"📦 [新闻库] {source}/{ticker or '*'}: 新增 {inserted}/{len(rows)} 条，高水位: {high_water}")
+        return inserted
+
+    # ---- 读取 ----
+
+    @staticmethod
+    def _row_to_item(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item["payload"] = json.loads(item["payload"]) if item.get("payload") else None
+        return item
+
+    @staticmethod
+    def _time_bounds(start: Optional[str], end: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if start:
+            clauses.append("publish_time >= ?")
+            params.append(format_publish_time(start) or start)
+        if end:
+            # 只给日期时包含当天全天
+            end_time = format_publish_time(end) or end
+            if len(str(end).strip()) <= 10:
+                end_time = end_time[:10] + " 23:59:59"
+            clauses.append("publish_time <= ?")
+            params.append(end_time)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def query(self, source: str, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按发布时间倒序返回 (来源, 股票) 在 [start, end] 内的新闻"""
+        where, params = self._time_bounds(start, end)
+        sql = f"SELECT * FROM news_items WHERE source = ? AND ticker = ?{where} ORDER BY publish_time DESC, id ASC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, [source, ticker] + params).fetchall()
+        return [self._row_to_item(row) for row in rows]
+
+    def search(self, text: str, source: Optional[str] = None, ticker: Optional[str] = None,
+               start: Optional[str] = None, end: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """全文检索标题或正文包含 text（不区分大小写）的新闻，按发布时间倒序"""
+        where, params = self._time_bounds(start, end)
+        if source is not None:
+            where += " AND source = ?"
+            params.append(source)
+        if ticker is not None:
+            where += " AND ticker = ?"
+            params.append(ticker)
+
+        # trigram 分词器至少需要3个字符
+        if self.fts_enabled and len(text) >= 3:
+            phrase = '"' + text.replace('"', '""') + '"'
+            sql = (f"SELECT news_items.* FROM news_fts JOIN news_items ON news_items.id = news_fts.rowid "
+                   f"WHERE news_fts MATCH ?{where} ORDER BY publish_time DESC, news_items.id ASC LIMIT {int(limit)}")
+            params = [phrase] + params
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql = (f"SELECT * FROM news_items WHERE (title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\')"
+                   f"{where} ORDER BY publish_time DESC, id ASC LIMIT {int(limit)}")
+            params = [pattern, pattern] + params
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_item(row) for row in rows]
+
+
+_news_store: Optional[NewsStore] = None
+_news_store_lock = threading.Lock()
+_news_store_failed = False
+
+
+def get_news_store() -> Optional[NewsStore]:
+    """获取全局新闻库实例；配置禁用或初始化失败时返回 None"""
+    global _news_store, _news_store_failed
+    if _news_store is None and not _news_store_failed:
+        with _news_store_lock:
+            if _news_store is None and not _news_store_failed:
+                try:
+                    from tradingagents.dataflows.config import get_config
+                    config = get_config()
+                except Exception:
+                    config = {}
+                if not config.get("news_store_enabled", True):
+                    return None
+                try:
+                    _news_store = NewsStore(
+                        refresh_minutes=config.get("news_store_refresh_minutes", DEFAULT_REFRESH_MINUTES),
+                        retention_days=config.get("news_store_retention_days", DEFAULT_RETENTION_DAYS),
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ [新闻库] 初始化失败，新闻将直接从网络获取: {e}")
+                    _news_store_failed = True
+    return _news_store
@@ -13,6 +13,7 @@ import yfinance as yf
 import pandas as pd
 from .cache_manager import get_cache
 from .config import get_config
+from .run_data_context import run_scoped
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -354,6 +355,7 @@ def get_optimized_us_data_provider() -> OptimizedUSDataProvider:
     return _us_data_provider
 
 
+@run_scoped("us_stock_data", bypass_param="force_refresh")
 def get_us_stock_data_cached(symbol: str, start_date: str, end_date: str, 
                            force_refresh: bool = False) -> str:
     """
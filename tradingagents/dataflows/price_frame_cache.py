@@ -0,0 +1,119 @@
+"""
+价格历史数据帧缓存
+离线 YFin 工具和在线路径（data_cache_dir 下的 CSV）共享同一份已解析的价格数据，
+按 (文件路径, 修改时间) 缓存在进程内，日期区间通过 searchsorted 定位，
+stockstats 指标在同一份包装数据上只计算一次
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+DEFAULT_LRU_SIZE = 32
+
+
+class PriceFrame:
+    """一个价格CSV文件的已解析视图"""
+
+    def __init__(self, data: pd.DataFrame):
+        # 保留原始列（包括字符串形式的 Date），输出格式与直接读取CSV一致
+        self.data = data
+        day_strings = data["Date"].astype(str).str[:10]
+        self.dates = pd.to_datetime(day_strings).values.astype("datetime64[D]")
+        self.is_sorted = bool(len(self.dates) < 2 or (np.diff(self.dates) >= np.timedelta64(0, "D")).all())
+        self._day_positions: Dict[str, int] = {}
+        for position, day in enumerate(day_strings):
+            self._day_positions.setdefault(day, position)
+        self._stats_frame = None
+        self._stats_lock = threading.Lock()
+
+    def has_day(self, day: str) -> bool:
+        return day in self._day_positions
+
+    def slice(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """返回 [start_date, end_date]（含）范围内的行，保留原始索引"""
+        start = np.datetime64(start_date, "D")
+        end = np.datetime64(end_date, "D")
+        if self.is_sorted:
+            lo = int(np.searchsorted(self.dates, start, side="left"))
+            hi = int(np.searchsorted(self.dates, end, side="right"))
+            return self.data.iloc[lo:hi]
+        return self.data[(self.dates >= start) & (self.dates <= end)]
+
+    def indicator_value(self, indicator: str, day: str):
+        """获取某个交易日的 stockstats 指标值；非交易日返回 None"""
+        position = self._day_positions.get(day)
+        if position is None:
+            return None
+        with self._stats_lock:
+            if self._stats_frame is None:
+                from stockstats import wrap
+                self._stats_frame = wrap(self.data.copy())
+            # stockstats 会把计算出的指标列缓存在包装数据上
+            values = self._stats_frame[indicator].values
+        return values[position]
+
+
+class PriceFrameCache:
+    """进程内价格数据帧 LRU 缓存，文件被重写后自动失效"""
+
+    def __init__(self, lru_size: int = DEFAULT_LRU_SIZE):
+        self.lru_size = lru_size
+        self._frames: "OrderedDict[str, Tuple[float, PriceFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> PriceFrame:
+        """
+        读取（或从缓存返回）价格CSV
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(path)
+            if cached is not None and cached[0] == mtime:
+                self._frames.move_to_end(path)
+                return cached[1]
+
+        frame = PriceFrame(pd.read_csv(path))
+        logger.debug(f"📦 [价格缓存] 已加载 {os.path.basename(path)}: {len(frame.data)} 行")
+
+        with self._lock:
+            self._frames[path] = (mtime, frame)
+            self._frames.move_to_end(path)
+            while len(self._frames) > self.lru_size:
+                self._frames.popitem(last=False)
+        return frame
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._frames.pop(os.path.abspath(path), None)
+
+
+_price_frame_cache: Optional[PriceFrameCache] = None
+_price_frame_cache_lock = threading.Lock()
+
+
+def get_price_frame_cache() -> PriceFrameCache:
+    """获取全局价格数据帧缓存实例"""
+    global _price_frame_cache
+    if _price_frame_cache is None:
+        with _price_frame_cache_lock:
+            if _price_frame_cache is None:
+                _price_frame_cache = PriceFrameCache()
+    return _price_frame_cache
+
+
+def get_price_frame(path: str) -> PriceFrame:
+    return get_price_frame_cache().get(path)
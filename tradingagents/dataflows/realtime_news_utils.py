@@ -11,11 +11,16 @@ from typing import List, Dict, Optional
 import time
 import os
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from tradingagents.utils.news_dedup import deduplicate_items, CONTENT_PREFIX_CHARS
+from tradingagents.dataflows.news_store import get_news_store
+from tradingagents.dataflows.rss_feed_cache import get_rss_feed_cache
+
 
 
 @dataclass
@@ -33,6 +38,13 @@ class NewsItem:
 class RealtimeNewsAggregator:
     """实时新闻聚合器"""
     
+    # 单个HTTP请求超时（秒）
+    REQUEST_TIMEOUT = 10
+    # 所有新闻源的全局截止时间（秒）
+    FETCH_DEADLINE = 30
+    # 高相关新闻的相关性阈值
+    HIGH_RELEVANCE_THRESHOLD = 0.8
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'TradingAgents-CN/1.0'
@@ -43,6 +55,18 @@ class RealtimeNewsAggregator:
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
         
+        # 所有新闻源共享同一个HTTP会话（复用连接）
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.request_timeout = self.REQUEST_TIMEOUT
+        self.fetch_deadline = self.FETCH_DEADLINE
+    
+    def _timed_fetch(self, fetch, ticker: str, hours_back: int):
+        """执行单个新闻源的获取并返回 (新闻列表, 耗时秒数)"""
+        fetch_start = datetime.now()
+        news = fetch(ticker, hours_back)
+        return news, (datetime.now() - fetch_start).total_seconds()
+        
     def get_realtime_stock_news(self, ticker: str, hours_back: int = 6, max_news: int = 10) -> List[NewsItem]:
         """
         获取实时股票新闻
@@ -55,67 +79,61 @@ class RealtimeNewsAggregator:
         """
         logger.info(f"[新闻聚合器] 开始获取 {ticker} 的实时新闻，回溯时间: {hours_back}小时")
         start_time = datetime.now()
-        all_news = []
-        
-        # 1. FinnHub实时新闻 (最高优先级)
-        logger.info(f"[新闻聚合器] 尝试从 FinnHub 获取 {ticker} 的新闻")
-        finnhub_start = datetime.now()
-        finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
-        finnhub_time = (datetime.now() - finnhub_start).total_seconds()
-        
-        if finnhub_news:
-            logger.info(f"[新闻聚合器] 成功从 FinnHub 获取 {len(finnhub_news)} 条新闻，耗时: {finnhub_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] FinnHub 未返回新闻，耗时: {finnhub_time:.2f}秒")
-            
-        all_news.extend(finnhub_news)
-        
-        # 2. Alpha Vantage新闻
-        logger.info(f"[新闻聚合器] 尝试从 Alpha Vantage 获取 {ticker} 的新闻")
-        av_start = datetime.now()
-        av_news = self._get_alpha_vantage_news(ticker, hours_back)
-        av_time = (datetime.now() - av_start).total_seconds()
         
-        if av_news:
-            logger.info(f"[新闻聚合器] 成功从 Alpha Vantage 获取 {len(av_news)} 条新闻，耗时: {av_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] Alpha Vantage 未返回新闻，耗时: {av_time:.2f}秒")
-            
-        all_news.extend(av_news)
-        
-        # 3. NewsAPI (如果配置了)
+        # 新闻源按优先级排列：专业API > 新闻API > 中文财经源，合并时按此顺序去重
+        sources = [
+            ("FinnHub", self._get_finnhub_realtime_news),
+            ("Alpha Vantage", self._get_alpha_vantage_news),
+        ]
         if self.newsapi_key:
-            logger.info(f"[新闻聚合器] 尝试从 NewsAPI 获取 {ticker} 的新闻")
-            newsapi_start = datetime.now()
-            newsapi_news = self._get_newsapi_news(ticker, hours_back)
-            newsapi_time = (datetime.now() - newsapi_start).total_seconds()
-            
-            if newsapi_news:
-                logger.info(f"[新闻聚合器] 成功从 NewsAPI 获取 {len(newsapi_news)} 条新闻，耗时: {newsapi_time:.2f}秒")
-            else:
-                logger.info(f"[新闻聚合器] NewsAPI 未返回新闻，耗时: {newsapi_time:.2f}秒")
-                
-            all_news.extend(newsapi_news)
+            sources.append(("NewsAPI", self._get_newsapi_news))
         else:
             logger.info(f"[新闻聚合器] NewsAPI 密钥未配置，跳过此新闻源")
+        sources.append(("中文财经", self._get_chinese_finance_news))
+        
+        # 并发请求所有新闻源，总耗时由最慢的源（或全局截止时间）决定，而不是各源耗时之和
+        results: Dict[str, List[NewsItem]] = {}
+        high_relevance_titles = set()
+        executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="news-source")
+        futures = {
+            executor.submit(self._timed_fetch, fetch, ticker, hours_back): name
+            for name, fetch in sources
+        }
+        logger.info(f"[新闻聚合器] 并发请求 {len(sources)} 个新闻源，截止时间: {self.fetch_deadline}秒")
         
-        # 4. 中文财经新闻源
-        logger.info(f"[新闻聚合器] 尝试获取 {ticker} 的中文财经新闻")
-        chinese_start = datetime.now()
-        chinese_news = self._get_chinese_finance_news(ticker, hours_back)
-        chinese_time = (datetime.now() - chinese_start).total_seconds()
+        try:
+            for future in as_completed(futures, timeout=self.fetch_deadline):
+                name = futures[future]
+                news, elapsed = future.result()
+                results[name] = news
+                
+                if news:
+                    logger.info(f"[新闻聚合器] 成功从 {name} 获取 {len(news)} 条新闻，耗时: {elapsed:.2f}秒")
+                else:
+                    logger.info(f"[新闻聚合器] {name} 未返回新闻，耗时: {elapsed:.2f}秒")
+                
+                # 已收集到足够多的高相关新闻时不再等待其余新闻源
+                for item in news:
+                    if item.relevance_score >= self.HIGH_RELEVANCE_THRESHOLD:
+                        high_relevance_titles.add(item.title.lower().strip())
+                if len(high_relevance_titles) >= max_news and len(results) < len(sources):
+                    pending = [futures[f] for f in futures if not f.done()]
+                    logger.info(f"[新闻聚合器] 已获取 {len(high_relevance_titles)} 条高相关新闻，提前结束，不再等待: {', '.join(pending)}")
+                    break
+        except FuturesTimeoutError:
+            pending = [futures[f] for f in futures if not f.done()]
+            logger.warning(f"[新闻聚合器] 新闻源超过截止时间 {self.fetch_deadline}秒 未返回，已跳过: {', '.join(pending)}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        if chinese_news:
-            logger.info(f"[新闻聚合器] 成功获取 {len(chinese_news)} 条中文财经新闻，耗时: {chinese_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] 未获取到中文财经新闻，耗时: {chinese_time:.2f}秒")
-            
-        all_news.extend(chinese_news)
+        all_news = []
+        for name, _ in sources:
+            all_news.extend(results.get(name, []))
         
         # 去重和排序
         logger.info(f"[新闻聚合器] 开始对 {len(all_news)} 条新闻进行去重和排序")
         dedup_start = datetime.now()
-        unique_news = self._deduplicate_news(all_news)
+        unique_news = self._deduplicate_news(all_news, ticker)
         sorted_news = sorted(unique_news, key=lambda x: x.publish_time, reverse=True)
         dedup_time = (datetime.now() - dedup_start).total_seconds()
         
@@ -159,7 +177,7 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, timeout=self.request_timeout)
             response.raise_for_status()
             
             news_data = response.json()
@@ -204,7 +222,7 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, timeout=self.request_timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -264,7 +282,7 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, timeout=self.request_timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -425,50 +443,76 @@ class RealtimeNewsAggregator:
             logger.error(f"[中文财经新闻] 中文财经新闻获取失败: {e}")
             return []
     
+    def _load_rss_entries(self, rss_url: str) -> List[Dict]:
+        """
+        获取RSS条目：所有股票共用进程内的RSS源缓存（过期后发起条件请求），
+        下载到新内容时写入本地新闻库；进程启动后首次使用时优先用新闻库中未过期的条目预填缓存
+        """
+        feed_cache = get_rss_feed_cache()
+        store = get_news_store()
+        source = f"rss:{rss_url}"
+        
+        if store is not None and not feed_cache.is_cached(rss_url):
+            cursor = store.get_cursor(source, '')
+            if cursor and cursor.get('fetched_at') and time.time() - cursor['fetched_at'] < feed_cache.ttl_seconds:
+                entries = [
+                    {
+                        'title': item['title'],
+                        'content': item['content'],
+                        'url': item['url'],
+                        'publish_time': datetime.strptime(item['publish_time'], '%Y-%m-%d %H:%M:%S'),
+                        'search_text': f"{item['title']}\n{item['content']}".lower(),
+                    }
+                    for item in store.query(source, '')
+                ]
+                feed_cache.seed(rss_url, entries, cursor['fetched_at'])
+                logger.info(f"[RSS解析] 📦 从本地新闻库预填RSS缓存: {len(entries)} 条")
+        
+        entries, downloaded = feed_cache.get(rss_url, session=self.session, timeout=self.request_timeout)
+        if downloaded and store is not None and entries:
+            try:
+                inserted = store.ingest(source, '', entries)
+                logger.info(f"[RSS解析] 📦 新闻库新增 {inserted} 条RSS条目")
+            except Exception as e:
+                logger.warning(f"⚠️ [RSS解析] 新闻库写入失败: {e}")
+        return entries
+    
     def _parse_rss_feed(self, rss_url: str, ticker: str, hours_back: int) -> List[NewsItem]:
         """解析RSS源"""
         logger.info(f"[RSS解析] 开始解析RSS源: {rss_url}，股票: {ticker}，回溯时间: {hours_back}小时")
         start_time = datetime.now()
         
         try:
-            # 实际实现需要使用feedparser库
-            # 这里是简化实现，实际项目中应该替换为真实的RSS解析逻辑
-            import feedparser
-            
-            logger.info(f"[RSS解析] 尝试获取RSS源内容")
-            feed = feedparser.parse(rss_url)
-            
-            if not feed or not feed.entries:
+            entries = self._load_rss_entries(rss_url)
+            if not entries:
                 logger.warning(f"[RSS解析] RSS源未返回有效内容")
                 return []
             
-            logger.info(f"[RSS解析] 成功获取RSS源，包含 {len(feed.entries)} 条条目")
+            # 条目在所有股票间共享，只在内存中按时效性和股票代码过滤
+            ticker_lower = ticker.lower()
+            cutoff = datetime.now() - timedelta(hours=hours_back)
+            
             news_items = []
             processed_count = 0
             skipped_count = 0
             
-            for entry in feed.entries:
+            for entry in entries:
                 try:
-                    # 解析时间
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        publish_time = datetime.fromtimestamp(time.mktime(entry.published_parsed))
-                    else:
-                        logger.warning(f"[RSS解析] 条目缺少发布时间，使用当前时间")
-                        publish_time = datetime.now()
+                    publish_time = entry['publish_time']
                     
                     # 检查时效性
-                    if publish_time < datetime.now() - timedelta(hours=hours_back):
+                    if publish_time < cutoff:
                         skipped_count += 1
                         continue
                     
-                    title = entry.title if hasattr(entry, 'title') else ''
-                    content = entry.description if hasattr(entry, 'description') else ''
-                    
                     # 检查相关性
-                    if ticker.lower() not in title.lower() and ticker.lower() not in content.lower():
+                    if ticker_lower not in entry['search_text']:
                         skipped_count += 1
                         continue
                     
+                    title = entry['title']
+                    content = entry['content']
+                    
                     # 评估紧急程度
                     urgency = self._assess_news_urgency(title, content)
                     
@@ -477,7 +521,7 @@ class RealtimeNewsAggregator:
                         content=content,
                         source='财联社',
                         publish_time=publish_time,
-                        url=entry.link if hasattr(entry, 'link') else '',
+                        url=entry['url'],
                         urgency=urgency,
                         relevance_score=self._calculate_relevance(title, ticker)
                     ))
@@ -562,7 +606,7 @@ class RealtimeNewsAggregator:
         logger.debug(f"[相关性计算] 未检测到明确相关性，使用默认评分: 0.3，标题: {title[:50]}...")
         return 0.3  # 默认相关性
     
-    def _deduplicate_news(self, news_items: List[NewsItem]) -> List[NewsItem]:
+    def _deduplicate_news(self, news_items: List[NewsItem], ticker: Optional[str] = None) -> List[NewsItem]:
         """去重新闻"""
         logger.info(f"[新闻去重] 开始对 {len(news_items)} 条新闻进行去重处理")
         start_time = datetime.now()
@@ -592,9 +636,18 @@ class RealtimeNewsAggregator:
             seen_titles.add(title_key)
             unique_news.append(item)
         
+        # 近似重复：转载、标题微调的同一条新闻
+        exact_unique_count = len(unique_news)
+        unique_news = deduplicate_items(
+            unique_news,
+            key=lambda item: f"{item.title} {(item.content or '')[:CONTENT_PREFIX_CHARS]}",
+            scope=ticker,
+        )
+        near_duplicate_count = exact_unique_count - len(unique_news)
+        
         # 记录去重结果
         time_taken = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，")
+        logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，近似重复: {near_duplicate_count}条")
         logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
         
         return unique_news
@@ -6,6 +6,9 @@ from contextlib import contextmanager
 from typing import Annotated
 import os
 import re
+import threading
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 
 ticker_to_company = {
     "AAPL": "Apple",
@@ -49,87 +52,192 @@ ticker_to_company = {
 }
 
 
-def fetch_top_from_category(
+INDEX_DIR_NAME = ".reddit_index"
+INDEX_VERSION = 1
+
+
+@lru_cache(maxsize=256)
+def get_company_matcher(query: str):
+    """Compile all aliases of a ticker into a single case-insensitive pattern."""
+    aliases = ticker_to_company[query]
+    if "OR" in aliases:
+        search_terms = aliases.split(" OR ")
+    else:
+        search_terms = [aliases]
+    search_terms.append(query)
+    return re.compile("|".join(f"(?:{term})" for term in search_terms), re.IGNORECASE)
+
+
+class RedditIndex:
+    """
+    Date- and subreddit-partitioned index over the JSONL dumps of one category.
+
+    The JSONL files are scanned once; posts are grouped per day and subreddit,
+    pre-sorted by upvotes and written to ``<data_path>/.reddit_index/<category>/<date>.json``.
+    The index is rebuilt whenever a source file changes (size or mtime).
+    """
+
+    def __init__(self, data_path: str, category: str):
+        self.data_path = data_path
+        self.category = category
+        self.category_dir = os.path.join(data_path, category)
+        self.index_dir = os.path.join(data_path, INDEX_DIR_NAME, category)
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._days = {}
+
+    def _source_signature(self):
+        entries = sorted(os.listdir(self.category_dir))
+        files = {}
+        for name in entries:
+            if name.endswith(".jsonl"):
+                stat = os.stat(os.path.join(self.category_dir, name))
+                files[name] = [stat.st_size, stat.st_mtime]
+        return len(entries), files
+
+    def _ensure_built(self):
+        num_entries, files = self._source_signature()
+        manifest = self._manifest
+        if manifest is None:
+            try:
+                with open(os.path.join(self.index_dir, "manifest.json"), "r") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+        if (
+            manifest is None
+            or manifest.get("version") != INDEX_VERSION
+            or manifest.get("files") != files
+        ):
+            manifest = self._build(files)
+        manifest["num_entries"] = num_entries
+        if manifest is not self._manifest:
+            self._days = {}
+        self._manifest = manifest
+        return manifest
+
+    def _build(self, files):
+        days = {}
+        subreddits = sorted(name[: -len(".jsonl")] for name in files)
+        for subreddit in subreddits:
+            with open(os.path.join(self.category_dir, subreddit + ".jsonl"), "rb") as f:
+                for line in f:
+                    # skip empty lines
+                    if not line.strip():
+                        continue
+
+                    parsed_line = json.loads(line)
+                    post_date = datetime.utcfromtimestamp(
+                        parsed_line["created_utc"]
+                    ).strftime("%Y-%m-%d")
+                    days.setdefault(post_date, {}).setdefault(subreddit, []).append(
+                        {
+                            "title": parsed_line["title"],
+                            "content": parsed_line["selftext"],
+                            "url": parsed_line["url"],
+                            "upvotes": parsed_line["ups"],
+                            "posted_date": post_date,
+                        }
+                    )
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        for post_date, by_subreddit in days.items():
+            for posts in by_subreddit.values():
+                posts.sort(key=lambda x: x["upvotes"], reverse=True)
+            with open(os.path.join(self.index_dir, f"{post_date}.json"), "w") as f:
+                json.dump(by_subreddit, f)
+
+        manifest = {
+            "version": INDEX_VERSION,
+            "files": files,
+            "subreddits": subreddits,
+            "dates": sorted(days),
+        }
+        with open(os.path.join(self.index_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        return manifest
+
+    def _load_day(self, post_date):
+        if post_date not in self._days:
+            with open(os.path.join(self.index_dir, f"{post_date}.json"), "r") as f:
+                self._days[post_date] = json.load(f)
+        return self._days[post_date]
+
+    def fetch_range(self, start_date, end_date, max_limit, query=None):
+        """Top posts per subreddit for every day in [start_date, end_date], in date order."""
+        with self._lock:
+            manifest = self._ensure_built()
+
+            if max_limit < manifest["num_entries"]:
+                raise ValueError(
+                    "REDDIT FETCHING ERROR: max limit is less than the number of files in the category. Will not be able to fetch any posts"
+                )
+            limit_per_subreddit = max_limit // manifest["num_entries"]
+
+            # if is company_news, check that the title or the content has the company's name (query) mentioned
+            matcher = None
+            if "company" in self.category and query:
+                matcher = get_company_matcher(query)
+
+            dates = manifest["dates"]
+            all_content = []
+            for post_date in dates[bisect_left(dates, start_date) : bisect_right(dates, end_date)]:
+                by_subreddit = self._load_day(post_date)
+                for subreddit in manifest["subreddits"]:
+                    selected = []
+                    for post in by_subreddit.get(subreddit, ()):
+                        if len(selected) >= limit_per_subreddit:
+                            break
+                        if matcher is not None and not (
+                            matcher.search(post["title"]) or matcher.search(post["content"])
+                        ):
+                            continue
+                        selected.append(post)
+                    all_content.extend(selected)
+
+            return all_content
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_reddit_index(data_path: str, category: str) -> RedditIndex:
+    key = (os.path.abspath(data_path), category)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = RedditIndex(data_path, category)
+        return _indexes[key]
+
+
+def fetch_top_from_date_range(
     category: Annotated[
         str, "Category to fetch top post from. Collection of subreddits."
     ],
-    date: Annotated[str, "Date to fetch top posts from."],
-    max_limit: Annotated[int, "Maximum number of posts to fetch."],
+    start_date: Annotated[str, "First date (yyyy-mm-dd) to fetch top posts from."],
+    end_date: Annotated[str, "Last date (yyyy-mm-dd) to fetch top posts from."],
+    max_limit: Annotated[int, "Maximum number of posts to fetch per day."],
     query: Annotated[str, "Optional query to search for in the subreddit."] = None,
     data_path: Annotated[
         str,
         "Path to the data folder. Default is 'reddit_data'.",
     ] = "reddit_data",
 ):
-    base_path = data_path
-
-    all_content = []
-
-    if max_limit < len(os.listdir(os.path.join(base_path, category))):
-        raise ValueError(
-            "REDDIT FETCHING ERROR: max limit is less than the number of files in the category. Will not be able to fetch any posts"
-        )
-
-    limit_per_subreddit = max_limit // len(
-        os.listdir(os.path.join(base_path, category))
+    return get_reddit_index(data_path, category).fetch_range(
+        start_date, end_date, max_limit, query
     )
 
-    for data_file in os.listdir(os.path.join(base_path, category)):
-        # check if data_file is a .jsonl file
-        if not data_file.endswith(".jsonl"):
-            continue
-
-        all_content_curr_subreddit = []
-
-        with open(os.path.join(base_path, category, data_file), "rb") as f:
-            for i, line in enumerate(f):
-                # skip empty lines
-                if not line.strip():
-                    continue
-
-                parsed_line = json.loads(line)
-
-                # select only lines that are from the date
-                post_date = datetime.utcfromtimestamp(
-                    parsed_line["created_utc"]
-                ).strftime("%Y-%m-%d")
-                if post_date != date:
-                    continue
-
-                # if is company_news, check that the title or the content has the company's name (query) mentioned
-                if "company" in category and query:
-                    search_terms = []
-                    if "OR" in ticker_to_company[query]:
-                        search_terms = ticker_to_company[query].split(" OR ")
-                    else:
-                        search_terms = [ticker_to_company[query]]
-
-                    search_terms.append(query)
-
-                    found = False
-                    for term in search_terms:
-                        if re.search(
-                            term, parsed_line["title"], re.IGNORECASE
-                        ) or re.search(term, parsed_line["selftext"], re.IGNORECASE):
-                            found = True
-                            break
 
-                    if not found:
-                        continue
-
-                post = {
-                    "title": parsed_line["title"],
-                    "content": parsed_line["selftext"],
-                    "url": parsed_line["url"],
-                    "upvotes": parsed_line["ups"],
-                    "posted_date": post_date,
-                }
-
-                all_content_curr_subreddit.append(post)
-
-        # sort all_content_curr_subreddit by upvote_ratio in descending order
-        all_content_curr_subreddit.sort(key=lambda x: x["upvotes"], reverse=True)
-
-        all_content.extend(all_content_curr_subreddit[:limit_per_subreddit])
-
-    return all_content
+def fetch_top_from_category(
+    category: Annotated[
+        str, "Category to fetch top post from. Collection of subreddits."
+    ],
+    date: Annotated[str, "Date to fetch top posts from."],
+    max_limit: Annotated[int, "Maximum number of posts to fetch."],
+    query: Annotated[str, "Optional query to search for in the subreddit."] = None,
+    data_path: Annotated[
+        str,
+        "Path to the data folder. Default is 'reddit_data'.",
+    ] = "reddit_data",
+):
+    return fetch_top_from_date_range(category, date, date, max_limit, query, data_path)
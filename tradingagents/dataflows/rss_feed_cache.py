@@ -0,0 +1,148 @@
+"""
+RSS 源共享缓存
+每个RSS源在进程内只保存一份已解析的条目，所有股票共用；缓存过期后用 ETag / Last-Modified
+发起条件请求，源未更新（304）时只刷新缓存时间，不重新下载和解析
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_TIMEOUT = 10
+
+
+@dataclass
+class CachedFeed:
+    """一个RSS源的已解析条目及条件请求校验信息"""
+    entries: List[Dict] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+def parse_feed_entries(content: bytes) -> List[Dict]:
+    """用 feedparser 解析RSS内容，转换为 title / content / url / publish_time / search_text 字典"""
+    import feedparser
+
+    feed = feedparser.parse(content)
+    entries = []
+    for entry in feed.entries:
+        # 解析时间
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+            publish_time = datetime.fromtimestamp(time.mktime(entry.published_parsed))
+        else:
+            logger.warning(f"[RSS缓存] 条目缺少发布时间，使用当前时间")
+            publish_time = datetime.now()
+        title = entry.title if hasattr(entry, 'title') else ''
+        content_text = entry.description if hasattr(entry, 'description') else ''
+        entries.append({
+            'title': title,
+            'content': content_text,
+            'url': entry.link if hasattr(entry, 'link') else '',
+            'publish_time': publish_time,
+            # 预先转小写，按股票过滤时不再逐条转换
+            'search_text': f"{title}\n{content_text}".lower(),
+        })
+    return entries
+
+
+class RSSFeedCache:
+    """进程内RSS源缓存，按URL单飞刷新"""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._feeds: Dict[str, CachedFeed] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'not_modified': 0, 'downloads': 0}
+
+    def _feed(self, url: str) -> CachedFeed:
+        with self._lock:
+            feed = self._feeds.get(url)
+            if feed is None:
+                feed = self._feeds[url] = CachedFeed()
+            return feed
+
+    def is_cached(self, url: str) -> bool:
+        with self._lock:
+            feed = self._feeds.get(url)
+        return feed is not None and feed.fetched_at > 0
+
+    def seed(self, url: str, entries: List[Dict], fetched_at: float):
+        """用其他来源（如本地新闻库）中的条目预填缓存，没有条件请求校验信息"""
+        feed = self._feed(url)
+        with feed.lock:
+            if feed.fetched_at < fetched_at:
+                feed.entries = entries
+                feed.fetched_at = fetched_at
+
+    def get(self, url: str, session: Optional[requests.Session] = None,
+            timeout: float = DEFAULT_TIMEOUT) -> Tuple[List[Dict], bool]:
+        """
+        获取RSS源条目
+
+        Returns:
+            (条目列表, 是否下载了新内容)
+        """
+        feed = self._feed(url)
+        # 同一个源同时只有一个线程刷新，其余线程等待后直接使用刷新结果
+        with feed.lock:
+            if feed.fetched_at and time.time() - feed.fetched_at < self.ttl_seconds:
+                self.stats['hits'] += 1
+                return feed.entries, False
+
+            headers = {}
+            if feed.etag:
+                headers['If-None-Match'] = feed.etag
+            if feed.last_modified:
+                headers['If-Modified-Since'] = feed.last_modified
+
+            try:
+                response = (session or requests).get(url, headers=headers, timeout=timeout)
+                if response.status_code == 304:
+                    self.stats['not_modified'] += 1
+                    feed.fetched_at = time.time()
+                    logger.debug(f"[RSS缓存] 源未更新(304): {url}")
+                    return feed.entries, False
+                response.raise_for_status()
+            except requests.RequestException as e:
+                if feed.entries:
+                    logger.warning(f"⚠️ [RSS缓存] 刷新失败，继续使用缓存的 {len(feed.entries)} 条条目: {e}")
+                    return feed.entries, False
+                raise
+
+            feed.entries = parse_feed_entries(response.content)
+            feed.etag = response.headers.get('ETag')
+            feed.last_modified = response.headers.get('Last-Modified')
+            feed.fetched_at = time.time()
+            self.stats['downloads'] += 1
+            logger.info(f"[RSS缓存] 已下载并解析RSS源: {url}，{len(feed.entries)} 条条目")
+            return feed.entries, True
+
+
+_rss_feed_cache: Optional[RSSFeedCache] = None
+_rss_feed_cache_lock = threading.Lock()
+
+
+def get_rss_feed_cache() -> RSSFeedCache:
+    """获取全局RSS源缓存实例"""
+    global _rss_feed_cache
+    if _rss_feed_cache is None:
+        with _rss_feed_cache_lock:
+            if _rss_feed_cache is None:
+                try:
+                    from tradingagents.dataflows.config import get_config
+                    ttl = get_config().get("rss_feed_ttl_seconds", DEFAULT_TTL_SECONDS)
+                except Exception:
+                    ttl = DEFAULT_TTL_SECONDS
+                _rss_feed_cache = RSSFeedCache(ttl_seconds=ttl)
+    return _rss_feed_cache
@@ -0,0 +1,136 @@
+"""
+分析运行级数据上下文
+一次分析（数据预获取 + 分析师工具调用）期间共享已获取的行情和股票信息：
+数据预获取阶段验证股票时拉取的行情和基本信息写入上下文，分析师工具以相同参数再次请求时直接复用，
+每个数据集在一次分析中只访问一次上游数据源。上下文通过 contextvars 绑定，不同分析互不影响
+"""
+
+import copy
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+def is_valid_data(value: Any) -> bool:
+    """判断数据接口返回值是否可复用：失败时接口返回带❌的文本或带error字段的字典"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip()) and "❌" not in value
+    if isinstance(value, dict):
+        return bool(value) and 'error' not in value and value.get('source') not in ('fallback', 'error')
+    return True
+
+
+class RunDataContext:
+    """一次分析运行内按 (数据集, 参数) 缓存的数据"""
+
+    def __init__(self):
+        self._data: Dict[Tuple, Any] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'fetches': 0}
+
+    def _key_lock(self, key: Tuple) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get_or_fetch(self, dataset: str, params: Tuple, loader: Callable[[], Any],
+                     is_valid: Callable[[Any], bool] = is_valid_data) -> Any:
+        """命中时直接返回；未命中时加载，同一数据集同一参数并发请求只加载一次，仅缓存有效结果"""
+        key = (dataset,) + params
+        with self._key_lock(key):
+            with self._lock:
+                found = key in self._data
+                value = self._data.get(key)
+            if found:
+                with self._lock:
+                    self.stats['hits'] += 1
+                logger.info(f"♻️ [运行数据] 复用本次分析已获取的数据: {dataset} {params}")
+                # 字典结果返回副本，避免调用方修改影响后续复用
+                return copy.copy(value) if isinstance(value, dict) else value
+
+            value = loader()
+            with self._lock:
+                self.stats['fetches'] += 1
+                if is_valid(value):
+                    self._data[key] = value
+            return value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+_current_run_data: ContextVar[Optional[RunDataContext]] = ContextVar('run_data_context', default=None)
+
+
+def get_run_data_context() -> Optional[RunDataContext]:
+    """获取当前绑定的运行数据上下文，没有绑定时返回 None"""
+    return _current_run_data.get()
+
+
+def activate_run_data_context(context: Optional[RunDataContext]):
+    """在当前执行上下文中绑定运行数据上下文，返回用于恢复的 token"""
+    return _current_run_data.set(context)
+
+
+@contextmanager
+def use_run_data_context(context: Optional[RunDataContext]):
+    """在 with 块内绑定运行数据上下文；传入 None 时不做任何绑定"""
+    if context is None:
+        yield None
+        return
+    token = _current_run_data.set(context)
+    try:
+        yield context
+    finally:
+        _current_run_data.reset(token)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().upper()
+    return value
+
+
+def run_scoped(dataset: str, is_valid: Callable[[Any], bool] = is_valid_data,
+               bypass_param: Optional[str] = None):
+    """
+    数据接口装饰器：绑定了运行数据上下文时，相同参数的调用在本次分析中只访问一次上游
+
+    Args:
+        dataset: 数据集名称，与参数一起组成缓存键
+        is_valid: 判断结果是否可缓存
+        bypass_param: 为真时跳过上下文的参数名（如 force_refresh）
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = _current_run_data.get()
+            if context is None:
+                return func(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+            except TypeError:
+                return func(*args, **kwargs)
+            arguments = dict(bound.arguments)
+            if bypass_param and arguments.pop(bypass_param, False):
+                return func(*args, **kwargs)
+            params = tuple(_normalize(value) for value in arguments.values())
+            return context.get_or_fetch(dataset, params, lambda: func(*args, **kwargs), is_valid)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+SimFin 基本面数据预索引存储
+首次使用时把 SimFin 全量 CSV 按股票代码拆分为独立分区文件（已解析日期、按发布日期排序），
+之后按代码只读取对应分区，并在进程内 LRU 缓存；"当前日期前最新发布的报表"通过二分查找获得
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 报表类型 -> (SimFin 目录名, CSV 文件名前缀)
+SIMFIN_STATEMENTS = {
+    "balance_sheet": ("balance_sheet", "us-balance"),
+    "cashflow": ("cash_flow", "us-cashflow"),
+    "income": ("income_statements", "us-income"),
+}
+
+# 进程内缓存的分区数量上限
+DEFAULT_LRU_SIZE = 256
+
+_MANIFEST_FILE = "manifest.json"
+
+
+class SimFinStore:
+    """按 (报表类型, 频率, 股票代码) 分区的 SimFin 数据存储"""
+
+    def __init__(self, data_dir: str, lru_size: int = DEFAULT_LRU_SIZE):
+        self.data_dir = data_dir
+        self.store_dir = os.path.join(data_dir, "fundamental_data", "simfin_store")
+        self.lru_size = lru_size
+        self._frames: "OrderedDict[Tuple[str, str, str], Optional[Tuple[pd.DataFrame, np.ndarray]]]" = OrderedDict()
+        self._manifests: Dict[Tuple[str, str], dict] = {}
+        self._lock = threading.RLock()
+
+    def _source_path(self, statement: str, freq: str) -> str:
+        folder, prefix = SIMFIN_STATEMENTS[statement]
+        return os.path.join(
+            self.data_dir,
+            "fundamental_data",
+            "simfin_data_all",
+            folder,
+            "companies",
+            "us",
+            f"{prefix}-{freq}.csv",
+        )
+
+    def _partition_dir(self, statement: str, freq: str) -> str:
+        return os.path.join(self.store_dir, statement, freq)
+
+    @staticmethod
+    def _partition_file(ticker: str) -> str:
+        # 代码中可能含有 "/" 等字符（如 BRK/B），转换成安全的文件名
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in ticker)
+        return f"{safe}.pkl"
+
+    def _ensure_ingested(self, statement: str, freq: str) -> dict:
+        """分区不存在或源 CSV 有更新时重新导入"""
+        key = (statement, freq)
+        source = self._source_path(statement, freq)
+        source_mtime = os.path.getmtime(source)
+
+        manifest = self._manifests.get(key)
+        if manifest and manifest.get("source_mtime") == source_mtime:
+            return manifest
+
+        manifest_path = os.path.join(self._partition_dir(statement, freq), _MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if manifest.get("source_mtime") == source_mtime:
+                    self._manifests[key] = manifest
+                    return manifest
+            except Exception as e:
+                logger.warning(f"⚠️ [SimFin存储] 索引文件读取失败，重新导入: {e}")
+
+        manifest = self._ingest(statement, freq, source, source_mtime)
+        self._manifests[key] = manifest
+        # 源数据更新后旧分区缓存失效
+        for cache_key in [k for k in self._frames if k[:2] == key]:
+            del self._frames[cache_key]
+        return manifest
+
+    def _ingest(self, statement: str, freq: str, source: str, source_mtime: float) -> dict:
+        logger.info(f"📊 [SimFin存储] 首次导入 {os.path.basename(source)}，按股票代码分区...")
+        df = pd.read_csv(source, sep=";")
+
+        # Convert date strings to datetime objects and remove any time components
+        df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
+        df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+        df = df.dropna(subset=["Ticker"])
+        df = df.sort_values(["Ticker", "Publish Date"], kind="mergesort")
+
+        partition_dir = self._partition_dir(statement, freq)
+        os.makedirs(partition_dir, exist_ok=True)
+
+        tickers = {}
+        for ticker, group in df.groupby("Ticker", sort=False):
+            file_name = self._partition_file(str(ticker))
+            group.to_pickle(os.path.join(partition_dir, file_name))
+            tickers[str(ticker)] = file_name
+
+        manifest = {"source_mtime": source_mtime, "tickers": tickers}
+        tmp_path = os.path.join(partition_dir, _MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(partition_dir, _MANIFEST_FILE))
+
+        logger.info(f"✅ [SimFin存储] 导入完成: {len(tickers)} 个代码, {len(df)} 行")
+        return manifest
+
+    def _load_partition(self, statement: str, freq: str, ticker: str) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+        key = (statement, freq, ticker)
+        with self._lock:
+            manifest = self._ensure_ingested(statement, freq)
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key]
+
+            file_name = manifest["tickers"].get(ticker)
+            entry = None
+            if file_name:
+                frame = pd.read_pickle(os.path.join(self._partition_dir(statement, freq), file_name))
+                publish_dates = frame["Publish Date"].values.astype("datetime64[ns]")
+                entry = (frame, publish_dates)
+
+            self._frames[key] = entry
+            if len(self._frames) > self.lru_size:
+                self._frames.popitem(last=False)
+            return entry
+
+    def get_latest_report(self, statement: str, freq: str, ticker: str, curr_date: str) -> Optional[pd.Series]:
+        """
+        获取指定日期（含）之前最新发布的报表
+
+        Args:
+            statement: 报表类型 balance_sheet / cashflow / income
+            freq: annual / quarterly
+            ticker: 股票代码
+            curr_date: 当前日期 yyyy-mm-dd
+
+        Returns:
+            pd.Series: 报表行；没有符合条件的报表时返回 None
+        """
+        entry = self._load_partition(statement, freq, ticker)
+        if entry is None:
+            return None
+        frame, publish_dates = entry
+
+        curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+        target = np.datetime64(curr_date_dt.tz_convert(None), "ns")
+        pos = int(np.searchsorted(publish_dates, target, side="right")) - 1
+        if pos < 0:
+            return None
+        # 同一天发布多份报表时取第一份，与 idxmax 行为一致
+        pos = int(np.searchsorted(publish_dates, publish_dates[pos], side="left"))
+        return frame.iloc[pos]
+
+
+_stores: Dict[str, SimFinStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_simfin_store(data_dir: str) -> SimFinStore:
+    """获取指定数据目录的 SimFin 存储实例"""
+    with _stores_lock:
+        store = _stores.get(data_dir)
+        if store is None:
+            store = SimFinStore(data_dir)
+            _stores[data_dir] = store
+        return store
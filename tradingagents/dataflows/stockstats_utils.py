@@ -1,9 +1,9 @@
 import pandas as pd
 import yfinance as yf
-from stockstats import wrap
 from typing import Annotated
 import os
 from .config import get_config
+from .price_frame_cache import get_price_frame
 
 
 class StockstatsUtils:
@@ -25,18 +25,14 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
-        data = None
-
         if not online:
             try:
-                data = pd.read_csv(
+                frame = get_price_frame(
                     os.path.join(
                         data_dir,
                         f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
                     )
                 )
-                df = wrap(data)
             except FileNotFoundError:
                 raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
         else:
@@ -58,10 +54,7 @@ class StockstatsUtils:
                 f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
             )
 
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
+            if not os.path.exists(data_file):
                 data = yf.download(
                     symbol,
                     start=start_date,
@@ -73,15 +66,13 @@ class StockstatsUtils:
                 data = data.reset_index()
                 data.to_csv(data_file, index=False)
 
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
+            frame = get_price_frame(data_file)
             curr_date = curr_date.strftime("%Y-%m-%d")
 
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
+        # shared parsed frame: stockstats computes each indicator once per file
+        indicator_value = frame.indicator_value(indicator, curr_date)
 
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
+        if indicator_value is not None:
             return indicator_value
         else:
             return "N/A: Not a trading day (weekend or holiday)"
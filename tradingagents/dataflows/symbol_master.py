@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+本地股票代码主表
+覆盖A股、港股、美股的代码/名称/行业，按天批量刷新并持久化到本地，
+内存中以列式数组保存，并建立代码前缀、名称前缀树和拼音首字母索引，
+代码/名称搜索和市场识别无需访问远程接口，离线也可使用
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from pypinyin import lazy_pinyin, Style
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+    logger.debug("📊 [代码主表] 未安装pypinyin，拼音首字母搜索不可用")
+
+
+# 内置种子数据，主表首次刷新完成前也能查到常用股票
+_SEED_SYMBOLS = [
+    ('000001', '平安银行', 'china'), ('000002', '万科A', 'china'),
+    ('000858', '五粮液', 'china'), ('000895', '双汇发展', 'china'),
+    ('000651', '格力电器', 'china'), ('000333', '美的集团', 'china'),
+    ('002594', '比亚迪', 'china'), ('002415', '海康威视', 'china'),
+    ('002304', '洋河股份', 'china'), ('300001', '特锐德', 'china'),
+    ('300015', '爱尔眼科', 'china'), ('300059', '东方财富', 'china'),
+    ('300750', '宁德时代', 'china'), ('600519', '贵州茅台', 'china'),
+    ('600036', '招商银行', 'china'), ('601398', '工商银行', 'china'),
+    ('601127', '小康股份', 'china'), ('600000', '浦发银行', 'china'),
+    ('601318', '中国平安', 'china'), ('600276', '恒瑞医药', 'china'),
+    ('600887', '伊利股份', 'china'), ('600028', '中国石化', 'china'),
+    ('688981', '中芯国际', 'china'), ('688599', '天合光能', 'china'),
+    ('00700', '腾讯控股', 'hk'), ('09988', '阿里巴巴-SW', 'hk'),
+    ('03690', '美团-W', 'hk'), ('01810', '小米集团-W', 'hk'),
+    ('AAPL', '苹果公司', 'us'), ('TSLA', '特斯拉', 'us'),
+    ('NVDA', '英伟达', 'us'), ('MSFT', '微软', 'us'),
+    ('GOOGL', '谷歌', 'us'), ('AMZN', '亚马逊', 'us'),
+    ('META', 'Meta', 'us'), ('NFLX', '奈飞', 'us'),
+]
+
+# 主表刷新间隔（小时）
+DEFAULT_REFRESH_HOURS = 24
+
+
+def normalize_symbol(code: str) -> str:
+    """统一代码格式：A股6位数字、港股5位数字、美股大写字母"""
+    code = str(code).strip().upper()
+    for suffix in ('.SH', '.SZ', '.BJ', '.SS'):
+        if code.endswith(suffix):
+            return code[:-len(suffix)]
+    if code.endswith('.HK'):
+        code = code[:-3]
+        return code.zfill(5) if code.isdigit() else code
+    if code.isdigit() and len(code) <= 5:
+        return code.zfill(5)
+    return code
+
+
+def _pinyin_initials(name: str) -> str:
+    if not PYPINYIN_AVAILABLE or not name:
+        return ""
+    try:
+        return "".join(p[0] for p in lazy_pinyin(name, style=Style.FIRST_LETTER) if p).upper()
+    except Exception:
+        return ""
+
+
+class _TrieNode:
+    __slots__ = ("children", "rows")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.rows: List[int] = []
+
+
+class SymbolMaster:
+    """
+    股票代码主表
+
+    数据按列保存在并行数组中（codes/names/markets/industries/pinyin，以及A股的
+    ts_codes/areas/boards/list_dates），行号即记录ID：
+    - 代码前缀：已排序代码数组上二分查找
+    - 名称前缀：字符前缀树，每个节点保存子树中的行号
+    - 拼音首字母：已排序 (拼音, 行号) 数组上二分查找
+    """
+
+    def __init__(self, cache_file: Optional[str] = None, refresh_hours: float = DEFAULT_REFRESH_HOURS):
+        if cache_file is None:
+            cache_file = self._default_cache_file()
+        self.cache_file = cache_file
+        self.refresh_hours = refresh_hours
+        self.updated_at = 0.0
+        self._lock = threading.RLock()
+        self._refreshing = False
+
+        self.codes: List[str] = []
+        self.names: List[str] = []
+        self.markets: List[str] = []
+        self.industries: List[str] = []
+        self.pinyin: List[str] = []
+        self.ts_codes: List[str] = []
+        self.areas: List[str] = []
+        self.boards: List[str] = []
+        self.list_dates: List[str] = []
+        # 已从数据源完整拉取过的市场；只有内置种子数据的市场不在其中
+        self.loaded_markets = set()
+
+        self._code_rows: Dict[str, int] = {}
+        self._sorted_codes: List[str] = []
+        self._sorted_code_rows: List[int] = []
+        self._name_trie = _TrieNode()
+        self._sorted_pinyin: List[str] = []
+        self._sorted_pinyin_rows: List[int] = []
+
+        if not self._load_from_disk():
+            self._set_rows([{'code': c, 'name': n, 'market': m, 'industry': ''} for c, n, m in _SEED_SYMBOLS])
+
+    @staticmethod
+    def _default_cache_file() -> str:
+        try:
+            from .config import get_config
+            cache_dir = get_config().get("data_cache_dir")
+        except Exception:
+            cache_dir = None
+        if not cache_dir:
+            cache_dir = os.path.join(os.path.dirname(__file__), "data_cache")
+        return os.path.join(cache_dir, "symbol_master.json")
+
+    # ------------------------------------------------------------------
+    # 索引构建
+    # ------------------------------------------------------------------
+
+    def _set_rows(self, rows: List[Dict[str, str]], pinyin: Optional[List[str]] = None):
+        """用新的记录替换主表并重建全部索引"""
+        codes, names, markets, industries, pys = [], [], [], [], []
+        ts_codes, areas, boards, list_dates = [], [], [], []
+        code_rows: Dict[str, int] = {}
+        for i, row in enumerate(rows):
+            code = normalize_symbol(row['code'])
+            if not code or code in code_rows:
+                continue
+            name = str(row.get('name') or '').strip()
+            code_rows[code] = len(codes)
+            codes.append(code)
+            names.append(name)
+            markets.append(row.get('market', ''))
+            industries.append(str(row.get('industry') or ''))
+            pys.append(pinyin[i] if pinyin is not None else _pinyin_initials(name))
+            ts_codes.append(str(row.get('ts_code') or ''))
+            areas.append(str(row.get('area') or ''))
+            boards.append(str(row.get('board') or ''))
+            list_dates.append(str(row.get('list_date') or ''))
+
+        order = sorted(range(len(codes)), key=codes.__getitem__)
+        py_order = sorted((i for i in range(len(pys)) if pys[i]), key=pys.__getitem__)
+
+        trie = _TrieNode()
+        for row_id, name in enumerate(names):
+            node = trie
+            for ch in name.upper():
+                node = node.children.setdefault(ch, _TrieNode())
+                node.rows.append(row_id)
+
+        with self._lock:
+            self.codes, self.names, self.markets = codes, names, markets
+            self.industries, self.pinyin = industries, pys
+            self.ts_codes, self.areas, self.boards, self.list_dates = ts_codes, areas, boards, list_dates
+            self._code_rows = code_rows
+            self._sorted_codes = [codes[i] for i in order]
+            self._sorted_code_rows = order
+            self._name_trie = trie
+            self._sorted_pinyin = [pys[i] for i in py_order]
+            self._sorted_pinyin_rows = py_order
+
+    # ------------------------------------------------------------------
+    # 持久化与刷新
+    # ------------------------------------------------------------------
+
+    def _load_from_disk(self) -> bool:
+        if not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            count = len(data['codes'])
+            rows = [
+                {'code': c, 'name': n, 'market': m, 'industry': ind,
+                 'ts_code': ts, 'area': area, 'board': board, 'list_date': list_date}
+                for c, n, m, ind, ts, area, board, list_date in zip(
+                    data['codes'], data['names'], data['markets'], data['industries'],
+                    data.get('ts_codes') or [''] * count, data.get('areas') or [''] * count,
+                    data.get('boards') or [''] * count, data.get('list_dates') or [''] * count)
+            ]
+            pinyin = data.get('pinyin')
+            if not pinyin or len(pinyin) != len(rows):
+                pinyin = None
+            self._set_rows(rows, pinyin)
+            self.updated_at = data.get('updated_at', 0.0)
+            # 旧版本主表没有记录完整拉取的市场和A股的地区/上市日期，视为未加载并尽快刷新
+            if 'loaded_markets' in data:
+                self.loaded_markets = set(data['loaded_markets'])
+            else:
+                self.updated_at = 0.0
+            logger.info(f"📊 [代码主表] 从本地加载 {len(self.codes)} 条记录")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ [代码主表] 本地主表读取失败: {e}")
+            return False
+
+    def _save_to_disk(self):
+        with self._lock:
+            data = {
+                'updated_at': self.updated_at,
+                'codes': self.codes,
+                'names': self.names,
+                'markets': self.markets,
+                'industries': self.industries,
+                'pinyin': self.pinyin,
+                'ts_codes': self.ts_codes,
+                'areas': self.areas,
+                'boards': self.boards,
+                'list_dates': self.list_dates,
+                'loaded_markets': sorted(self.loaded_markets),
+            }
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"⚠️ [代码主表] 本地主表写入失败: {e}")
+
+    def is_stale(self) -> bool:
+        return time.time() - self.updated_at > self.refresh_hours * 3600
+
+    def refresh(self) -> bool:
+        """从数据源批量拉取全部上市股票并重建主表，任一市场拉取失败时保留原有记录"""
+        rows: List[Dict[str, str]] = []
+        fetched_markets = set()
+        for market, fetcher in (('china', _fetch_china_symbols),
+                                ('hk', _fetch_hk_symbols),
+                                ('us', _fetch_us_symbols)):
+            try:
+                market_rows = fetcher()
+            except Exception as e:
+                logger.warning(f"⚠️ [代码主表] {market} 股票列表获取失败: {e}")
+                market_rows = []
+            if market_rows:
+                rows.extend(market_rows)
+                fetched_markets.add(market)
+                logger.info(f"📊 [代码主表] {market} 股票列表: {len(market_rows)} 条")
+
+        if not fetched_markets:
+            return False
+
+        with self._lock:
+            for i, code in enumerate(self.codes):
+                if self.markets[i] not in fetched_markets:
+                    rows.append(self._record(i))
+
+        self._set_rows(rows)
+        self.loaded_markets |= fetched_markets
+        self.updated_at = time.time()
+        self._save_to_disk()
+        logger.info(f"✅ [代码主表] 刷新完成，共 {len(self.codes)} 条记录")
+        return True
+
+    def refresh_in_background(self):
+        """主表过期时在后台线程刷新，不阻塞查询"""
+        with self._lock:
+            if self._refreshing or not self.is_stale():
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                if not self.refresh():
+                    # 刷新失败时推迟下次尝试，避免每次查询都触发远程请求
+                    self.updated_at = time.time() - self.refresh_hours * 3600 + 3600
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, daemon=True, name="symbol-master-refresh").start()
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _record(self, row_id: int) -> Dict[str, str]:
+        return {
+            'code': self.codes[row_id],
+            'name': self.names[row_id],
+            'market': self.markets[row_id],
+            'industry': self.industries[row_id],
+            'ts_code': self.ts_codes[row_id],
+            'area': self.areas[row_id],
+            'board': self.boards[row_id],
+            'list_date': self.list_dates[row_id],
+        }
+
+    def is_loaded(self, market: str) -> bool:
+        """该市场是否已从数据源完整加载（不只是内置种子数据）"""
+        return market in self.loaded_markets
+
+    def get(self, code: str) -> Optional[Dict[str, str]]:
+        """按代码精确查询"""
+        row_id = self._code_rows.get(normalize_symbol(code))
+        return self._record(row_id) if row_id is not None else None
+
+    def get_name(self, code: str) -> Optional[str]:
+        record = self.get(code)
+        return record['name'] if record and record['name'] else None
+
+    def detect_market(self, code: str) -> Optional[str]:
+        """按主表识别代码所属市场：'china'、'hk'、'us'，未收录时返回 None"""
+        record = self.get(code)
+        return record['market'] if record else None
+
+    def _prefix_rows(self, sorted_keys: List[str], sorted_rows: List[int], prefix: str) -> List[int]:
+        lo = bisect_left(sorted_keys, prefix)
+        hi = bisect_right(sorted_keys, prefix + "\uffff")
+        return sorted_rows[lo:hi]
+
+    def search(self, keyword: str, market: Optional[str] = None, limit: int = 20) -> List[Dict[str, str]]:
+        """
+        按代码前缀、名称前缀、拼音首字母搜索，前缀匹配不足时补充名称子串匹配
+
+        Args:
+            keyword: 关键词（代码、名称或拼音首字母）
+            market: 限定市场 'china'/'hk'/'us'，None 表示全部
+            limit: 最大返回条数
+
+        Returns:
+            List[Dict]: [{'code', 'name', 'market', 'industry', 'ts_code', 'area', 'board', 'list_date'}, ...]
+        """
+        keyword = str(keyword).strip()
+        if not keyword:
+            return []
+        key = keyword.upper()
+
+        with self._lock:
+            candidates: List[int] = []
+            candidates.extend(self._prefix_rows(self._sorted_codes, self._sorted_code_rows,
+                                                normalize_symbol(key) if '.' in key else key))
+
+            node = self._name_trie
+            for ch in key:
+                node = node.children.get(ch)
+                if node is None:
+                    break
+            if node is not None:
+                candidates.extend(node.rows)
+
+            if key.isascii() and key.isalpha():
+                candidates.extend(self._prefix_rows(self._sorted_pinyin, self._sorted_pinyin_rows, key))
+
+            results: List[Dict[str, str]] = []
+            seen = set()
+            for row_id in candidates:
+                if row_id in seen or (market and self.markets[row_id] != market):
+                    continue
+                seen.add(row_id)
+                results.append(self._record(row_id))
+                if len(results) >= limit:
+                    return results
+
+            # 子串匹配兜底（如"茅台"匹配"贵州茅台"）
+            for row_id, name in enumerate(self.names):
+                if row_id in seen or (market and self.markets[row_id] != market):
+                    continue
+                if key in name.upper() or key in self.codes[row_id]:
+                    seen.add(row_id)
+                    results.append(self._record(row_id))
+                    if len(results) >= limit:
+                        break
+            return results
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+# ----------------------------------------------------------------------
+# 批量数据源
+# ----------------------------------------------------------------------
+
+def _fetch_china_symbols() -> List[Dict[str, str]]:
+    """A股列表：优先Tushare（含行业），失败时使用AKShare"""
+    try:
+        from .tushare_utils import get_tushare_provider
+        provider = get_tushare_provider()
+        if provider.connected:
+            df = provider.api.stock_basic(exchange='', list_status='L',
+                                          fields='ts_code,symbol,name,area,industry,market,list_date')
+            if df is not None and not df.empty:
+                return [{'code': r.symbol, 'name': r.name, 'market': 'china', 'industry': r.industry or '',
+                         'ts_code': r.ts_code, 'area': r.area or '', 'board': r.market or '',
+                         'list_date': r.list_date or ''}
+                        for r in df.itertuples(index=False)]
+    except Exception as e:
+        logger.debug(f"📊 [代码主表] Tushare A股列表获取失败: {e}")
+
+    import akshare as ak
+    df = ak.stock_info_a_code_name()
+    return [{'code': r.code, 'name': r.name, 'market': 'china', 'industry': ''}
+            for r in df.itertuples(index=False)]
+
+
+def _fetch_hk_symbols() -> List[Dict[str, str]]:
+    import akshare as ak
+    df = ak.stock_hk_spot_em()
+    return [{'code': code, 'name': name, 'market': 'hk', 'industry': ''}
+            for code, name in zip(df['代码'], df['名称'])]
+
+
+def _fetch_us_symbols() -> List[Dict[str, str]]:
+    import akshare as ak
+    df = ak.stock_us_spot_em()
+    # 东方财富美股代码形如 "105.AAPL"
+    return [{'code': str(code).split('.')[-1], 'name': name, 'market': 'us', 'industry': ''}
+            for code, name in zip(df['代码'], df['名称'])]
+
+
+_symbol_master: Optional[SymbolMaster] = None
+_symbol_master_lock = threading.Lock()
+
+
+def get_symbol_master() -> SymbolMaster:
+    """获取全局代码主表实例，过期时触发后台刷新"""
+    global _symbol_master
+    if _symbol_master is None:
+        with _symbol_master_lock:
+            if _symbol_master is None:
+                try:
+                    from .config import get_config
+                    refresh_hours = get_config().get("symbol_master_refresh_hours", DEFAULT_REFRESH_HOURS)
+                except Exception:
+                    refresh_hours = DEFAULT_REFRESH_HOURS
+                _symbol_master = SymbolMaster(refresh_hours=refresh_hours)
+    _symbol_master.refresh_in_background()
+    return _symbol_master
@@ -159,7 +159,7 @@ class TongDaXinDataProvider:
     def _get_stock_name(self, stock_code: str) -> str:
         """
         获取股票名称
-        优先级：缓存 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
+        优先级：缓存 -> 代码主表 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
         Args:
             stock_code: 股票代码
         Returns:
@@ -171,7 +171,14 @@ class TongDaXinDataProvider:
         if stock_code in _stock_name_cache:
             return _stock_name_cache[stock_code]
         
-        # 优先从MongoDB获取
+        # 优先从本地代码主表获取
+        from .symbol_master import get_symbol_master
+        master_name = get_symbol_master().get_name(stock_code)
+        if master_name:
+            _stock_name_cache[stock_code] = master_name
+            return master_name
+        
+        # 其次从MongoDB获取
         mongodb_name = _get_stock_name_from_mongodb(stock_code)
         if mongodb_name:
             _stock_name_cache[stock_code] = mongodb_name
@@ -412,37 +419,22 @@ class TongDaXinDataProvider:
                 return []
         
         try:
-            # 中国股票数据没有直接的搜索API，这里提供一个简化的实现
-            # 实际使用中可以维护一个股票代码表
-            
-            # 常见股票代码映射
-            stock_mapping = {
-                '平安银行': '000001',
-                '万科A': '000002', 
-                '中国平安': '601318',
-                '贵州茅台': '600519',
-                '招商银行': '600036',
-                '五粮液': '000858',
-                '格力电器': '000651',
-                '美的集团': '000333',
-                '中国石化': '600028',
-                '工商银行': '601398'
-            }
+            # 中国股票数据没有直接的搜索API，使用本地代码主表匹配代码和名称
+            from .symbol_master import get_symbol_master
+            matches = get_symbol_master().search(keyword, market='china', limit=10)
             
             results = []
             
-            # 按关键词搜索
-            for name, code in stock_mapping.items():
-                if keyword.lower() in name.lower() or keyword in code:
-                    # 获取实时数据
-                    realtime_data = self.get_real_time_data(code)
-                    if realtime_data:
-                        results.append({
-                            'code': code,
-                            'name': name,
-                            'price': realtime_data.get('price', 0),
-                            'change_percent': realtime_data.get('change_percent', 0)
-                        })
+            for match in matches:
+                # 获取实时数据
+                realtime_data = self.get_real_time_data(match['code'])
+                if realtime_data:
+                    results.append({
+                        'code': match['code'],
+                        'name': match['name'],
+                        'price': realtime_data.get('price', 0),
+                        'change_percent': realtime_data.get('change_percent', 0)
+                    })
             
             return results
             
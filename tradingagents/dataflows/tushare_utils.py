@@ -524,6 +524,24 @@ class TushareProvider:
             DataFrame: 搜索结果
         """
         try:
+            # 代码主表已完整加载A股时直接在本地搜索，避免每次搜索都拉取股票列表；
+            # 只有内置种子数据时结果不完整，仍使用完整的股票列表
+            from .symbol_master import get_symbol_master
+            master = get_symbol_master()
+            if master.is_loaded('china'):
+                matches = master.search(keyword, market='china', limit=len(master))
+                results = pd.DataFrame([{
+                    'ts_code': m['ts_code'] or self._normalize_symbol(m['code']),
+                    'symbol': m['code'],
+                    'name': m['name'],
+                    'area': m['area'],
+                    'industry': m['industry'],
+                    'market': m['board'],
+                    'list_date': m['list_date'],
+                } for m in matches], columns=['ts_code', 'symbol', 'name', 'area', 'industry', 'market', 'list_date'])
+                logger.debug(f"🔍 代码主表搜索'{keyword}'找到{len(results)}只股票")
+                return results
+
             stock_list = self.get_stock_list()
             
             if stock_list.empty:
@@ -13,10 +13,48 @@ DEFAULT_CONFIG = {
     "deep_think_llm": "o4-mini",
     "quick_think_llm": "gpt-4o-mini",
     "backend_url": "https://api.openai.com/v1",
+    # LLM routing settings
+    "llm_router_enabled": os.getenv("LLM_ROUTER_ENABLED", "false").lower() == "true",
+    "llm_router_backends": [],  # e.g. [{"provider": "deepseek", "model": "deepseek-chat", "tier": "deep"}]
+    "llm_router_hedge_delay": None,  # seconds; None = adaptive from backend latency
+    "llm_router_max_error_rate": 0.5,
     # Debate and discussion settings
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # Checkpoint settings (resume interrupted analyses by analysis_id)
+    # sqlite backend requires langgraph-checkpoint-sqlite; mongodb backend requires
+    # langgraph-checkpoint-mongodb (pip install "tradingagents[checkpoint-mongodb]")
+    "checkpoint_enabled": os.getenv("CHECKPOINT_ENABLED", "false").lower() == "true",
+    "checkpoint_backend": os.getenv("CHECKPOINT_BACKEND", "sqlite"),  # sqlite or mongodb
+    "checkpoint_db_path": None,  # defaults to <data_cache_dir>/checkpoints.sqlite
+    # Reuse built TradingAgentsGraph instances across analyses with the same effective config
+    "engine_pool_enabled": os.getenv("ENGINE_POOL_ENABLED", "true").lower() == "true",
+    # Share data fetched during stock validation with the analysts' tools for the same run
+    "run_data_context_enabled": os.getenv("RUN_DATA_CONTEXT_ENABLED", "true").lower() == "true",
+    # Symbol master (local code/name index, refreshed in bulk)
+    "symbol_master_refresh_hours": 24,
+    # News near-duplicate filtering: also drop stories already seen in earlier runs (per ticker, 24h)
+    "news_dedup_cross_run": os.getenv("NEWS_DEDUP_CROSS_RUN", "false").lower() == "true",
+    # Incremental news store (SQLite + FTS): serve repeat fetches locally within the refresh interval
+    "news_store_enabled": os.getenv("NEWS_STORE_ENABLED", "true").lower() == "true",
+    "news_store_refresh_minutes": 15,
+    "news_store_retention_days": 30,
+    # Shared parsed RSS feeds; refreshed with conditional GET (ETag / Last-Modified) after the TTL
+    "rss_feed_ttl_seconds": 300,
+    # News filter models (shared per process): torch or onnx backend, optional int8 CPU quantization
+    "news_model_backend": os.getenv("NEWS_MODEL_BACKEND", "torch"),
+    "news_model_quantize": os.getenv("NEWS_MODEL_QUANTIZE", "false").lower() == "true",
+    "news_model_warmup": os.getenv("NEWS_MODEL_WARMUP", "false").lower() == "true",  # preload on web server start
+    # Reflection memory store: chroma (persistent client), flat (local NumPy/memmap index) or memory (in-process only)
+    "memory_backend": os.getenv("MEMORY_BACKEND", "chroma"),
+    "memory_dir": os.getenv("MEMORY_DIR"),  # defaults to <data_cache_dir>/memory
+    "memory_index": os.getenv("MEMORY_INDEX", "flat"),  # flat or hnsw (requires hnswlib), flat backend only
+    # Memory embeddings: remote (provider embedding API) or local (CPU sentence-transformer, works offline)
+    "memory_embedding_backend": os.getenv("MEMORY_EMBEDDING_BACKEND", "remote"),
+    "memory_embedding_model": os.getenv("MEMORY_EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2"),
+    "memory_model_backend": os.getenv("MEMORY_MODEL_BACKEND", "onnx"),  # torch or onnx, local embeddings only
+    "memory_model_quantize": os.getenv("MEMORY_MODEL_QUANTIZE", "true").lower() == "true",  # int8 on CPU
     # Tool settings
     "online_tools": True,
 
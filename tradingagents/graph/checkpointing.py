@@ -0,0 +1,99 @@
+# TradingAgents/graph/checkpointing.py
+
+"""
+分析运行的检查点持久化
+每个图节点完成后把状态写入检查点（本地SQLite，可选MongoDB），按 analysis_id 区分，
+运行中断后可以从最后完成的节点继续
+"""
+
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    SQLITE_CHECKPOINT_AVAILABLE = True
+except ImportError:
+    SqliteSaver = None
+    SQLITE_CHECKPOINT_AVAILABLE = False
+
+try:
+    from langgraph.checkpoint.mongodb import MongoDBSaver
+    MONGODB_CHECKPOINT_AVAILABLE = True
+except ImportError:
+    MongoDBSaver = None
+    MONGODB_CHECKPOINT_AVAILABLE = False
+
+
+def _create_sqlite_checkpointer(config: Dict[str, Any]):
+    db_path = config.get("checkpoint_db_path") or os.path.join(
+        config.get("data_cache_dir", "."), "checkpoints.sqlite"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    # 检查点会在分析线程中写入，允许跨线程使用同一连接
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    logger.info(f"💾 [检查点] 使用SQLite存储: {db_path}")
+    return SqliteSaver(conn)
+
+
+def _create_mongodb_checkpointer(config: Dict[str, Any]):
+    from tradingagents.config.database_manager import get_mongodb_client
+
+    client = get_mongodb_client()
+    if client is None:
+        return None
+    db_name = os.getenv("MONGODB_DATABASE", "tradingagents")
+    logger.info(f"💾 [检查点] 使用MongoDB存储: {db_name}")
+    return MongoDBSaver(client, db_name=db_name)
+
+
+def create_checkpointer(config: Dict[str, Any]):
+    """
+    根据配置创建LangGraph检查点存储
+
+    Args:
+        config: 配置字典，使用以下键：
+            checkpoint_enabled: 是否启用检查点
+            checkpoint_backend: "sqlite"（默认）或 "mongodb"
+            checkpoint_db_path: SQLite数据库路径，默认位于 data_cache_dir
+
+    Returns:
+        检查点存储实例；未启用或依赖不可用时返回 None
+    """
+    if not config.get("checkpoint_enabled", False):
+        return None
+
+    backend = config.get("checkpoint_backend", "sqlite").lower()
+
+    if backend == "mongodb":
+        if MONGODB_CHECKPOINT_AVAILABLE:
+            try:
+                checkpointer = _create_mongodb_checkpointer(config)
+                if checkpointer is not None:
+                    return checkpointer
+                logger.warning("⚠️ [检查点] MongoDB不可用，回退到SQLite")
+            except Exception as e:
+                logger.warning(f"⚠️ [检查点] MongoDB检查点初始化失败，回退到SQLite: {e}")
+        else:
+            logger.warning("⚠️ [检查点] 未安装 langgraph-checkpoint-mongodb，回退到SQLite")
+
+    if not SQLITE_CHECKPOINT_AVAILABLE:
+        logger.warning("⚠️ [检查点] 未安装 langgraph-checkpoint-sqlite，检查点功能已禁用")
+        return None
+
+    try:
+        return _create_sqlite_checkpointer(config)
+    except Exception as e:
+        logger.error(f"❌ [检查点] SQLite检查点初始化失败，检查点功能已禁用: {e}")
+        return None
+
+
+def get_thread_config(analysis_id: Optional[str]) -> Dict[str, Any]:
+    """构造检查点使用的 configurable 配置"""
+    if not analysis_id:
+        return {}
+    return {"configurable": {"thread_id": analysis_id}}
@@ -0,0 +1,104 @@
+# TradingAgents/graph/engine_pool.py
+
+"""
+分析引擎池
+按生效配置（LLM提供商/模型、分析师、辩论轮数、在线工具等）缓存已构建的 TradingAgentsGraph，
+重复分析时直接复用 LLM 客户端、记忆库、工具节点和已编译的图；每个实例同一时间只借给一个分析使用
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+DEFAULT_MAX_IDLE_PER_KEY = 2
+DEFAULT_MAX_KEYS = 8
+
+
+def engine_key(selected_analysts: List[str], config: Dict[str, Any], debug: bool = False) -> str:
+    """生效配置的指纹，分析师顺序影响图结构，因此保留顺序"""
+    identity = {"analysts": list(selected_analysts), "debug": bool(debug), "config": config}
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class GraphEnginePool:
+    """线程安全的 TradingAgentsGraph 实例池"""
+
+    def __init__(self, max_idle_per_key: int = DEFAULT_MAX_IDLE_PER_KEY, max_keys: int = DEFAULT_MAX_KEYS):
+        self.max_idle_per_key = max_idle_per_key
+        self.max_keys = max_keys
+        self._idle: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0}
+
+    def acquire(self, selected_analysts: List[str], config: Dict[str, Any], debug: bool = False):
+        """借出一个空闲实例，没有时按配置新建；用完后必须调用 release"""
+        key = engine_key(selected_analysts, config, debug)
+        with self._lock:
+            idle = self._idle.get(key)
+            graph = idle.pop() if idle else None
+            if graph is not None:
+                self._idle.move_to_end(key)
+                self.stats["hits"] += 1
+
+        if graph is None:
+            from .trading_graph import TradingAgentsGraph
+            # 配置字典由调用方持有，复制一份避免之后被修改影响池中的实例
+            graph = TradingAgentsGraph(list(selected_analysts), debug=debug, config=copy.deepcopy(config))
+            graph._engine_key = key
+            with self._lock:
+                self.stats["builds"] += 1
+            logger.info(f"🔧 [引擎池] 新建分析引擎: {key[:8]} (分析师: {selected_analysts})")
+        else:
+            logger.info(f"♻️ [引擎池] 复用分析引擎: {key[:8]}")
+
+        graph.prepare_for_run()
+        return graph
+
+    def release(self, graph):
+        """归还实例；同一配置的空闲实例超过上限时直接丢弃"""
+        key = getattr(graph, "_engine_key", None)
+        if key is None:
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(graph)
+            # 配置种类过多时淘汰最久未使用的配置
+            while len(self._idle) > self.max_keys:
+                evicted_key, _ = self._idle.popitem(last=False)
+                logger.debug(f"[引擎池] 淘汰分析引擎: {evicted_key[:8]}")
+
+    @contextmanager
+    def engine(self, selected_analysts: List[str], config: Dict[str, Any], debug: bool = False):
+        graph = self.acquire(selected_analysts, config, debug)
+        try:
+            yield graph
+        finally:
+            self.release(graph)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+
+_engine_pool: Optional[GraphEnginePool] = None
+_engine_pool_lock = threading.Lock()
+
+
+def get_engine_pool() -> GraphEnginePool:
+    """获取全局分析引擎池"""
+    global _engine_pool
+    if _engine_pool is None:
+        with _engine_pool_lock:
+            if _engine_pool is None:
+                _engine_pool = GraphEnginePool()
+    return _engine_pool
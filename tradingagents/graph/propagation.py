@@ -10,6 +10,7 @@ from tradingagents.agents.utils.agent_states import (
     InvestDebateState,
     RiskDebateState,
 )
+from tradingagents.utils.symbol_context import build_symbol_context
 
 
 class Propagator:
@@ -27,6 +28,7 @@ class Propagator:
             "messages": [("human", company_name)],
             "company_of_interest": company_name,
             "trade_date": str(trade_date),
+            "symbol_context": build_symbol_context(company_name),
             "investment_debate_state": InvestDebateState(
                 {"history": "", "current_response": "", "count": 0}
             ),
@@ -47,9 +49,18 @@ class Propagator:
             "news_report": "",
         }
 
-    def get_graph_args(self) -> Dict[str, Any]:
-        """Get arguments for the graph invocation."""
+    def get_graph_args(self, stream_mode="values", analysis_id=None) -> Dict[str, Any]:
+        """Get arguments for the graph invocation.
+
+        Args:
+            stream_mode: LangGraph stream mode, e.g. "values" or ["values", "messages"]
+                to also receive token-level message chunks
+            analysis_id: Checkpoint thread id, used when the graph has a checkpointer
+        """
+        config = {"recursion_limit": self.max_recur_limit}
+        if analysis_id:
+            config["configurable"] = {"thread_id": analysis_id}
         return {
-            "stream_mode": "values",
-            "config": {"recursion_limit": self.max_recur_limit},
+            "stream_mode": stream_mode,
+            "config": config,
         }
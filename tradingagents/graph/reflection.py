@@ -61,6 +61,19 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
 
         return f"{curr_market_report}\n\n{curr_trend_report}\n\n{curr_concept_report}\n\n{curr_sentiment_report}\n\n{curr_news_report}\n\n{curr_fundamentals_report}"
 
+    def _situation_metadata(self, current_state: Dict[str, Any]) -> Dict[str, Any]:
+        """记忆元数据：股票代码、市场和交易日期，检索时可按股票或市场过滤"""
+        ticker = current_state.get("company_of_interest")
+        market_info = (current_state.get("symbol_context") or {}).get("market_info")
+        if market_info is None and ticker:
+            from tradingagents.utils.stock_utils import StockUtils
+            market_info = StockUtils.get_market_info(ticker)
+        return {
+            "ticker": ticker,
+            "market": market_info.get("market_name") if market_info else None,
+            "trade_date": current_state.get("trade_date"),
+        }
+
     def _reflect_on_component(
         self, component_type: str, report: str, situation: str, returns_losses
     ) -> str:
@@ -84,7 +97,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
         result = self._reflect_on_component(
             "BULL", bull_debate_history, situation, returns_losses
         )
-        bull_memory.add_situations([(situation, result)])
+        bull_memory.add_situations([(situation, result)], self._situation_metadata(current_state))
 
     def reflect_bear_researcher(self, current_state, returns_losses, bear_memory):
         """Reflect on bear researcher's analysis and update memory."""
@@ -94,7 +107,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
         result = self._reflect_on_component(
             "BEAR", bear_debate_history, situation, returns_losses
         )
-        bear_memory.add_situations([(situation, result)])
+        bear_memory.add_situations([(situation, result)], self._situation_metadata(current_state))
 
     def reflect_trader(self, current_state, returns_losses, trader_memory):
         """Reflect on trader's decision and update memory."""
@@ -104,7 +117,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
         result = self._reflect_on_component(
             "TRADER", trader_decision, situation, returns_losses
         )
-        trader_memory.add_situations([(situation, result)])
+        trader_memory.add_situations([(situation, result)], self._situation_metadata(current_state))
 
     def reflect_invest_judge(self, current_state, returns_losses, invest_judge_memory):
         """Reflect on investment judge's decision and update memory."""
@@ -114,7 +127,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
         result = self._reflect_on_component(
             "INVEST JUDGE", judge_decision, situation, returns_losses
         )
-        invest_judge_memory.add_situations([(situation, result)])
+        invest_judge_memory.add_situations([(situation, result)], self._situation_metadata(current_state))
 
     def reflect_risk_manager(self, current_state, returns_losses, risk_manager_memory):
         """Reflect on risk manager's decision and update memory."""
@@ -124,4 +137,4 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
         result = self._reflect_on_component(
             "RISK JUDGE", judge_decision, situation, returns_losses
         )
-        risk_manager_memory.add_situations([(situation, result)])
+        risk_manager_memory.add_situations([(situation, result)], self._situation_metadata(current_state))
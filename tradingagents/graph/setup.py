@@ -48,7 +48,8 @@ class GraphSetup:
         self.react_llm = react_llm
 
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals","market_trend","concept"]
+        self, selected_analysts=["market", "social", "news", "fundamentals","market_trend","concept"],
+        checkpointer=None,
     ):
         """Set up and compile the agent workflow graph.
 
@@ -60,6 +61,7 @@ class GraphSetup:
                 - "fundamentals": Fundamentals analyst
                 - "market_trend": Market trend analyst
                  - "concept": concept analyst
+            checkpointer: Optional LangGraph checkpointer that persists state after each node
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
@@ -301,4 +303,4 @@ class GraphSetup:
         workflow.add_edge("Risk Judge", END)
 
         # Compile and return
-        return workflow.compile()
\ No newline at end of file
+        return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
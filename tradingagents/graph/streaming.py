@@ -0,0 +1,144 @@
+# TradingAgents/graph/streaming.py
+
+"""
+图节点流式输出
+把 LangGraph ``messages`` 流模式产生的 token 汇总成报告片段，通过事件总线分发给 CLI 和 Web 进度跟踪器
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+
+# 图节点名称 -> 该节点输出的报告字段
+NODE_REPORT_SECTIONS = {
+    "Market Analyst": "market_report",
+    "Market_trend Analyst": "trend_report",
+    "Concept Analyst": "concept_report",
+    "Social Analyst": "sentiment_report",
+    "News Analyst": "news_report",
+    "Fundamentals Analyst": "fundamentals_report",
+    "Research Manager": "investment_plan",
+    "Trader": "trader_investment_plan",
+    "Risk Judge": "final_trade_decision",
+}
+
+
+@dataclass
+class StreamEvent:
+    """单次流式输出事件"""
+    node: str  # 图节点名称
+    section: Optional[str]  # 对应的报告字段，辩论节点等没有报告字段时为 None
+    message_id: Optional[str]  # LLM 消息ID，同一条消息的 token 会累加
+    delta: str  # 本次新增的文本
+    text: str  # 当前消息已累计的全部文本
+    timestamp: float = field(default_factory=time.time)
+
+
+class StreamEventBus:
+    """线程安全的流式事件总线"""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[StreamEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Callable[[StreamEvent], None]) -> Callable[[], None]:
+        """订阅事件，返回取消订阅函数"""
+        with self._lock:
+            self._subscribers.append(handler)
+
+        def unsubscribe():
+            with self._lock:
+                if handler in self._subscribers:
+                    self._subscribers.remove(handler)
+
+        return unsubscribe
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, event: StreamEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for handler in subscribers:
+            try:
+                handler(event)
+            except Exception as e:
+                # 订阅者出错不能中断分析流程
+                logger.warning(f"⚠️ [流式输出] 订阅者处理失败: {e}")
+
+
+class TokenStreamAccumulator:
+    """把 ``messages`` 流模式中的消息分片按消息ID累加成完整文本"""
+
+    def __init__(self):
+        self._buffers: Dict[Tuple[str, Optional[str]], str] = {}
+
+    def feed(self, message_chunk: Any, metadata: Dict[str, Any]) -> Optional[StreamEvent]:
+        """处理一个 (message_chunk, metadata) 分片，返回流式事件；没有新文本时返回 None"""
+        node = metadata.get("langgraph_node", "")
+        content = getattr(message_chunk, "content", "")
+        if isinstance(content, list):
+            content = "".join(
+                part.get("text", "") if isinstance(part, dict) else str(part)
+                for part in content
+            )
+        if not content:
+            return None
+
+        message_id = getattr(message_chunk, "id", None)
+        key = (node, message_id)
+        text = self._buffers.get(key, "") + content
+        self._buffers[key] = text
+
+        return StreamEvent(
+            node=node,
+            section=NODE_REPORT_SECTIONS.get(node),
+            message_id=message_id,
+            delta=content,
+            text=text,
+        )
+
+
+class ThrottledStreamHandler:
+    """
+    节流的流式事件处理器
+
+    同一报告字段在 ``interval`` 秒内最多回调一次，期间到达的事件只保留最新一条，
+    调用 ``flush`` 时输出所有未发送的事件。
+    """
+
+    def __init__(self, callback: Callable[[StreamEvent], None], interval: float = 0.5,
+                 report_sections_only: bool = True):
+        self.callback = callback
+        self.interval = interval
+        self.report_sections_only = report_sections_only
+        self._last_emit: Dict[str, float] = {}
+        self._pending: Dict[str, StreamEvent] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: StreamEvent):
+        if self.report_sections_only and not event.section:
+            return
+        key = event.section or event.node
+        now = time.time()
+        with self._lock:
+            if now - self._last_emit.get(key, 0.0) < self.interval:
+                self._pending[key] = event
+                return
+            self._last_emit[key] = now
+            self._pending.pop(key, None)
+        self.callback(event)
+
+    def flush(self):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for event in pending:
+            self.callback(event)
@@ -1,6 +1,7 @@
 # TradingAgents/graph/trading_graph.py
 
 import os
+import uuid
 from pathlib import Path
 import json
 from datetime import date
@@ -35,6 +36,8 @@ from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
+from .streaming import StreamEventBus, TokenStreamAccumulator
+from .checkpointing import create_checkpointer, get_thread_config
 
 
 class TradingAgentsGraph:
@@ -212,6 +215,16 @@ class TradingAgentsGraph:
             logger.info(f"✅ [自定义OpenAI] 已配置自定义端点: {custom_base_url}")
         else:
             raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
+
+        # 启用多提供商路由：主提供商作为首选后端，按延迟和健康度在后端间失败转移
+        if self.config.get("llm_router_enabled", False):
+            from tradingagents.llm_adapters.llm_router import create_llm_routers
+
+            self.deep_thinking_llm, self.quick_thinking_llm = create_llm_routers(
+                self.config,
+                primary_deep=self.deep_thinking_llm,
+                primary_quick=self.quick_thinking_llm,
+            )
         
         self.toolkit = Toolkit(config=self.config)
 
@@ -261,8 +274,27 @@ class TradingAgentsGraph:
         self.ticker = None
         self.log_states_dict = {}  # date to full state dict
 
+        # 流式输出事件总线，有订阅者时 propagate 会以 token 粒度推送节点输出
+        self.event_bus = StreamEventBus()
+
+        # 检查点存储（未启用时为 None）
+        self.checkpointer = create_checkpointer(self.config)
+        self.analysis_id = None
+
         # Set up the graph
-        self.graph = self.graph_setup.setup_graph(selected_analysts)
+        self.graph = self.graph_setup.setup_graph(selected_analysts, checkpointer=self.checkpointer)
+
+    def prepare_for_run(self):
+        """复用已构建的图执行新的分析前调用：重新应用本实例的配置并清空上一次运行的状态"""
+        set_config(self.config)
+        Toolkit.update_config(self.config)
+
+        self.curr_state = None
+        self.ticker = None
+        self.log_states_dict = {}
+        self.analysis_id = None
+        # 丢弃上一次运行遗留的订阅者
+        self.event_bus = StreamEventBus()
 
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
@@ -330,8 +362,19 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def propagate(self, company_name, trade_date, analysis_id=None):
+        """Run the trading agents graph for a company on a specific date.
+
+        Args:
+            company_name: Ticker to analyze
+            trade_date: Analysis date
+            analysis_id: Optional checkpoint key. When checkpointing is enabled and an
+                unfinished run with this id exists, the run continues from its last
+                completed node instead of starting over.
+
+        Raises:
+            ValueError: The checkpoint for ``analysis_id`` belongs to a different ticker or date
+        """
 
         # 添加详细的接收日志
         logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
@@ -348,31 +391,140 @@ class TradingAgentsGraph:
         )
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
-        args = self.propagator.get_graph_args()
+
+        # 已有检查点时从断点继续（或直接返回已完成的结果），避免重复消耗LLM调用
+        if analysis_id and self._has_checkpoint(analysis_id):
+            snapshot = self.graph.get_state(get_thread_config(analysis_id))
+            checkpoint_target = (snapshot.values.get("company_of_interest"), str(snapshot.values.get("trade_date")))
+            if checkpoint_target != (init_agent_state["company_of_interest"], init_agent_state["trade_date"]):
+                raise ValueError(
+                    f"检查点 {analysis_id} 属于 {checkpoint_target[0]} ({checkpoint_target[1]})，"
+                    f"与本次分析的 {company_name} ({trade_date}) 不一致"
+                )
+            logger.info(f"💾 [检查点] 发现分析 {analysis_id} 的检查点，从最后完成的节点继续")
+            return self.resume(analysis_id)
+
+        self.analysis_id = analysis_id
+        final_state = self._run_graph(init_agent_state, analysis_id)
+
+        # Store current state for reflection
+        self.curr_state = final_state
+
+        # Log state
+        self._log_state(trade_date, final_state)
+
+        # Return decision and processed signal
+        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+
+    def resume(self, analysis_id):
+        """Resume an interrupted analysis from its last completed node.
+
+        Args:
+            analysis_id: Identifier the analysis was started with in ``propagate``
+
+        Returns:
+            Tuple of (final_state, processed_signal), same as ``propagate``
+        """
+        if self.checkpointer is None:
+            raise ValueError("检查点未启用，无法恢复分析。请设置 checkpoint_enabled=True")
+
+        snapshot = self.graph.get_state(get_thread_config(analysis_id))
+        if not snapshot or not snapshot.values:
+            raise ValueError(f"未找到分析 {analysis_id} 的检查点")
+
+        self.ticker = snapshot.values["company_of_interest"]
+        self.analysis_id = analysis_id
+        trade_date = snapshot.values["trade_date"]
+
+        if snapshot.next:
+            logger.info(f"💾 [检查点] 恢复分析 {analysis_id}，下一个节点: {list(snapshot.next)}")
+            final_state = self._run_graph(None, analysis_id)
+        else:
+            logger.info(f"💾 [检查点] 分析 {analysis_id} 已完成，直接返回结果")
+            final_state = snapshot.values
+
+        self.curr_state = final_state
+        self._log_state(trade_date, final_state)
+        return final_state, self.process_signal(final_state["final_trade_decision"], self.ticker)
+
+    def find_checkpoint_id(self, base_id: str):
+        """
+        按固定的基础ID查找本次分析应使用的检查点ID
+
+        依次检查 base_id、base_id_2、base_id_3…：返回第一个未完成的检查点（可续跑）
+        或第一个不存在的ID（新分析）；已完成的检查点跳过，不会被覆盖
+
+        Returns:
+            (检查点ID, 是否为未完成的检查点)；未启用检查点时返回 (None, False)
+        """
+        if self.checkpointer is None:
+            return None, False
+        for attempt in range(1, 1000):
+            analysis_id = base_id if attempt == 1 else f"{base_id}_{attempt}"
+            if not self._has_checkpoint(analysis_id):
+                return analysis_id, False
+            if self.graph.get_state(get_thread_config(analysis_id)).next:
+                return analysis_id, True
+        return f"{base_id}_{uuid.uuid4().hex[:8]}", False
+
+    def _has_checkpoint(self, analysis_id) -> bool:
+        """检查指定分析是否已有检查点"""
+        if self.checkpointer is None:
+            return False
+        try:
+            snapshot = self.graph.get_state(get_thread_config(analysis_id))
+        except Exception as e:
+            logger.warning(f"⚠️ [检查点] 读取检查点失败: {e}")
+            return False
+        return bool(snapshot and snapshot.values)
+
+    def _run_graph(self, input_state, analysis_id=None):
+        """运行图；input_state 为 None 时从检查点继续"""
+        if self.checkpointer is not None and not analysis_id:
+            # 检查点按 thread_id 存储，未指定时生成一个
+            analysis_id = f"{self.ticker}_{uuid.uuid4().hex[:12]}"
+            self.analysis_id = analysis_id
+        if self.checkpointer is None:
+            analysis_id = None
+
+        args = self.propagator.get_graph_args(analysis_id=analysis_id)
 
         if self.debug:
             # Debug mode with tracing
             trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
+            for chunk in self.graph.stream(input_state, **args):
                 if len(chunk["messages"]) == 0:
                     pass
                 else:
                     chunk["messages"][-1].pretty_print()
                     trace.append(chunk)
 
-            final_state = trace[-1]
+            return trace[-1]
+        elif self.event_bus.has_subscribers():
+            # Streaming mode: forward token chunks to the event bus while tracking the latest state
+            return self._stream_with_events(input_state, analysis_id)
         else:
             # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
-
-        # Store current state for reflection
-        self.curr_state = final_state
+            return self.graph.invoke(input_state, **args)
 
-        # Log state
-        self._log_state(trade_date, final_state)
-
-        # Return decision and processed signal
-        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+    def _stream_with_events(self, init_agent_state, analysis_id=None):
+        """以 values + messages 模式运行图，把 token 分片发布到事件总线"""
+        args = self.propagator.get_graph_args(
+            stream_mode=["values", "messages"], analysis_id=analysis_id
+        )
+        accumulator = TokenStreamAccumulator()
+        final_state = None
+
+        for mode, payload in self.graph.stream(init_agent_state, **args):
+            if mode == "messages":
+                message_chunk, metadata = payload
+                event = accumulator.feed(message_chunk, metadata)
+                if event is not None:
+                    self.event_bus.publish(event)
+            else:
+                final_state = payload
+
+        return final_state
 
     def _log_state(self, trade_date, final_state):
         """Log the final state to a JSON file."""
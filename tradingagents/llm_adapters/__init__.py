@@ -2,5 +2,6 @@
 from .dashscope_adapter import ChatDashScope
 from .dashscope_openai_adapter import ChatDashScopeOpenAI
 from .google_openai_adapter import ChatGoogleOpenAI
+from .llm_router import ChatLLMRouter
 
-__all__ = ["ChatDashScope", "ChatDashScopeOpenAI", "ChatGoogleOpenAI"]
+__all__ = ["ChatDashScope", "ChatDashScopeOpenAI", "ChatGoogleOpenAI", "ChatLLMRouter"]
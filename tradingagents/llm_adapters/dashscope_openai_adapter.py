@@ -32,6 +32,8 @@ class ChatDashScopeOpenAI(ChatOpenAI):
         kwargs.setdefault("model", "qwen-turbo")
         kwargs.setdefault("temperature", 0.1)
         kwargs.setdefault("max_tokens", 2000)
+        # 流式输出时在最后一个分片中返回 token 用量
+        kwargs.setdefault("stream_usage", True)
         
         # 检查 API 密钥
         if not kwargs.get("api_key"):
@@ -85,6 +87,29 @@ class ChatDashScopeOpenAI(ChatOpenAI):
             logger.error(f"⚠️ Token 追踪失败: {track_error}")
         
         return result
+    
+    def _stream(self, *args, **kwargs):
+        """重写流式生成方法，在流结束后追踪 token 使用量"""
+        
+        usage = None
+        for chunk in super()._stream(*args, **kwargs):
+            if getattr(chunk.message, 'usage_metadata', None):
+                usage = chunk.message.usage_metadata
+            yield chunk
+        
+        try:
+            if usage and (usage.get('input_tokens', 0) > 0 or usage.get('output_tokens', 0) > 0):
+                token_tracker.track_usage(
+                    provider="dashscope",
+                    model_name=self.model_name,
+                    input_tokens=usage.get('input_tokens', 0),
+                    output_tokens=usage.get('output_tokens', 0),
+                    session_id=kwargs.get('session_id', f"dashscope_openai_{hash(str(args))%10000}"),
+                    analysis_type=kwargs.get('analysis_type', 'stock_analysis')
+                )
+        except Exception as track_error:
+            # token 追踪失败不应该影响主要功能
+            logger.error(f"⚠️ Token 追踪失败: {track_error}")
 
 
 # 支持的模型列表
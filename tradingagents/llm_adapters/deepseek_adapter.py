@@ -4,9 +4,9 @@ DeepSeek LLM适配器，支持Token使用统计
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
 from langchain_core.callbacks import CallbackManagerForLLMRun
 
@@ -69,6 +69,7 @@ class ChatDeepSeek(ChatOpenAI):
             openai_api_base=base_url,
             temperature=temperature,
             max_tokens=max_tokens,
+            stream_usage=kwargs.pop("stream_usage", True),
             **kwargs
         )
         
@@ -116,42 +117,7 @@ class ChatDeepSeek(ChatOpenAI):
                 logger.info(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
             
             # 记录token使用量
-            if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
-                try:
-                    # 使用提取的参数或生成默认值
-                    if session_id is None:
-                        session_id = f"deepseek_{hash(str(messages))%10000}"
-                    if analysis_type is None:
-                        analysis_type = 'stock_analysis'
-
-                    # 记录使用量
-                    usage_record = token_tracker.track_usage(
-                        provider="deepseek",
-                        model_name=self.model_name,
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        session_id=session_id,
-                        analysis_type=analysis_type
-                    )
-
-                    if usage_record:
-                        if usage_record.cost == 0.0:
-                            logger.warning(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
-                        else:
-                            logger.info(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
-
-                        # 使用统一日志管理器的Token记录方法
-                        logger_manager = get_logger_manager()
-                        logger_manager.log_token_usage(
-                            logger, "deepseek", self.model_name,
-                            input_tokens, output_tokens, usage_record.cost,
-                            session_id
-                        )
-                    else:
-                        logger.warning(f"⚠️ [DeepSeek] 未创建使用记录")
-
-                except Exception as track_error:
-                    logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
+            self._track_usage(messages, input_tokens, output_tokens, session_id, analysis_type)
             
             return result
             
@@ -159,6 +125,79 @@ class ChatDeepSeek(ChatOpenAI):
             logger.error(f"❌ [DeepSeek] 调用失败: {e}", exc_info=True)
             raise
     
+    def _track_usage(self, messages: List[BaseMessage], input_tokens: int, output_tokens: int,
+                     session_id: Optional[str] = None, analysis_type: Optional[str] = None):
+        """记录token使用量"""
+        if not TOKEN_TRACKING_ENABLED or (input_tokens <= 0 and output_tokens <= 0):
+            return
+
+        try:
+            # 使用提取的参数或生成默认值
+            if session_id is None:
+                session_id = f"deepseek_{hash(str(messages))%10000}"
+            if analysis_type is None:
+                analysis_type = 'stock_analysis'
+
+            # 记录使用量
+            usage_record = token_tracker.track_usage(
+                provider="deepseek",
+                model_name=self.model_name,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                session_id=session_id,
+                analysis_type=analysis_type
+            )
+
+            if usage_record:
+                if usage_record.cost == 0.0:
+                    logger.warning(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
+                else:
+                    logger.info(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
+
+                # 使用统一日志管理器的Token记录方法
+                logger_manager = get_logger_manager()
+                logger_manager.log_token_usage(
+                    logger, "deepseek", self.model_name,
+                    input_tokens, output_tokens, usage_record.cost,
+                    session_id
+                )
+            else:
+                logger.warning(f"⚠️ [DeepSeek] 未创建使用记录")
+
+        except Exception as track_error:
+            logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成聊天响应，结束后记录token使用量
+        """
+
+        session_id = kwargs.pop('session_id', None)
+        analysis_type = kwargs.pop('analysis_type', None)
+
+        usage = None
+        output_chars = 0
+        for chunk in super()._stream(messages, stop, run_manager, **kwargs):
+            if getattr(chunk.message, 'usage_metadata', None):
+                usage = chunk.message.usage_metadata
+            output_chars += len(str(chunk.message.content or ""))
+            yield chunk
+
+        if usage:
+            input_tokens = usage.get('input_tokens', 0)
+            output_tokens = usage.get('output_tokens', 0)
+        else:
+            # 流式响应未返回用量时进行估算
+            input_tokens = self._estimate_input_tokens(messages)
+            output_tokens = max(1, output_chars // 2)
+        self._track_usage(messages, input_tokens, output_tokens, session_id, analysis_type)
+
     def _estimate_input_tokens(self, messages: List[BaseMessage]) -> int:
         """
         估算输入token数量
@@ -31,6 +31,8 @@ class ChatGoogleOpenAI(ChatGoogleGenerativeAI):
         # 设置 Google AI 的默认配置
         kwargs.setdefault("temperature", 0.1)
         kwargs.setdefault("max_tokens", 2000)
+        # 内容格式优化和 token 追踪都在 _generate 中完成，流式模式下也走完整生成
+        kwargs.setdefault("disable_streaming", True)
         
         # 检查 API 密钥
         google_api_key = kwargs.get("google_api_key") or os.getenv("GOOGLE_API_KEY")
@@ -0,0 +1,453 @@
+"""
+多提供商LLM路由适配器
+在多个已配置的LLM后端之间按延迟和健康度路由请求，支持失败转移与慢请求对冲(hedging)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, Field
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 导入token跟踪器
+try:
+    from tradingagents.config.config_manager import token_tracker
+    TOKEN_TRACKING_ENABLED = True
+except ImportError:
+    TOKEN_TRACKING_ENABLED = False
+
+
+# 质量等级，数值越大质量越高；高等级后端可以服务低等级节点
+QUALITY_TIERS = {"quick": 0, "deep": 1}
+
+# 自带token统计的适配器类名，路由器不再重复记录
+SELF_TRACKING_ADAPTERS = (
+    "ChatDashScopeOpenAI",
+    "ChatGoogleOpenAI",
+    "ChatDeepSeek",
+    "ChatDeepSeekOpenAI",
+    "ChatDashScopeOpenAIUnified",
+    "ChatCustomOpenAI",
+)
+
+# 共享线程池，用于对冲请求
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm_router")
+
+
+class BackendStats:
+    """单个后端的延迟与错误率统计（指数加权移动平均）"""
+
+    def __init__(self, alpha: float = 0.3, failure_threshold: int = 3, cooldown_seconds: float = 60.0):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.calls += 1
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+            self.ewma_error_rate = (1 - self.alpha) * self.ewma_error_rate
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.calls += 1
+            self.ewma_error_rate = self.alpha + (1 - self.alpha) * self.ewma_error_rate
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                # 连续失败达到阈值，进入冷却期（熔断）
+                self.cooldown_until = time.time() + self.cooldown_seconds
+
+    def is_healthy(self, max_error_rate: float) -> bool:
+        if time.time() < self.cooldown_until:
+            return False
+        return self.ewma_error_rate <= max_error_rate
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ewma_latency": self.ewma_latency,
+            "ewma_error_rate": round(self.ewma_error_rate, 4),
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": time.time() < self.cooldown_until,
+            "calls": self.calls,
+        }
+
+
+@dataclass
+class RouterBackend:
+    """路由后端定义"""
+    name: str  # 唯一名称，如 "dashscope:qwen-plus"
+    provider: str  # 供应商：dashscope, google, deepseek, custom_openai, etc.
+    model_name: str  # 模型名称
+    llm: Any  # 聊天模型或已绑定工具的Runnable
+    tier: str = "quick"  # 质量等级：quick / deep
+    stats: BackendStats = field(default_factory=BackendStats)
+
+
+class ChatLLMRouter(BaseChatModel):
+    """
+    多后端路由聊天模型
+
+    每次调用时按质量等级筛选后端，再选择健康且延迟最低的后端；
+    主后端超过对冲延迟未返回时并发请求次优后端，取先返回的结果；
+    后端失败时自动转移到下一个候选后端。
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    backends: List[RouterBackend] = Field(default_factory=list)
+    required_tier: str = "quick"
+    hedge_delay: Optional[float] = None  # 固定对冲延迟（秒），None 表示按主后端平均延迟自适应
+    hedge_multiplier: float = 2.0
+    min_hedge_delay: float = 5.0
+    max_error_rate: float = 0.5
+    model_name: str = ""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if not self.backends:
+            raise ValueError("LLM路由器至少需要一个后端")
+        if self.required_tier not in QUALITY_TIERS:
+            raise ValueError(f"不支持的质量等级: {self.required_tier}")
+        if not self.model_name:
+            self.model_name = self.backends[0].model_name
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm_router"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "required_tier": self.required_tier,
+            "backends": [backend.name for backend in self.backends],
+        }
+
+    def get_backend_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各后端的统计快照"""
+        return {backend.name: backend.stats.snapshot() for backend in self.backends}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ChatLLMRouter":
+        """为每个后端绑定工具，返回共享统计数据的新路由器"""
+        bound_backends = [
+            RouterBackend(
+                name=backend.name,
+                provider=backend.provider,
+                model_name=backend.model_name,
+                llm=backend.llm.bind_tools(tools, **kwargs),
+                tier=backend.tier,
+                stats=backend.stats,
+            )
+            for backend in self.backends
+        ]
+        return self.model_copy(update={"backends": bound_backends})
+
+    def _select_candidates(self) -> List[RouterBackend]:
+        """按质量等级和健康度排序候选后端"""
+        required = QUALITY_TIERS[self.required_tier]
+        eligible = [b for b in self.backends if QUALITY_TIERS.get(b.tier, 0) >= required]
+        if not eligible:
+            logger.warning(f"⚠️ [LLM路由] 没有满足等级 {self.required_tier} 的后端，使用全部后端")
+            eligible = list(self.backends)
+
+        healthy = [b for b in eligible if b.stats.is_healthy(self.max_error_rate)]
+        unhealthy = [b for b in eligible if b not in healthy]
+
+        def route_key(backend: RouterBackend) -> Tuple[int, bool, float]:
+            # 最近连续失败的后端靠后；等级恰好匹配的后端优先，避免快速路由在冷启动时选中深度模型；
+            # 尚无延迟数据的后端保持配置顺序，排在已知后端之前
+            latency = backend.stats.ewma_latency
+            return (backend.stats.consecutive_failures,
+                    backend.tier != self.required_tier,
+                    latency if latency is not None else 0.0)
+
+        healthy.sort(key=route_key)
+        unhealthy.sort(key=lambda b: b.stats.cooldown_until)
+        return healthy + unhealthy
+
+    def _get_hedge_delay(self, backend: RouterBackend) -> float:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        latency = backend.stats.ewma_latency
+        if latency is None:
+            return max(self.min_hedge_delay, 30.0)
+        return max(self.min_hedge_delay, latency * self.hedge_multiplier)
+
+    def _call_backend(
+        self,
+        backend: RouterBackend,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        **kwargs: Any,
+    ) -> Tuple[RouterBackend, BaseMessage, float]:
+        start_time = time.time()
+        try:
+            message = backend.llm.invoke(messages, stop=stop, **kwargs)
+        except Exception:
+            backend.stats.record_failure()
+            raise
+        latency = time.time() - start_time
+        # Google适配器出错时返回错误文本而不是抛出异常，这里视为失败
+        if isinstance(message, AIMessage) and isinstance(message.content, str) \
+                and message.content.startswith("Google AI 调用失败"):
+            backend.stats.record_failure()
+            raise RuntimeError(message.content)
+        backend.stats.record_success(latency)
+        return backend, message, latency
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """按路由策略调用后端，失败时依次转移"""
+        candidates = self._select_candidates()
+        pending = {}
+        last_error: Optional[Exception] = None
+        hedged = False
+        next_index = 0
+
+        def submit_next():
+            nonlocal next_index
+            if next_index >= len(candidates):
+                return None
+            backend = candidates[next_index]
+            next_index += 1
+            future = _hedge_executor.submit(
+                self._call_backend, backend, messages, stop, **kwargs
+            )
+            pending[future] = backend
+            return backend
+
+        primary = submit_next()
+        timeout = self._get_hedge_delay(primary)
+
+        while pending:
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 主后端过慢，发起对冲请求
+                hedge_backend = submit_next()
+                if hedge_backend is not None:
+                    hedged = True
+                    logger.info(f"⏱️ [LLM路由] {primary.name} 超过 {timeout:.1f}s 未返回，对冲请求 {hedge_backend.name}")
+                timeout = None
+                continue
+
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    chosen, message, latency = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"⚠️ [LLM路由] 后端 {backend.name} 调用失败: {e}")
+                    # 仍有请求在途时等待其结果，否则转移到下一个后端
+                    if not pending:
+                        next_backend = submit_next()
+                        if next_backend is not None:
+                            primary = next_backend
+                            timeout = self._get_hedge_delay(primary)
+                    continue
+
+                self._record_choice(chosen, message, latency, hedged)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+
+        raise RuntimeError(f"LLM路由器所有后端均调用失败: {last_error}") from last_error
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """流式调用：不做对冲，首个分片到达前失败时转移到下一个后端"""
+        last_error: Optional[Exception] = None
+
+        for backend in self._select_candidates():
+            start_time = time.time()
+            aggregate = None
+            try:
+                for chunk in backend.llm.stream(messages, stop=stop, **kwargs):
+                    aggregate = chunk if aggregate is None else aggregate + chunk
+                    generation_chunk = ChatGenerationChunk(message=chunk)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.content, chunk=generation_chunk)
+                    yield generation_chunk
+            except Exception as e:
+                backend.stats.record_failure()
+                if aggregate is not None:
+                    # 已经输出了部分内容，无法无缝切换后端
+                    raise
+                last_error = e
+                logger.warning(f"⚠️ [LLM路由] 后端 {backend.name} 流式调用失败: {e}")
+                continue
+
+            latency = time.time() - start_time
+            backend.stats.record_success(latency)
+            route_info = self._record_choice(backend, aggregate or AIMessageChunk(content=""), latency, False)
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="", response_metadata={"llm_router": route_info}
+            ))
+            return
+
+        raise RuntimeError(f"LLM路由器所有后端均调用失败: {last_error}") from last_error
+
+    def _record_choice(self, backend: RouterBackend, message: BaseMessage, latency: float, hedged: bool) -> Dict[str, Any]:
+        """记录路由选择，并把未自带统计的后端用量写入token跟踪"""
+        route_info = {
+            "backend": backend.name,
+            "provider": backend.provider,
+            "model_name": backend.model_name,
+            "latency": round(latency, 3),
+            "hedged": hedged,
+        }
+        if hasattr(message, "response_metadata") and isinstance(message.response_metadata, dict):
+            message.response_metadata["llm_router"] = route_info
+        logger.info(f"🔀 [LLM路由] 选择 {backend.name} (等级需求: {self.required_tier}, "
+                    f"耗时: {latency:.2f}s, 对冲: {hedged})")
+
+        if not TOKEN_TRACKING_ENABLED:
+            return route_info
+        llm_class_name = getattr(backend.llm, "bound", backend.llm).__class__.__name__
+        if llm_class_name in SELF_TRACKING_ADAPTERS:
+            return route_info
+        usage = getattr(message, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        if input_tokens > 0 or output_tokens > 0:
+            try:
+                token_tracker.track_usage(
+                    provider=backend.provider,
+                    model_name=backend.model_name,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=f"llm_router_{backend.provider}_{int(time.time())}",
+                    analysis_type=f"llm_router_{self.required_tier}",
+                )
+            except Exception as e:
+                logger.error(f"⚠️ [LLM路由] Token追踪失败: {e}")
+        return route_info
+
+
+def create_backend_llm(provider: str, model: str, config: Dict[str, Any], **kwargs):
+    """
+    根据供应商创建单个后端LLM实例
+
+    Args:
+        provider: 供应商名称 (dashscope, google, deepseek, custom_openai)
+        model: 模型名称
+        config: 全局配置
+        **kwargs: 其他参数（temperature, max_tokens等）
+    """
+    kwargs.setdefault("temperature", 0.1)
+    kwargs.setdefault("max_tokens", 2000)
+    provider_lower = provider.lower()
+
+    if "dashscope" in provider_lower or provider_lower == "alibaba":
+        from .dashscope_openai_adapter import ChatDashScopeOpenAI
+        return ChatDashScopeOpenAI(model=model, **kwargs)
+    if provider_lower == "google":
+        from .google_openai_adapter import ChatGoogleOpenAI
+        return ChatGoogleOpenAI(model=model, google_api_key=os.getenv("GOOGLE_API_KEY"), **kwargs)
+    if "deepseek" in provider_lower:
+        from .deepseek_adapter import ChatDeepSeek
+        return ChatDeepSeek(
+            model=model,
+            base_url=os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com"),
+            **kwargs
+        )
+    if provider_lower == "custom_openai":
+        from .openai_compatible_base import create_openai_compatible_llm
+        return create_openai_compatible_llm(
+            provider="custom_openai",
+            model=model,
+            base_url=config.get("custom_openai_base_url", "https://api.openai.com/v1"),
+            **kwargs
+        )
+    raise ValueError(f"LLM路由器不支持的后端供应商: {provider}")
+
+
+def create_llm_routers(config: Dict[str, Any], primary_deep=None, primary_quick=None) -> Tuple[ChatLLMRouter, ChatLLMRouter]:
+    """
+    根据配置创建深度思考和快速思考两个路由器
+
+    config["llm_router_backends"] 为后端列表，每项形如：
+        {"provider": "deepseek", "model": "deepseek-chat", "tier": "deep"}
+
+    主提供商的LLM（如果传入）作为首选后端加入路由器。
+    两个路由器共享同一组后端统计数据。
+    """
+    backends: List[RouterBackend] = []
+    primary_provider = config.get("llm_provider", "primary")
+    if primary_deep is not None:
+        backends.append(RouterBackend(
+            name=f"{primary_provider}:{config['deep_think_llm']}",
+            provider=primary_provider,
+            model_name=config["deep_think_llm"],
+            llm=primary_deep,
+            tier="deep",
+        ))
+    if primary_quick is not None and config["quick_think_llm"] != config.get("deep_think_llm"):
+        backends.append(RouterBackend(
+            name=f"{primary_provider}:{config['quick_think_llm']}",
+            provider=primary_provider,
+            model_name=config["quick_think_llm"],
+            llm=primary_quick,
+            tier="quick",
+        ))
+
+    for spec in config.get("llm_router_backends", []):
+        provider = spec["provider"]
+        model = spec["model"]
+        name = f"{provider}:{model}"
+        if any(backend.name == name for backend in backends):
+            continue
+        try:
+            llm = create_backend_llm(provider, model, config)
+        except Exception as e:
+            # 单个后端不可用（如缺少API密钥）不影响其他后端
+            logger.warning(f"⚠️ [LLM路由] 跳过后端 {name}: {e}")
+            continue
+        backends.append(RouterBackend(
+            name=name,
+            provider=provider,
+            model_name=model,
+            llm=llm,
+            tier=spec.get("tier", "quick"),
+        ))
+
+    if not backends:
+        raise ValueError("LLM路由器没有可用的后端，请检查 llm_router_backends 配置")
+
+    router_kwargs = {
+        "hedge_delay": config.get("llm_router_hedge_delay"),
+        "max_error_rate": config.get("llm_router_max_error_rate", 0.5),
+    }
+    deep_router = ChatLLMRouter(backends=backends, required_tier="deep", **router_kwargs)
+    quick_router = ChatLLMRouter(backends=backends, required_tier="quick", **router_kwargs)
+
+    logger.info(f"✅ [LLM路由] 已启用，后端: {[backend.name for backend in backends]}")
+    return deep_router, quick_router
@@ -5,9 +5,9 @@ OpenAI兼容适配器基类
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
 from langchain_core.callbacks import CallbackManagerForLLMRun
 
@@ -77,6 +77,7 @@ class OpenAICompatibleBase(ChatOpenAI):
             "model": model,
             "temperature": temperature,
             "max_tokens": max_tokens,
+            "stream_usage": kwargs.pop("stream_usage", True),
             **kwargs
         }
         
@@ -127,6 +128,31 @@ class OpenAICompatibleBase(ChatOpenAI):
         
         return result
     
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成聊天响应，结束后根据最后一个分片中的用量记录token使用量
+        """
+        
+        usage = None
+        for chunk in super()._stream(messages, stop, run_manager, **kwargs):
+            if getattr(chunk.message, 'usage_metadata', None):
+                usage = chunk.message.usage_metadata
+            yield chunk
+        
+        if TOKEN_TRACKING_ENABLED and usage:
+            try:
+                self._record_token_usage(
+                    usage.get('input_tokens', 0), usage.get('output_tokens', 0), kwargs
+                )
+            except Exception as e:
+                logger.error(f"⚠️ {self.provider_name} Token追踪失败: {e}", exc_info=True)
+    
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """追踪token使用量"""
         
@@ -136,37 +162,41 @@ class OpenAICompatibleBase(ChatOpenAI):
             
             input_tokens = token_usage.get('prompt_tokens', 0)
             output_tokens = token_usage.get('completion_tokens', 0)
+            self._record_token_usage(input_tokens, output_tokens, kwargs)
+    
+    def _record_token_usage(self, input_tokens: int, output_tokens: int, kwargs: Dict):
+        """记录token使用量和成本"""
+        
+        if input_tokens > 0 or output_tokens > 0:
+            # 生成会话ID
+            session_id = kwargs.get('session_id', f"{self.provider_name}_{hash(str(kwargs))%10000}")
+            analysis_type = kwargs.get('analysis_type', 'stock_analysis')
             
-            if input_tokens > 0 or output_tokens > 0:
-                # 生成会话ID
-                session_id = kwargs.get('session_id', f"{self.provider_name}_{hash(str(kwargs))%10000}")
-                analysis_type = kwargs.get('analysis_type', 'stock_analysis')
-                
-                # 记录使用量
-                token_tracker.track_usage(
-                    provider=self.provider_name,
-                    model_name=self.model_name,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    session_id=session_id,
-                    analysis_type=analysis_type
-                )
-                
-                # 计算成本
-                cost = token_tracker.calculate_cost(
-                    provider=self.provider_name,
-                    model_name=self.model_name,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens
-                )
-                
-                # 使用统一日志管理器记录Token使用
-                logger_manager = get_logger_manager()
-                logger_manager.log_token_usage(
-                    logger, self.provider_name, self.model_name,
-                    input_tokens, output_tokens, cost,
-                    session_id
-                )
+            # 记录使用量
+            token_tracker.track_usage(
+                provider=self.provider_name,
+                model_name=self.model_name,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                session_id=session_id,
+                analysis_type=analysis_type
+            )
+            
+            # 计算成本
+            cost = token_tracker.calculate_cost(
+                provider=self.provider_name,
+                model_name=self.model_name,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens
+            )
+            
+            # 使用统一日志管理器记录Token使用
+            logger_manager = get_logger_manager()
+            logger_manager.log_token_usage(
+                logger, self.provider_name, self.model_name,
+                input_tokens, output_tokens, cost,
+                session_id
+            )
 
 
 class ChatDeepSeekOpenAI(OpenAICompatibleBase):
@@ -12,6 +12,7 @@ import numpy as np
 
 # 导入基础过滤器
 from .news_filter import NewsRelevanceFilter, create_news_filter, get_company_name
+from .news_model_registry import get_news_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -47,106 +48,81 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             self._init_classification_model()
     
     def _init_semantic_model(self):
-        """初始化语义相似度模型"""
+        """从进程内模型注册表获取语义相似度模型和该股票的公司embedding"""
         try:
-            logger.info("[增强过滤器] 正在加载语义相似度模型...")
-            
-            # 尝试使用sentence-transformers
-            try:
-                from sentence_transformers import SentenceTransformer
-                
-                # 使用轻量级中文模型
-                model_name = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
-                self.sentence_model = SentenceTransformer(model_name)
-                
-                # 预计算公司相关的embedding
-                company_texts = [
-                    self.company_name,
-                    f"{self.company_name}股票",
-                    f"{self.company_name}公司",
-                    f"{self.stock_code}",
-                    f"{self.company_name}业绩",
-                    f"{self.company_name}财报"
-                ]
-                
-                self.company_embedding = self.sentence_model.encode(company_texts)
-                logger.info(f"[增强过滤器] ✅ 语义模型加载成功: {model_name}")
-                
-            except ImportError:
-                logger.warning("[增强过滤器] sentence-transformers未安装，跳过语义过滤")
+            registry = get_news_model_registry()
+            self.sentence_model = registry.get_sentence_model()
+            if self.sentence_model is None:
                 self.use_semantic = False
+                return
+            
+            # 公司相关文本的embedding按股票缓存
+            self.company_embedding = registry.get_company_embedding(self.stock_code, self.company_name)
                 
         except Exception as e:
             logger.error(f"[增强过滤器] 语义模型初始化失败: {e}")
             self.use_semantic = False
     
     def _init_classification_model(self):
-        """初始化本地分类模型"""
+        """从进程内模型注册表获取本地分类模型"""
         try:
-            logger.info("[增强过滤器] 正在加载本地分类模型...")
-            
-            # 尝试使用transformers库的中文分类模型
-            try:
-                from transformers import AutoTokenizer, AutoModelForSequenceClassification
-                import torch
-                
-                # 使用轻量级中文文本分类模型
-                model_name = "uer/roberta-base-finetuned-chinanews-chinese"
-                
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-                self.classification_model = AutoModelForSequenceClassification.from_pretrained(model_name)
-                
-                logger.info(f"[增强过滤器] ✅ 分类模型加载成功: {model_name}")
-                
-            except ImportError:
-                logger.warning("[增强过滤器] transformers未安装，跳过本地模型分类")
+            classifier = get_news_model_registry().get_classifier()
+            if classifier is None:
                 self.use_local_model = False
+                return
+            self.tokenizer, self.classification_model = classifier
                 
         except Exception as e:
             logger.error(f"[增强过滤器] 本地分类模型初始化失败: {e}")
             self.use_local_model = False
     
-    def calculate_semantic_similarity(self, title: str, content: str) -> float:
+    @staticmethod
+    def _semantic_text(title: str, content: str) -> str:
+        # 组合标题和内容的前200字符
+        return f"{title} {content[:200]}"
+
+    def calculate_semantic_similarities(self, texts: List[str]) -> np.ndarray:
         """
-        计算语义相似度评分
+        批量计算语义相似度评分：一次批量编码，再用矩阵乘法求与公司相关文本的余弦相似度
         
         Args:
-            title: 新闻标题
-            content: 新闻内容
+            texts: 待评分文本列表
             
         Returns:
-            float: 语义相似度评分 (0-100)
+            np.ndarray: 语义相似度评分数组 (0-100)
         """
-        if not self.use_semantic or self.sentence_model is None:
-            return 0
+        if not self.use_semantic or self.sentence_model is None or not texts:
+            return np.zeros(len(texts))
         
         try:
-            # 组合标题和内容的前200字符
-            text = f"{title} {content[:200]}"
-            
-            # 计算文本embedding
-            text_embedding = self.sentence_model.encode([text])
+            text_embeddings = np.asarray(self.sentence_model.encode(texts, batch_size=64), dtype=np.float32)
+            company_embeddings = np.asarray(self.company_embedding, dtype=np.float32)
             
-            # 计算与公司相关文本的相似度
-            similarities = []
-            for company_emb in self.company_embedding:
-                similarity = np.dot(text_embedding[0], company_emb) / (
-                    np.linalg.norm(text_embedding[0]) * np.linalg.norm(company_emb)
-                )
-                similarities.append(similarity)
+            text_embeddings /= np.linalg.norm(text_embeddings, axis=1, keepdims=True)
+            company_embeddings = company_embeddings / np.linalg.norm(company_embeddings, axis=1, keepdims=True)
             
-            # 取最高相似度
-            max_similarity = max(similarities)
-            
-            # 转换为0-100评分
-            semantic_score = max(0, min(100, max_similarity * 100))
-            
-            logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
-            return semantic_score
+            # 每条文本取与公司相关文本的最高相似度，转换为0-100评分
+            max_similarity = (text_embeddings @ company_embeddings.T).max(axis=1)
+            return np.clip(np.nan_to_num(max_similarity) * 100, 0, 100)
             
         except Exception as e:
             logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
-            return 0
+            return np.zeros(len(texts))
+    
+    def calculate_semantic_similarity(self, title: str, content: str) -> float:
+        """
+        计算语义相似度评分
+        
+        Args:
+            title: 新闻标题
+            content: 新闻内容
+            
+        Returns:
+            float: 语义相似度评分 (0-100)
+        """
+        semantic_score = float(self.calculate_semantic_similarities([self._semantic_text(title, content)])[0])
+        logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
+        return semantic_score
     
     def classify_news_relevance(self, title: str, content: str) -> float:
         """
@@ -202,6 +178,20 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             logger.error(f"[增强过滤器] 本地模型分类失败: {e}")
             return 0
     
+    # 综合评分权重（加权平均）
+    SCORE_WEIGHTS = {
+        'rule': 0.4,      # 规则过滤权重40%
+        'semantic': 0.35,  # 语义相似度权重35%
+        'classification': 0.25  # 分类模型权重25%
+    }
+    
+    def _combine_scores(self, rule_score, semantic_score, classification_score):
+        return (
+            self.SCORE_WEIGHTS['rule'] * rule_score +
+            self.SCORE_WEIGHTS['semantic'] * semantic_score +
+            self.SCORE_WEIGHTS['classification'] * classification_score
+        )
+    
     def calculate_enhanced_relevance_score(self, title: str, content: str) -> Dict[str, float]:
         """
         计算增强相关性评分（综合多种方法）
@@ -234,17 +224,7 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             scores['classification_score'] = 0
         
         # 4. 综合评分（加权平均）
-        weights = {
-            'rule': 0.4,      # 规则过滤权重40%
-            'semantic': 0.35,  # 语义相似度权重35%
-            'classification': 0.25  # 分类模型权重25%
-        }
-        
-        final_score = (
-            weights['rule'] * rule_score +
-            weights['semantic'] * scores['semantic_score'] +
-            weights['classification'] * scores['classification_score']
-        )
+        final_score = self._combine_scores(rule_score, scores['semantic_score'], scores['classification_score'])
         
         scores['final_score'] = final_score
         
@@ -253,6 +233,41 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         
         return scores
     
+    def score_news_enhanced(self, news_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        批量计算新闻DataFrame的增强相关性评分
+        
+        规则评分共用一个关键词匹配器，语义评分对全部新闻只做一次批量编码
+        
+        Returns:
+            pd.DataFrame: 与 news_df 索引对齐，包含 rule_score / semantic_score /
+            classification_score / final_score 四列
+        """
+        titles, contents = self.extract_news_texts(news_df)
+        
+        rule_scores = np.asarray(self.calculate_relevance_scores(titles, contents))
+        
+        if self.use_semantic:
+            semantic_scores = self.calculate_semantic_similarities(
+                [self._semantic_text(title, content) for title, content in zip(titles, contents)]
+            )
+        else:
+            semantic_scores = np.zeros(len(titles))
+        
+        if self.use_local_model:
+            classification_scores = np.array([
+                self.classify_news_relevance(title, content) for title, content in zip(titles, contents)
+            ], dtype=float)
+        else:
+            classification_scores = np.zeros(len(titles))
+        
+        return pd.DataFrame({
+            'rule_score': rule_scores,
+            'semantic_score': semantic_scores,
+            'classification_score': classification_scores,
+            'final_score': self._combine_scores(rule_scores, semantic_scores, classification_scores),
+        }, index=news_df.index)
+    
     def filter_news_enhanced(self, news_df: pd.DataFrame, min_score: float = 40) -> pd.DataFrame:
         """
         增强新闻过滤
@@ -270,27 +285,14 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         
         logger.info(f"[增强过滤器] 开始增强过滤，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
-        filtered_news = []
-        
-        for idx, row in news_df.iterrows():
-            title = row.get('新闻标题', row.get('标题', ''))
-            content = row.get('新闻内容', row.get('内容', ''))
-            
-            # 计算增强评分
-            scores = self.calculate_enhanced_relevance_score(title, content)
-            
-            if scores['final_score'] >= min_score:
-                row_dict = row.to_dict()
-                row_dict.update(scores)  # 添加所有评分信息
-                filtered_news.append(row_dict)
-                
-                logger.debug(f"[增强过滤器] 保留新闻 (综合评分: {scores['final_score']:.1f}): {title[:50]}...")
-            else:
-                logger.debug(f"[增强过滤器] 过滤新闻 (综合评分: {scores['final_score']:.1f}): {title[:50]}...")
+        scores = self.score_news_enhanced(news_df)
+        keep = (scores['final_score'] >= min_score).values
         
         # 创建过滤后的DataFrame
-        if filtered_news:
-            filtered_df = pd.DataFrame(filtered_news)
+        if keep.any():
+            filtered_df = news_df[keep].reset_index(drop=True)
+            for column in scores.columns:
+                filtered_df[column] = scores[column].values[keep]  # 添加所有评分信息
             # 按综合评分排序
             filtered_df = filtered_df.sort_values('final_score', ascending=False)
             logger.info(f"[增强过滤器] 增强过滤完成，保留 {len(filtered_df)}条 新闻")
@@ -0,0 +1,231 @@
+"""
+新闻近似重复检测
+基于 SimHash 指纹（标题 + 正文前缀的字符 n-gram），用分段索引在线性时间内找出转载、
+标题微调等近似重复的新闻；可选的跨运行指纹库记录已出现过的新闻
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+import numpy as np
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+T = TypeVar("T")
+
+SIMHASH_BITS = 64
+# 汉明距离不超过该值视为近似重复
+DEFAULT_DISTANCE_THRESHOLD = 3
+# 参与指纹计算的正文前缀长度
+CONTENT_PREFIX_CHARS = 200
+SHINGLE_SIZE = 3
+
+_NORMALIZE_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    return _NORMALIZE_PATTERN.sub("", (text or "").lower())
+
+
+def simhash(text: str) -> int:
+    """计算文本的64位 SimHash 指纹，文本过短时返回 0"""
+    normalized = _normalize(text)
+    if not normalized:
+        return 0
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = [normalized]
+    else:
+        shingles = [normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)]
+
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(shingles), SIMHASH_BITS)
+    # 每一位上 1 多于 0 则置 1
+    weights = bits.sum(axis=0) * 2 - len(shingles)
+    return int("".join("1" if w > 0 else "0" for w in weights), 2)
+
+
+def news_fingerprint(title: str, content: str = "") -> int:
+    return simhash(f"{title} {(content or '')[:CONTENT_PREFIX_CHARS]}")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    """
+    SimHash 近邻索引
+
+    把 64 位指纹切成 (阈值 + 1) 段，汉明距离不超过阈值的两个指纹至少有一段完全相同，
+    因此只需与同段桶中的指纹比较
+    """
+
+    def __init__(self, threshold: int = DEFAULT_DISTANCE_THRESHOLD):
+        self.threshold = threshold
+        self.bands = threshold + 1
+        self._band_bits = SIMHASH_BITS // self.bands
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self._band_bits) - 1
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self._band_bits)) & mask
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """返回索引中与指纹近似的已有指纹，没有时返回 None"""
+        for band, key in self._band_keys(fingerprint):
+            for candidate in self._buckets[band].get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.threshold:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int):
+        for band, key in self._band_keys(fingerprint):
+            self._buckets[band].setdefault(key, []).append(fingerprint)
+
+
+class NewsFingerprintStore:
+    """跨运行的新闻指纹库，按股票代码分组保存，过期指纹自动清理"""
+
+    def __init__(self, path: Optional[str] = None, ttl_hours: float = 24, max_per_scope: int = 2000):
+        if path is None:
+            try:
+                from tradingagents.dataflows.config import get_config
+                cache_dir = get_config().get("data_cache_dir")
+            except Exception:
+                cache_dir = None
+            cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), "dataflows", "data_cache")
+            path = os.path.join(cache_dir, "news_fingerprints.json")
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_per_scope = max_per_scope
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Dict[str, float]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self._data is None:
+            self._data = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f)
+                except Exception as e:
+                    logger.warning(f"⚠️ [新闻去重] 指纹库读取失败: {e}")
+        return self._data
+
+    def index_for(self, scope: str) -> SimHashIndex:
+        """构建包含该分组未过期指纹的索引"""
+        index = SimHashIndex()
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for fingerprint, seen_at in self._load().get(scope, {}).items():
+                if seen_at >= cutoff:
+                    index.add(int(fingerprint, 16))
+        return index
+
+    def record(self, scope: str, fingerprints: Iterable[int]):
+        now = time.time()
+        cutoff = now - self.ttl
+        with self._lock:
+            data = self._load()
+            entries = {k: v for k, v in data.get(scope, {}).items() if v >= cutoff}
+            for fingerprint in fingerprints:
+                entries.setdefault(format(fingerprint, "016x"), now)
+            if len(entries) > self.max_per_scope:
+                entries = dict(sorted(entries.items(), key=lambda kv: kv[1])[-self.max_per_scope:])
+            data[scope] = entries
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"⚠️ [新闻去重] 指纹库写入失败: {e}")
+
+
+_fingerprint_store: Optional[NewsFingerprintStore] = None
+_fingerprint_store_lock = threading.Lock()
+
+
+def get_fingerprint_store() -> NewsFingerprintStore:
+    global _fingerprint_store
+    if _fingerprint_store is None:
+        with _fingerprint_store_lock:
+            if _fingerprint_store is None:
+                _fingerprint_store = NewsFingerprintStore()
+    return _fingerprint_store
+
+
+def _cross_run_enabled(suppress_seen: Optional[bool]) -> bool:
+    if suppress_seen is not None:
+        return suppress_seen
+    try:
+        from tradingagents.dataflows.config import get_config
+        return bool(get_config().get("news_dedup_cross_run", False))
+    except Exception:
+        return False
+
+
+def deduplicate_items(items: List[T], key: Callable[[T], str], scope: Optional[str] = None,
+                      suppress_seen: Optional[bool] = None,
+                      threshold: int = DEFAULT_DISTANCE_THRESHOLD) -> List[T]:
+    """
+    去除近似重复的新闻，保留每组中最先出现的一条
+
+    Args:
+        items: 新闻列表（按优先级排列）
+        key: 返回用于计算指纹的文本（标题 + 正文）
+        scope: 跨运行指纹库的分组（通常为股票代码），None 表示不使用指纹库
+        suppress_seen: 是否过滤之前运行中已出现过的新闻，None 时读取配置 news_dedup_cross_run
+        threshold: 汉明距离阈值
+    """
+    cross_run = scope is not None and _cross_run_enabled(suppress_seen)
+    seen_index = get_fingerprint_store().index_for(scope) if cross_run else None
+
+    index = SimHashIndex(threshold)
+    kept: List[T] = []
+    fingerprints: List[int] = []
+    near_duplicates = 0
+    seen_before = 0
+    for item in items:
+        fingerprint = simhash(key(item))
+        if fingerprint == 0:
+            kept.append(item)
+            continue
+        if index.find(fingerprint) is not None:
+            near_duplicates += 1
+            continue
+        index.add(fingerprint)
+        fingerprints.append(fingerprint)
+        if seen_index is not None and seen_index.find(fingerprint) is not None:
+            seen_before += 1
+            continue
+        kept.append(item)
+
+    if cross_run:
+        get_fingerprint_store().record(scope, fingerprints)
+    if near_duplicates or seen_before:
+        logger.info(f"[新闻去重] 近似重复: {near_duplicates}条，此前已出现: {seen_before}条，保留: {len(kept)}/{len(items)}条")
+    return kept
+
+
+_SECTION_SPLIT = re.compile(r"^(?=#{2,3} )", re.MULTILINE)
+
+
+def deduplicate_text_blocks(text: str, scope: Optional[str] = None) -> str:
+    """对已格式化的新闻文本按 ``### 标题`` 分块去除近似重复的新闻，其他段落原样保留"""
+    blocks = _SECTION_SPLIT.split(text)
+    articles = [block for block in blocks if block.startswith("### ")]
+    if len(articles) < 2:
+        return text
+    kept = {id(block) for block in deduplicate_items(articles, key=lambda block: block[4:4 + CONTENT_PREFIX_CHARS * 2], scope=scope)}
+    if len(kept) == len(articles):
+        return text
+    return "".join(block for block in blocks if not block.startswith("### ") or id(block) in kept)
@@ -11,6 +11,50 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 关键词分组 -> (标题命中得分, 正文命中得分)
+KEYWORD_WEIGHTS = {
+    'strong': (30, 15),
+    'include': (15, 8),
+    'exclude': (-40, -20),
+}
+
+
+class KeywordMatcher:
+    """
+    多关键词一次扫描匹配器
+
+    所有关键词编译成一个前瞻正则（长词优先），在文本的每个位置报告最长的匹配词；
+    较短的关键词若是某个已匹配长词的子串，也必然出现在文本中，通过预先计算的包含关系补全，
+    效果等同于 Aho-Corasick 自动机的输出链接
+    """
+
+    def __init__(self, keyword_groups: Dict[str, List[str]]):
+        # 关键词 -> 所属分组（同一分组内重复出现的关键词按原样重复计分）
+        self.groups: Dict[str, List[str]] = {}
+        for group, keywords in keyword_groups.items():
+            for keyword in keywords:
+                if keyword:
+                    self.groups.setdefault(keyword, []).append(group)
+        self.signature = None
+
+        keywords = sorted(self.groups, key=len, reverse=True)
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        alternation = '|'.join(re.escape(keyword) for keyword in keywords)
+        self._pattern = re.compile(f'(?=({alternation}))') if keywords else None
+
+    def find(self, text: str) -> set:
+        """返回文本中出现的全部关键词"""
+        if self._pattern is None or not text:
+            return set()
+        found = set()
+        for longest in set(self._pattern.findall(text)):
+            found.update(self._implied[longest])
+        return found
+
+
 class NewsRelevanceFilter:
     """基于规则的新闻相关性过滤器"""
     
@@ -48,88 +92,122 @@ class NewsRelevanceFilter:
             '资产重组', '借壳上市', '退市', '摘帽', 'ST'
         ]
     
-    def calculate_relevance_score(self, title: str, content: str) -> float:
-        """
-        计算新闻相关性评分
-        
-        Args:
-            title: 新闻标题
-            content: 新闻内容
-            
-        Returns:
-            float: 相关性评分 (0-100)
-        """
+    def _get_keyword_matcher(self) -> "KeywordMatcher":
+        """获取（必要时重建）覆盖全部关键词列表的匹配器，关键词列表被修改后自动重建"""
+        signature = (
+            tuple(self.strong_keywords),
+            tuple(self.include_keywords),
+            tuple(self.exclude_keywords),
+        )
+        matcher = getattr(self, "_keyword_matcher", None)
+        if matcher is None or matcher.signature != signature:
+            matcher = KeywordMatcher({
+                'strong': self.strong_keywords,
+                'include': self.include_keywords,
+                'exclude': self.exclude_keywords,
+            })
+            matcher.signature = signature
+            self._keyword_matcher = matcher
+        return matcher
+
+    def _score(self, title: str, content: str, matcher: "KeywordMatcher", verbose: bool) -> float:
         score = 0
-        title_lower = title.lower()
-        content_lower = content.lower()
-        
+
         # 1. 直接提及公司名称
-        if self.company_name in title:
+        title_has_company = self.company_name in title
+        if title_has_company:
             score += 50  # 标题中出现公司名称，高分
-            logger.debug(f"[过滤器] 标题包含公司名称 '{self.company_name}': +50分")
         elif self.company_name in content:
             score += 25  # 内容中出现公司名称，中等分
-            logger.debug(f"[过滤器] 内容包含公司名称 '{self.company_name}': +25分")
-            
+
         # 2. 直接提及股票代码
-        if self.stock_code in title:
+        title_has_code = self.stock_code in title
+        if title_has_code:
             score += 40  # 标题中出现股票代码，高分
-            logger.debug(f"[过滤器] 标题包含股票代码 '{self.stock_code}': +40分")
         elif self.stock_code in content:
             score += 20  # 内容中出现股票代码，中等分
-            logger.debug(f"[过滤器] 内容包含股票代码 '{self.stock_code}': +20分")
-            
-        # 3. 强相关关键词检查
-        strong_matches = []
-        for keyword in self.strong_keywords:
-            if keyword in title_lower:
-                score += 30
-                strong_matches.append(keyword)
-            elif keyword in content_lower:
-                score += 15
-                strong_matches.append(keyword)
-        
-        if strong_matches:
-            logger.debug(f"[过滤器] 强相关关键词匹配: {strong_matches}")
-            
-        # 4. 包含关键词检查
-        include_matches = []
-        for keyword in self.include_keywords:
-            if keyword in title_lower:
-                score += 15
-                include_matches.append(keyword)
-            elif keyword in content_lower:
-                score += 8
-                include_matches.append(keyword)
-        
-        if include_matches:
-            logger.debug(f"[过滤器] 相关关键词匹配: {include_matches[:3]}...")  # 只显示前3个
-            
-        # 5. 排除关键词检查（减分）
-        exclude_matches = []
-        for keyword in self.exclude_keywords:
-            if keyword in title_lower:
-                score -= 40  # 标题中出现排除词，大幅减分
-                exclude_matches.append(keyword)
-            elif keyword in content_lower:
-                score -= 20  # 内容中出现排除词，中等减分
-                exclude_matches.append(keyword)
-        
-        if exclude_matches:
-            logger.debug(f"[过滤器] 排除关键词匹配: {exclude_matches[:3]}...")
-            
+
+        # 3-5. 关键词检查：标题命中计高分，否则正文命中计低分
+        title_hits = matcher.find(title.lower())
+        content_hits = matcher.find(content.lower())
+        matches = {group: [] for group in KEYWORD_WEIGHTS}
+        for keyword, groups in matcher.groups.items():
+            if keyword in title_hits:
+                weight_index = 0
+            elif keyword in content_hits:
+                weight_index = 1
+            else:
+                continue
+            for group in groups:
+                score += KEYWORD_WEIGHTS[group][weight_index]
+                matches[group].append(keyword)
+
         # 6. 特殊规则：如果标题完全不包含公司信息但包含排除词，严重减分
-        if (self.company_name not in title and self.stock_code not in title and 
-            any(keyword in title_lower for keyword in self.exclude_keywords)):
+        title_has_exclude = any('exclude' in matcher.groups[keyword] for keyword in title_hits)
+        if not title_has_company and not title_has_code and title_has_exclude:
             score -= 30
-            logger.debug(f"[过滤器] 标题无公司信息但含排除词: -30分")
-        
+
         # 确保评分在0-100范围内
         final_score = max(0, min(100, score))
-        
-        logger.debug(f"[过滤器] 最终评分: {final_score}分 - 标题: {title[:30]}...")
-        
+
+        if verbose:
+            if matches['strong']:
+                logger.debug(f"[过滤器] 强相关关键词匹配: {matches['strong']}")
+            if matches['include']:
+                logger.debug(f"[过滤器] 相关关键词匹配: {matches['include'][:3]}...")  # 只显示前3个
+            if matches['exclude']:
+                logger.debug(f"[过滤器] 排除关键词匹配: {matches['exclude'][:3]}...")
+            logger.debug(f"[过滤器] 最终评分: {final_score}分 - 标题: {title[:30]}...")
+
         return final_score
+
+    def calculate_relevance_score(self, title: str, content: str) -> float:
+        """
+        计算新闻相关性评分
+        
+        Args:
+            title: 新闻标题
+            content: 新闻内容
+            
+        Returns:
+            float: 相关性评分 (0-100)
+        """
+        return self._score(title, content, self._get_keyword_matcher(), verbose=True)
+
+    def calculate_relevance_scores(self, titles: List[str], contents: List[str]) -> List[float]:
+        """
+        批量计算新闻相关性评分，关键词匹配器只构建一次
+
+        Args:
+            titles: 新闻标题列表
+            contents: 新闻内容列表（与标题一一对应）
+
+        Returns:
+            List[float]: 相关性评分列表 (0-100)
+        """
+        matcher = self._get_keyword_matcher()
+        return [self._score(title, content, matcher, verbose=False) for title, content in zip(titles, contents)]
+
+    @staticmethod
+    def extract_news_texts(news_df: pd.DataFrame) -> Tuple[List[str], List[str]]:
+        """从新闻DataFrame中取出标题列和内容列（兼容不同数据源的列名）"""
+        def column(*names: str) -> List[str]:
+            for name in names:
+                if name in news_df.columns:
+                    return news_df[name].fillna('').astype(str).tolist()
+            return [''] * len(news_df)
+
+        return column('新闻标题', '标题'), column('新闻内容', '内容')
+
+    def score_news(self, news_df: pd.DataFrame) -> pd.Series:
+        """
+        批量计算新闻DataFrame中每条新闻的相关性评分
+
+        Returns:
+            pd.Series: 与 news_df 索引对齐的相关性评分
+        """
+        titles, contents = self.extract_news_texts(news_df)
+        return pd.Series(self.calculate_relevance_scores(titles, contents), index=news_df.index)
     
     def filter_news(self, news_df: pd.DataFrame, min_score: float = 30) -> pd.DataFrame:
         """
@@ -148,27 +226,13 @@ class NewsRelevanceFilter:
         
         logger.info(f"[过滤器] 开始过滤新闻，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
-        filtered_news = []
-        
-        for idx, row in news_df.iterrows():
-            title = row.get('新闻标题', row.get('标题', ''))
-            content = row.get('新闻内容', row.get('内容', ''))
-            
-            # 计算相关性评分
-            score = self.calculate_relevance_score(title, content)
-            
-            if score >= min_score:
-                row_dict = row.to_dict()
-                row_dict['relevance_score'] = score
-                filtered_news.append(row_dict)
-                
-                logger.debug(f"[过滤器] 保留新闻 (评分: {score:.1f}): {title[:50]}...")
-            else:
-                logger.debug(f"[过滤器] 过滤新闻 (评分: {score:.1f}): {title[:50]}...")
+        scores = self.score_news(news_df)
+        keep = (scores >= min_score).values
         
         # 创建过滤后的DataFrame
-        if filtered_news:
-            filtered_df = pd.DataFrame(filtered_news)
+        if keep.any():
+            filtered_df = news_df[keep].reset_index(drop=True)
+            filtered_df['relevance_score'] = scores.values[keep]
             # 按相关性评分排序
             filtered_df = filtered_df.sort_values('relevance_score', ascending=False)
             logger.info(f"[过滤器] 过滤完成，保留 {len(filtered_df)}条 新闻")
@@ -252,6 +316,16 @@ def get_company_name(ticker: str) -> str:
     
     company_name = STOCK_COMPANY_MAPPING.get(clean_ticker)
     
+    if not company_name:
+        # 查询分析过程中已解析并缓存的名称
+        from tradingagents.utils.symbol_context import get_symbol_metadata_cache
+        cached = get_symbol_metadata_cache().get(ticker)
+        if cached:
+            company_name = cached.get("company_name")
+        else:
+            from tradingagents.dataflows.symbol_master import get_symbol_master
+            company_name = get_symbol_master().get_name(ticker)
+    
     if company_name:
         logger.debug(f"[公司映射] {ticker} -> {company_name}")
         return company_name
@@ -0,0 +1,221 @@
+"""
+新闻过滤模型注册表
+进程内共享的语义模型（sentence-transformers）和本地分类模型，首次使用时加载一次，
+所有 EnhancedNewsFilter 实例复用同一份权重；可选 ONNX 推理或 int8 动态量化（CPU），
+公司相关文本的 embedding 按股票缓存
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+SENTENCE_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
+CLASSIFICATION_MODEL_NAME = "uer/roberta-base-finetuned-chinanews-chinese"
+# sentence-transformers 模型仓库中预导出的 int8 量化 ONNX 文件
+ONNX_QINT8_FILE_NAME = "onnx/model_qint8_avx2.onnx"
+
+# 缓存的公司 embedding 数量上限
+COMPANY_EMBEDDING_CACHE_SIZE = 512
+
+_MISSING = object()
+
+
+def _backend_settings() -> Tuple[str, bool]:
+    """读取推理后端配置：(torch / onnx, 是否 int8 量化)"""
+    try:
+        from tradingagents.dataflows.config import get_config
+        config = get_config()
+    except Exception:
+        config = {}
+    backend = str(config.get("news_model_backend") or os.getenv("NEWS_MODEL_BACKEND", "torch")).lower()
+    quantize = config.get("news_model_quantize")
+    if quantize is None:
+        quantize = os.getenv("NEWS_MODEL_QUANTIZE", "false").lower() == "true"
+    return backend, bool(quantize)
+
+
+def _quantize_int8(model):
+    """对 torch 模型的 Linear 层做 int8 动态量化（仅 CPU 推理）"""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def company_texts(company_name: str, stock_code: str) -> List[str]:
+    """用于语义相似度比较的公司相关文本"""
+    return [
+        company_name,
+        f"{company_name}股票",
+        f"{company_name}公司",
+        f"{stock_code}",
+        f"{company_name}业绩",
+        f"{company_name}财报"
+    ]
+
+
+class NewsModelRegistry:
+    """线程安全、惰性加载的新闻过滤模型注册表"""
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        self._company_embeddings: "OrderedDict[Tuple[str, str, str], np.ndarray]" = OrderedDict()
+        self._embedding_lock = threading.Lock()
+
+    def _get_or_load(self, key: str, loader):
+        model = self._models.get(key, _MISSING)
+        if model is not _MISSING:
+            return model
+        with self._registry_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            model = self._models.get(key, _MISSING)
+            if model is _MISSING:
+                # 加载失败记为 None，避免每个过滤器重复尝试
+                model = loader()
+                self._models[key] = model
+        return model
+
+    def _load_sentence_model(self, model_name: str, backend: Optional[str] = None,
+                             quantize: Optional[bool] = None):
+        default_backend, default_quantize = _backend_settings()
+        backend = (backend or default_backend).lower()
+        quantize = default_quantize if quantize is None else quantize
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            logger.warning("[模型注册表] sentence-transformers未安装，跳过语义过滤")
+            return None
+
+        try:
+            logger.info(f"[模型注册表] 正在加载语义相似度模型: {model_name} (后端: {backend})")
+            model = None
+            if backend == "onnx" and quantize:
+                # 优先使用模型仓库中预先导出的 int8 量化 ONNX 文件
+                try:
+                    model = SentenceTransformer(model_name, backend="onnx",
+                                                model_kwargs={"file_name": ONNX_QINT8_FILE_NAME})
+                except Exception as e:
+                    logger.info(f"[模型注册表] 未找到int8量化ONNX模型，使用未量化ONNX: {e}")
+            if backend == "onnx" and model is None:
+                try:
+                    model = SentenceTransformer(model_name, backend="onnx")
+                except Exception as e:
+                    logger.warning(f"⚠️ [模型注册表] ONNX后端不可用，回退到torch: {e}")
+            if model is None:
+                model = SentenceTransformer(model_name, device="cpu" if quantize else None)
+                if quantize:
+                    model = _quantize_int8(model)
+            logger.info(f"[模型注册表] ✅ 语义模型加载成功: {model_name}")
+            return model
+        except Exception as e:
+            logger.error(f"[模型注册表] 语义模型初始化失败: {e}")
+            return None
+
+    def _load_classifier(self, model_name: str):
+        backend, quantize = _backend_settings()
+        try:
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        except ImportError:
+            logger.warning("[模型注册表] transformers未安装，跳过本地模型分类")
+            return None
+
+        try:
+            logger.info(f"[模型注册表] 正在加载本地分类模型: {model_name} (后端: {backend})")
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = None
+            if backend == "onnx":
+                try:
+                    from optimum.onnxruntime import ORTModelForSequenceClassification
+                    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+                except Exception as e:
+                    logger.warning(f"⚠️ [模型注册表] ONNX后端不可用，回退到torch: {e}")
+            if model is None:
+                model = AutoModelForSequenceClassification.from_pretrained(model_name)
+                model.eval()
+                if quantize:
+                    model = _quantize_int8(model)
+            logger.info(f"[模型注册表] ✅ 分类模型加载成功: {model_name}")
+            return tokenizer, model
+        except Exception as e:
+            logger.error(f"[模型注册表] 本地分类模型初始化失败: {e}")
+            return None
+
+    def get_sentence_model(self, model_name: str = SENTENCE_MODEL_NAME, backend: Optional[str] = None,
+                           quantize: Optional[bool] = None):
+        """获取共享的语义相似度模型，不可用时返回 None；backend / quantize 为空时使用全局配置"""
+        if backend is None and quantize is None:
+            key = f"sentence:{model_name}"
+        else:
+            key = f"sentence:{model_name}:{backend}:{quantize}"
+        return self._get_or_load(key, lambda: self._load_sentence_model(model_name, backend, quantize))
+
+    def get_classifier(self, model_name: str = CLASSIFICATION_MODEL_NAME) -> Optional[Tuple[Any, Any]]:
+        """获取共享的 (tokenizer, 分类模型)，不可用时返回 None"""
+        return self._get_or_load(f"classifier:{model_name}", lambda: self._load_classifier(model_name))
+
+    def get_company_embedding(self, stock_code: str, company_name: str,
+                              model_name: str = SENTENCE_MODEL_NAME) -> Optional[np.ndarray]:
+        """获取（按股票缓存的）公司相关文本 embedding"""
+        model = self.get_sentence_model(model_name)
+        if model is None:
+            return None
+
+        key = (model_name, stock_code, company_name)
+        with self._embedding_lock:
+            embedding = self._company_embeddings.get(key)
+            if embedding is not None:
+                self._company_embeddings.move_to_end(key)
+                return embedding
+
+        embedding = np.asarray(model.encode(company_texts(company_name, stock_code)))
+
+        with self._embedding_lock:
+            self._company_embeddings[key] = embedding
+            self._company_embeddings.move_to_end(key)
+            while len(self._company_embeddings) > COMPANY_EMBEDDING_CACHE_SIZE:
+                self._company_embeddings.popitem(last=False)
+        return embedding
+
+    def warm_up(self, semantic: bool = True, classification: bool = False):
+        """预加载模型（例如在Web服务启动时），避免首个请求承担加载耗时"""
+        if semantic:
+            model = self.get_sentence_model()
+            if model is not None:
+                model.encode(["预热"])
+        if classification:
+            self.get_classifier()
+
+
+_registry: Optional[NewsModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_news_model_registry() -> NewsModelRegistry:
+    """获取全局新闻过滤模型注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = NewsModelRegistry()
+    return _registry
+
+
+def warm_up_news_models_in_background(semantic: bool = True, classification: bool = False) -> threading.Thread:
+    """在后台线程中预加载模型，不阻塞服务启动"""
+    def _run():
+        try:
+            get_news_model_registry().warm_up(semantic=semantic, classification=classification)
+        except Exception as e:
+            logger.warning(f"⚠️ [模型注册表] 模型预热失败: {e}")
+
+    thread = threading.Thread(target=_run, name="news-model-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('stock_validator')
 
+from tradingagents.utils.symbol_context import record_symbol_metadata
+
 
 class StockDataPreparationResult:
     """股票数据预获取结果类"""
@@ -19,7 +21,8 @@ class StockDataPreparationResult:
     def __init__(self, is_valid: bool, stock_code: str, market_type: str = "",
                  stock_name: str = "", error_message: str = "", suggestion: str = "",
                  has_historical_data: bool = False, has_basic_info: bool = False,
-                 data_period_days: int = 0, cache_status: str = ""):
+                 data_period_days: int = 0, cache_status: str = "",
+                 data_context=None):
         self.is_valid = is_valid
         self.stock_code = stock_code
         self.market_type = market_type
@@ -30,6 +33,8 @@ class StockDataPreparationResult:
         self.has_basic_info = has_basic_info
         self.data_period_days = data_period_days
         self.cache_status = cache_status
+        # 预获取阶段已拉取的数据，分析阶段绑定后工具直接复用
+        self.data_context = data_context
 
     def to_dict(self) -> Dict:
         """转换为字典格式"""
@@ -90,8 +95,33 @@ class StockDataPreparer:
             market_type = self._detect_market_type(stock_code)
             logger.debug(f"📊 [数据准备] 自动检测市场类型: {market_type}")
 
-        # 3. 预获取数据并验证
-        return self._prepare_data_by_market(stock_code, market_type, period_days, analysis_date)
+        # 3. 预获取数据并验证；获取到的数据记录在运行数据上下文中，供后续分析复用
+        if not self._data_context_enabled():
+            return self._prepare_data_by_market(stock_code, market_type, period_days, analysis_date)
+
+        from tradingagents.dataflows.run_data_context import (
+            RunDataContext, get_run_data_context, use_run_data_context
+        )
+
+        # 空的上下文 len() 为0，不能用 or 判断
+        data_context = get_run_data_context()
+        if data_context is None:
+            data_context = RunDataContext()
+        with use_run_data_context(data_context):
+            result = self._prepare_data_by_market(stock_code, market_type, period_days, analysis_date)
+
+        if result.is_valid:
+            result.data_context = data_context
+            logger.debug(f"📊 [数据准备] 运行数据上下文已记录 {len(data_context)} 个数据集")
+        return result
+
+    @staticmethod
+    def _data_context_enabled() -> bool:
+        try:
+            from tradingagents.dataflows.config import get_config
+            return get_config().get("run_data_context_enabled", True)
+        except Exception:
+            return True
     
     def _validate_format(self, stock_code: str, market_type: str) -> StockDataPreparationResult:
         """验证股票代码格式"""
@@ -153,9 +183,17 @@ class StockDataPreparer:
         )
     
     def _detect_market_type(self, stock_code: str) -> str:
-        """自动检测市场类型"""
+        """自动检测市场类型：优先按本地代码主表识别，未收录的代码按格式判断"""
         stock_code = stock_code.strip().upper()
-        
+
+        try:
+            from tradingagents.dataflows.symbol_master import get_symbol_master
+            market = get_symbol_master().detect_market(stock_code)
+            if market:
+                return {'china': "A股", 'hk': "港股", 'us': "美股"}.get(market, "未知")
+        except Exception as e:
+            logger.debug(f"📊 [市场识别] 代码主表查询失败，按格式判断: {e}")
+
         # A股：6位数字
         if re.match(r'^\d{6}$', stock_code):
             return "A股"
@@ -326,6 +364,7 @@ class StockDataPreparer:
                     has_basic_info = True
                     logger.info(f"✅ [A股数据] 基本信息获取成功: {stock_code} - {stock_name}")
                     cache_status += "基本信息已缓存; "
+                    record_symbol_metadata(stock_code, stock_name)
                 else:
                     logger.warning(f"⚠️ [A股数据] 基本信息无效: {stock_code}")
                     return StockDataPreparationResult(
@@ -455,6 +494,7 @@ class StockDataPreparer:
                     has_basic_info = True
                     logger.info(f"✅ [港股数据] 基本信息获取成功: {formatted_code} - {stock_name}")
                     cache_status += "基本信息已缓存; "
+                    record_symbol_metadata(formatted_code, stock_name)
                 else:
                     logger.warning(f"⚠️ [港股数据] 基本信息无效: {formatted_code}")
                     logger.debug(f"🔍 [港股数据] 信息内容: {stock_info[:200]}...")
@@ -0,0 +1,242 @@
+"""
+股票代码上下文
+每次分析开始时解析一次公司名称、市场、货币、行业等信息并写入 AgentState，
+各分析师直接读取，不再重复调用数据接口；解析结果持久化到本地元数据缓存
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from tradingagents.utils.stock_utils import StockUtils
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+
+# 美股常用名称映射
+US_STOCK_NAMES = {
+    'AAPL': '苹果公司',
+    'TSLA': '特斯拉',
+    'NVDA': '英伟达',
+    'MSFT': '微软',
+    'GOOGL': '谷歌',
+    'AMZN': '亚马逊',
+    'META': 'Meta',
+    'NFLX': '奈飞'
+}
+
+# 元数据缓存有效期（秒），公司名称极少变化
+SYMBOL_METADATA_TTL = 7 * 24 * 3600
+
+
+class SymbolMetadataCache:
+    """股票元数据持久化缓存（代码 -> 名称、市场、货币、行业）"""
+
+    def __init__(self, cache_file: Optional[str] = None, ttl: int = SYMBOL_METADATA_TTL):
+        if cache_file is None:
+            cache_file = self._default_cache_file()
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @staticmethod
+    def _default_cache_file() -> str:
+        try:
+            from tradingagents.dataflows.config import get_config
+            cache_dir = get_config().get("data_cache_dir")
+        except Exception:
+            cache_dir = None
+        if not cache_dir:
+            cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dataflows", "data_cache")
+        return os.path.join(cache_dir, "symbol_metadata.json")
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._data is None:
+            self._data = {}
+            if self.cache_file.exists():
+                try:
+                    with open(self.cache_file, 'r', encoding='utf-8') as f:
+                        self._data = json.load(f)
+                except Exception as e:
+                    logger.warning(f"⚠️ [代码上下文] 元数据缓存读取失败: {e}")
+        return self._data
+
+    def get(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """获取未过期的元数据"""
+        key = str(ticker).strip().upper()
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and time.time() - entry.get("updated_at", 0) < self.ttl:
+            return entry
+        return None
+
+    def set(self, ticker: str, metadata: Dict[str, Any]):
+        """写入元数据并持久化"""
+        key = str(ticker).strip().upper()
+        entry = dict(metadata)
+        entry["updated_at"] = time.time()
+        with self._lock:
+            data = self._load()
+            data[key] = entry
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.cache_file.with_suffix(".tmp")
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+            except Exception as e:
+                logger.warning(f"⚠️ [代码上下文] 元数据缓存写入失败: {e}")
+
+
+_metadata_cache: Optional[SymbolMetadataCache] = None
+_metadata_cache_lock = threading.Lock()
+
+
+def get_symbol_metadata_cache() -> SymbolMetadataCache:
+    """获取全局元数据缓存实例"""
+    global _metadata_cache
+    if _metadata_cache is None:
+        with _metadata_cache_lock:
+            if _metadata_cache is None:
+                _metadata_cache = SymbolMetadataCache()
+    return _metadata_cache
+
+
+def _is_placeholder_name(name: Optional[str], ticker: str) -> bool:
+    """判断是否为降级生成的占位名称"""
+    if not name or name == "未知":
+        return True
+    clean_ticker = ticker.replace('.HK', '').replace('.hk', '')
+    return name in (f"股票{ticker}", f"股票代码{ticker}", f"港股{clean_ticker}", f"美股{ticker}")
+
+
+def resolve_company_name(ticker: str, market_info: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    调用数据接口解析公司名称和行业
+
+    Args:
+        ticker: 股票代码
+        market_info: 市场信息字典
+
+    Returns:
+        Dict: {"company_name": ..., "industry": ...}
+    """
+    industry = None
+
+    # 优先查询本地代码主表，命中时无需访问数据接口
+    try:
+        from tradingagents.dataflows.symbol_master import get_symbol_master
+        record = get_symbol_master().get(ticker)
+        if record and record['name']:
+            logger.debug(f"📊 [代码上下文] 代码主表命中: {ticker} -> {record['name']}")
+            return {"company_name": record['name'], "industry": record['industry'] or None}
+    except Exception as e:
+        logger.debug(f"📊 [代码上下文] 代码主表查询失败: {e}")
+
+    try:
+        if market_info['is_china']:
+            # 中国A股：使用统一接口获取股票信息
+            from tradingagents.dataflows.interface import get_china_stock_info_unified
+            stock_info = get_china_stock_info_unified(ticker)
+
+            company_name = None
+            for line in stock_info.split("\n"):
+                if "股票名称:" in line and company_name is None:
+                    company_name = line.split("股票名称:")[1].strip()
+                elif "所属行业:" in line and industry is None:
+                    industry = line.split("所属行业:")[1].strip() or None
+
+            if company_name:
+                logger.debug(f"📊 [代码上下文] 从统一接口获取中国股票名称: {ticker} -> {company_name}")
+            else:
+                logger.warning(f"⚠️ [代码上下文] 无法从统一接口解析股票名称: {ticker}")
+                company_name = f"股票代码{ticker}"
+
+        elif market_info['is_hk']:
+            # 港股：使用改进的港股工具
+            try:
+                from tradingagents.dataflows.improved_hk_utils import get_hk_company_name_improved
+                company_name = get_hk_company_name_improved(ticker)
+                logger.debug(f"📊 [代码上下文] 使用改进港股工具获取名称: {ticker} -> {company_name}")
+            except Exception as e:
+                logger.debug(f"📊 [代码上下文] 改进港股工具获取名称失败: {e}")
+                # 降级方案：生成友好的默认名称
+                clean_ticker = ticker.replace('.HK', '').replace('.hk', '')
+                company_name = f"港股{clean_ticker}"
+
+        elif market_info['is_us']:
+            # 美股：使用简单映射或返回代码
+            company_name = US_STOCK_NAMES.get(ticker.upper(), f"美股{ticker}")
+            logger.debug(f"📊 [代码上下文] 美股名称映射: {ticker} -> {company_name}")
+
+        else:
+            company_name = f"股票{ticker}"
+
+    except Exception as e:
+        logger.error(f"❌ [代码上下文] 获取公司名称失败: {e}")
+        company_name = f"股票{ticker}"
+
+    if industry == "未知":
+        industry = None
+    return {"company_name": company_name, "industry": industry}
+
+
+def record_symbol_metadata(ticker: str, company_name: str, industry: Optional[str] = None):
+    """记录其他流程（如数据预获取）已解析出的名称，供后续分析直接使用"""
+    if _is_placeholder_name(company_name, ticker):
+        return
+    market_info = StockUtils.get_market_info(ticker)
+    get_symbol_metadata_cache().set(ticker, {
+        "company_name": company_name,
+        "industry": industry,
+        "market": market_info["market"],
+        "currency": market_info["currency_name"],
+    })
+
+
+def build_symbol_context(ticker: str) -> Dict[str, Any]:
+    """
+    构建一次分析运行使用的代码上下文
+
+    Returns:
+        Dict: {"ticker", "company_name", "industry", "market_info"}
+    """
+    market_info = StockUtils.get_market_info(ticker)
+    cache = get_symbol_metadata_cache()
+
+    cached = cache.get(ticker)
+    if cached:
+        logger.debug(f"📊 [代码上下文] 命中元数据缓存: {ticker} -> {cached.get('company_name')}")
+        resolved = {"company_name": cached.get("company_name"), "industry": cached.get("industry")}
+    else:
+        resolved = resolve_company_name(ticker, market_info)
+        if not _is_placeholder_name(resolved["company_name"], ticker):
+            cache.set(ticker, {
+                "company_name": resolved["company_name"],
+                "industry": resolved["industry"],
+                "market": market_info["market"],
+                "currency": market_info["currency_name"],
+            })
+
+    logger.info(f"📊 [代码上下文] {ticker} -> {resolved['company_name']} ({market_info['market_name']})")
+    return {
+        "ticker": ticker,
+        "company_name": resolved["company_name"],
+        "industry": resolved["industry"],
+        "market_info": market_info,
+    }
+
+
+def get_symbol_context(state: Dict[str, Any]) -> Dict[str, Any]:
+    """从图状态中读取代码上下文；状态中没有时（如单独调用节点）即时构建"""
+    ticker = state["company_of_interest"]
+    context = state.get("symbol_context")
+    if context and context.get("ticker") == ticker:
+        return context
+    return build_symbol_context(ticker)
@@ -1,16 +1,26 @@
 """股票分析HTTP API服务"""
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import uuid
 from datetime import date
-from .utils.analysis_runner import run_stock_analysis
+from .utils.job_queue import JobQueue, JobWorkerPool, QueueFullError, COMPLETED, FAILED
+from .utils.async_progress_tracker import get_progress_by_id
+from .utils.progress_push import ProgressHub, TERMINAL_STATUSES, is_terminal
+from .utils.result_store import get_result_store
 import asyncio
-import time
+import json
 
 app = FastAPI(title="TradingAgents 股票分析API")
 
-# 存储分析任务状态
-analysis_tasks = {}
+# 持久化任务队列；工作进程数为0时只接收任务，由独立的工作进程（python -m web.utils.job_queue）执行
+job_queue = JobQueue()
+worker_pool = None
+# 同一分析的进度推送连接共享一个事件读取任务
+progress_hub = ProgressHub()
+
+def _sse(event: str, data, event_id: str = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 # 请求模型定义
 class AnalysisRequest(BaseModel):
@@ -21,65 +31,129 @@ class AnalysisRequest(BaseModel):
     analysts: list[str] = ["market", "fundamentals"]
     llm_provider: str = "dashscope"
     llm_model: str = "qwen-plus-latest"
+    priority: int = 0
+
+# 服务启动时启动分析工作进程（新闻过滤模型在工作进程中预加载）
+@app.on_event("startup")
+async def start_workers():
+    global worker_pool
+    await asyncio.to_thread(job_queue.maintain)
+    worker_pool = JobWorkerPool(job_queue)
+    worker_pool.start()
 
-# 进度回调函数
-def progress_callback(task_id, message, step=None, total_steps=None):
-    """更新任务进度"""
-    if task_id in analysis_tasks:
-        analysis_tasks[task_id]["status"] = "running"
-        analysis_tasks[task_id]["progress"] = {
-            "message": message,
-            "step": step,
-            "total_steps": total_steps
-        }
+@app.on_event("shutdown")
+async def stop_workers():
+    if worker_pool is not None:
+        worker_pool.stop()
+
+# 任务队列和结果存储使用同步的SQLite调用（写事务可能等待锁），均在线程中执行，不阻塞事件循环
 
 # 启动分析任务
 @app.post("/api/analyze")
-async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
-    analysis_tasks[task_id] = {
-        "status": "pending",
-        "result": None,
-        "progress": None,
-        "request": request.dict()
-    }
-    
-    # 定义后台任务
-    def run_analysis_task():
-        try:
-            # 包装进度回调
-            def callback(message, step=None, total_steps=None):
-                progress_callback(task_id, message, step, total_steps)
-            analysis_date_str = request.analysis_date.strftime("%Y-%m-%d") 
-            # 调用分析函数
-            result = run_stock_analysis(
-                stock_symbol=request.stock_symbol,
-                analysis_date=analysis_date_str,
-                analysts=request.analysts,
-                research_depth=request.research_depth,
-                llm_provider=request.llm_provider,
-                llm_model=request.llm_model,
-                market_type=request.market_type,
-                progress_callback=callback
-            )
-            
-            analysis_tasks[task_id]["status"] = "completed"
-            analysis_tasks[task_id]["result"] = result
-        except Exception as e:
-            analysis_tasks[task_id]["status"] = "failed"
-            analysis_tasks[task_id]["error"] = str(e)
-    
-    background_tasks.add_task(run_analysis_task)
-    return {"task_id": task_id, "status": "started"}
+async def start_analysis(request: AnalysisRequest):
+    task_request = request.dict()
+    priority = task_request.pop("priority")
+    try:
+        task_id, deduplicated = await asyncio.to_thread(job_queue.submit, task_request, priority=priority)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"任务队列已满，请稍后重试: {e}")
+    return {"task_id": task_id, "status": "started", "deduplicated": deduplicated}
 
 # 查询任务状态
 @app.get("/api/analysis/{task_id}")
 async def get_analysis_status(task_id: str):
-    if task_id not in analysis_tasks:
+    task = await asyncio.to_thread(job_queue.get, task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
-    return analysis_tasks[task_id]
+    return task
+
+# 以SSE推送任务状态变化，任务结束后关闭连接
+@app.get("/api/analysis/{task_id}/events")
+async def stream_analysis_status(task_id: str, poll_interval: float = 1.0):
+    if await asyncio.to_thread(job_queue.get_status, task_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def events():
+        last = None
+        while True:
+            current = await asyncio.to_thread(job_queue.get_status, task_id)
+            if current is None:
+                yield f"event: error\ndata: {json.dumps({'detail': '任务不存在'}, ensure_ascii=False)}\n\n"
+                return
+            if current != last:
+                last = current
+                status, progress = current
+                payload = {"status": status, "progress": json.loads(progress) if progress else None}
+                yield f"event: status\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                if status in (COMPLETED, FAILED):
+                    return
+            await asyncio.sleep(max(0.2, poll_interval))
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# 以SSE推送Web界面分析的进度：先发送完整快照，之后只推送增量事件；断线重连时按Last-Event-ID续传
+@app.get("/api/progress/{analysis_id}/events")
+async def stream_progress(analysis_id: str, request: Request, cursor: str = None):
+    cursor = cursor or request.headers.get("last-event-id")
+    snapshot = None
+    if cursor is None:
+        snapshot = await asyncio.to_thread(get_progress_by_id, analysis_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="分析不存在")
+        # 分析结果和步骤列表不用于进度显示，不随快照推送
+        snapshot.pop("raw_results", None)
+        snapshot.pop("steps", None)
+        cursor = snapshot.get("event_cursor")
+
+    async def events():
+        if snapshot is not None:
+            yield _sse("snapshot", snapshot, cursor)
+            if snapshot.get("status") in TERMINAL_STATUSES:
+                yield _sse("end", {"status": snapshot.get("status")})
+                return
+        async for batch, batch_cursor in progress_hub.subscribe(analysis_id, cursor):
+            if not batch:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse("progress", {"events": batch}, batch_cursor)
+            if is_terminal(batch):
+                status = next(e["delta"]["status"] for e in reversed(batch) if "status" in e.get("delta", {}))
+                yield _sse("end", {"status": status})
+                return
+
+    # 进度组件由Streamlit页面加载，与API不同源
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                                      "Access-Control-Allow-Origin": "*"})
+
+# 按股票代码和/或日期查询已保存的分析结果
+@app.get("/api/results")
+async def list_results(symbol: str = None, date: str = None, limit: int = 20):
+    return {"results": await asyncio.to_thread(get_result_store().find, symbol, date, min(max(limit, 1), 200))}
+
+# 分析结果摘要（决策、配置和可加载的章节列表）
+@app.get("/api/results/{analysis_id}")
+async def get_result_summary(analysis_id: str):
+    summary = await asyncio.to_thread(get_result_store().get_summary, analysis_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="分析结果不存在")
+    return summary
+
+# 单个报告章节
+@app.get("/api/results/{analysis_id}/sections/{name}")
+async def get_result_section(analysis_id: str, name: str):
+    content = await asyncio.to_thread(get_result_store().get_section, analysis_id, name)
+    if content is None:
+        raise HTTPException(status_code=404, detail="报告章节不存在")
+    return {"analysis_id": analysis_id, "name": name, "content": content}
+
+# 队列概况
+@app.get("/api/queue")
+async def get_queue_stats():
+    return {"jobs": await asyncio.to_thread(job_queue.stats), "workers": worker_pool.workers if worker_pool else 0}
 
 # 运行API服务
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
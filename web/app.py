@@ -34,7 +34,8 @@ from components.header import render_header
 from components.analysis_form import render_analysis_form
 from components.results_display import render_results
 from utils.api_checker import check_api_keys
-from utils.analysis_runner import run_stock_analysis, validate_analysis_params, format_analysis_results
+from utils.analysis_runner import (run_stock_analysis, validate_analysis_params, format_analysis_results,
+                                   get_retry_analysis_id, record_analysis_outcome)
 from utils.progress_tracker import SmartStreamlitProgressDisplay, create_smart_progress_callback
 from utils.async_progress_tracker import AsyncProgressTracker
 from components.async_progress_display import display_unified_progress
@@ -265,18 +266,17 @@ def initialize_session_state():
     if not st.session_state.analysis_results:
         try:
             from utils.async_progress_tracker import get_latest_analysis_id, get_progress_by_id
-            from utils.analysis_runner import format_analysis_results
+            from utils.result_store import restore_analysis_results
 
             latest_id = get_latest_analysis_id()
             if latest_id:
                 progress_data = get_progress_by_id(latest_id)
                 if (progress_data and
                     progress_data.get('status') == 'completed' and
-                    'raw_results' in progress_data):
+                    (progress_data.get('results_stored') or 'raw_results' in progress_data)):
 
-                    # 恢复分析结果
-                    raw_results = progress_data['raw_results']
-                    formatted_results = format_analysis_results(raw_results)
+                    # 恢复分析结果（结果存储中只加载摘要，报告章节在查看时加载）
+                    formatted_results = restore_analysis_results(latest_id, progress_data)
 
                     if formatted_results:
                         st.session_state.analysis_results = formatted_results
@@ -285,10 +285,10 @@ def initialize_session_state():
                         analysis_status = progress_data.get('status', 'completed')
                         st.session_state.analysis_running = (analysis_status == 'running')
                         # 恢复股票信息
-                        if 'stock_symbol' in raw_results:
-                            st.session_state.last_stock_symbol = raw_results.get('stock_symbol', '')
-                        if 'market_type' in raw_results:
-                            st.session_state.last_market_type = raw_results.get('market_type', '')
+                        if 'stock_symbol' in formatted_results:
+                            st.session_state.last_stock_symbol = formatted_results.get('stock_symbol', '')
+                        if 'market_type' in formatted_results:
+                            st.session_state.last_market_type = formatted_results.get('market_type', '')
                         logger.info(f"📊 [结果恢复] 从分析 {latest_id} 恢复结果，状态: {analysis_status}")
 
         except Exception as e:
@@ -1170,8 +1170,21 @@ def main():
                 st.session_state.analysis_results = None
                 logger.info("🧹 [新分析] 清空旧的分析结果")
 
-                # 生成分析ID
-                analysis_id = f"analysis_{uuid.uuid4().hex[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                # 生成分析ID；与上一次失败的分析参数相同时沿用其ID，启用检查点时从断点继续
+                analysis_request = {
+                    'stock_symbol': form_data['stock_symbol'],
+                    'market_type': form_data.get('market_type', '美股'),
+                    'analysis_date': form_data['analysis_date'],
+                    'analysts': form_data['analysts'],
+                    'research_depth': form_data['research_depth'],
+                    'llm_provider': config['llm_provider'],
+                    'llm_model': config['llm_model'],
+                }
+                analysis_id = get_retry_analysis_id(analysis_request)
+                if analysis_id:
+                    logger.info(f"💾 [分析重试] 沿用失败分析的ID，从检查点继续: {analysis_id}")
+                else:
+                    analysis_id = f"analysis_{uuid.uuid4().hex[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
                 # 保存分析ID和表单配置到session state和cookie
                 form_config = st.session_state.get('form_config', {})
@@ -1242,17 +1255,21 @@ def main():
                             llm_provider=config['llm_provider'],
                             market_type=form_data.get('market_type', '美股'),
                             llm_model=config['llm_model'],
-                            progress_callback=progress_callback
+                            progress_callback=progress_callback,
+                            stream_callback=async_tracker.update_stream_output,
+                            analysis_id=analysis_id
                         )
 
                         # 标记分析完成并保存结果（不访问session state）
                         async_tracker.mark_completed("✅ 分析成功完成！", results=results)
+                        record_analysis_outcome(analysis_request, analysis_id, success=bool(results and results.get('success')))
 
                         logger.info(f"✅ [分析完成] 股票分析成功完成: {analysis_id}")
 
                     except Exception as e:
                         # 标记分析失败（不访问session state）
                         async_tracker.mark_failed(str(e))
+                        record_analysis_outcome(analysis_request, analysis_id, success=False)
                         logger.error(f"❌ [分析失败] {analysis_id}: {e}")
 
                     finally:
@@ -1328,11 +1345,10 @@ def main():
 
             # 如果分析刚完成，尝试恢复结果
             if is_completed and not st.session_state.get('analysis_results') and progress_data:
-                if 'raw_results' in progress_data:
+                if progress_data.get('results_stored') or 'raw_results' in progress_data:
                     try:
-                        from utils.analysis_runner import format_analysis_results
-                        raw_results = progress_data['raw_results']
-                        formatted_results = format_analysis_results(raw_results)
+                        from utils.result_store import restore_analysis_results
+                        formatted_results = restore_analysis_results(current_analysis_id, progress_data)
                         if formatted_results:
                             st.session_state.analysis_results = formatted_results
                             st.session_state.analysis_running = False
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
 异步进度显示组件
-支持定时刷新，从Redis或文件获取进度状态
+支持定时刷新，从Redis或文件获取进度状态；
+配置了 PROGRESS_PUSH_URL 时，运行中的进度由浏览器通过 API 服务的 SSE 通道接收增量事件更新
 """
 
+import json
+import os
 import streamlit as st
 import time
 from typing import Optional, Dict, Any
@@ -13,6 +16,99 @@ from web.utils.async_progress_tracker import get_progress_by_id, format_time
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_display')
 
+# 推送模式下页面自动刷新的间隔（秒），只用于发现分析结束并加载结果
+PUSH_REFRESH_INTERVAL = 15
+
+_PUSH_COMPONENT_TEMPLATE = """
+<div id="progress-push" style="font-family: 'Source Sans Pro', sans-serif; font-size: 14px; color: #31333F;">
+  <div><b>当前步骤</b>: <span id="step-name"></span></div>
+  <div style="display: flex; gap: 32px; margin: 8px 0;">
+    <div>进度 <b id="percentage"></b></div>
+    <div>已用时间 <b id="elapsed"></b></div>
+    <div>预计剩余 <b id="remaining"></b></div>
+  </div>
+  <div style="background: #f0f2f6; border-radius: 4px; height: 8px;">
+    <div id="bar" style="background: #ff4b4b; border-radius: 4px; height: 8px; width: 0;"></div>
+  </div>
+  <div style="margin-top: 8px;"><b>当前任务</b>: <span id="description"></span></div>
+  <div id="message" style="margin-top: 8px; padding: 8px 12px; background: #e8f0fe; border-radius: 4px;"></div>
+  <pre id="stream" style="display: none; max-height: 140px; overflow: auto; white-space: pre-wrap;
+       background: #fafafa; padding: 8px; border-radius: 4px; font-size: 12px;"></pre>
+</div>
+<script>
+const state = __STATE__;
+const url = __URL__;
+function formatTime(seconds) {
+  if (seconds < 60) return seconds.toFixed(1) + "秒";
+  if (seconds < 3600) return (seconds / 60).toFixed(1) + "分钟";
+  return (seconds / 3600).toFixed(1) + "小时";
+}
+function render() {
+  const pct = Math.min(state.progress_percentage || 0, 100);
+  const elapsed = state.start_time ? Date.now() / 1000 - state.start_time : (state.elapsed_time || 0);
+  const finished = state.status === "completed" || state.status === "failed";
+  document.getElementById("step-name").textContent = state.current_step_name || "";
+  document.getElementById("percentage").textContent = pct.toFixed(1) + "%";
+  document.getElementById("elapsed").textContent = formatTime(finished ? (state.elapsed_time || 0) : elapsed);
+  document.getElementById("remaining").textContent = finished ? "已完成" :
+      formatTime(Math.max((state.estimated_total_time || 0) - elapsed, 0));
+  document.getElementById("bar").style.width = pct + "%";
+  document.getElementById("description").textContent = state.current_step_description || "";
+  let message = "🔄 " + (state.last_message || "");
+  if (state.status === "completed") message = "✅ 分析完成，点击“刷新进度”查看报告";
+  if (state.status === "failed") message = "❌ " + (state.last_message || "分析失败");
+  document.getElementById("message").textContent = message;
+  const stream = document.getElementById("stream");
+  const output = state.streaming_output;
+  if (output && output.text && !finished) {
+    stream.style.display = "block";
+    stream.textContent = "✍️ " + output.node + " 正在生成 (" + output.length + " 字)\n" + output.text;
+    stream.scrollTop = stream.scrollHeight;
+  } else {
+    stream.style.display = "none";
+  }
+}
+render();
+const source = new EventSource(url);
+source.addEventListener("snapshot", (e) => { Object.assign(state, JSON.parse(e.data)); render(); });
+source.addEventListener("progress", (e) => {
+  for (const event of JSON.parse(e.data).events) Object.assign(state, event.delta || {});
+  render();
+});
+source.addEventListener("end", () => source.close());
+setInterval(render, 1000);
+</script>
+"""
+
+
+def get_progress_push_url() -> Optional[str]:
+    """进度推送服务地址（API服务的地址），未配置时返回 None"""
+    url = os.getenv('PROGRESS_PUSH_URL', '').strip()
+    return url.rstrip('/') or None
+
+
+def render_progress_push(analysis_id: str, progress_data: Dict[str, Any], push_url: str, height: int = 320):
+    """
+    渲染由SSE推送更新的进度组件
+    组件以当前进度为初始状态，从快照对应的游标开始只接收增量事件，不触发页面重新运行
+    """
+    import streamlit.components.v1 as components
+    from urllib.parse import quote
+
+    state = {key: value for key, value in progress_data.items() if key not in ('raw_results', 'steps')}
+    url = f"{push_url}/api/progress/{quote(analysis_id)}/events"
+    cursor = progress_data.get('event_cursor')
+    if cursor:
+        url += f"?cursor={quote(str(cursor))}"
+
+    def to_js(value) -> str:
+        # 避免内容中的 </script> 提前结束脚本
+        return json.dumps(value, ensure_ascii=False).replace("</", "<\\/")
+
+    html = _PUSH_COMPONENT_TEMPLATE.replace("__STATE__", to_js(state)).replace("__URL__", to_js(url))
+    components.html(html, height=height, scrolling=False)
+
+
 class AsyncProgressDisplay:
     """异步进度显示组件"""
     
@@ -100,13 +196,11 @@ class AsyncProgressDisplay:
                         # 尝试恢复分析结果（如果还没有的话）
                         if not st.session_state.get('analysis_results'):
                             try:
-                                from web.utils.analysis_runner import format_analysis_results
-                                raw_results = progress_data.get('raw_results')
-                                if raw_results:
-                                    formatted_results = format_analysis_results(raw_results)
-                                    if formatted_results:
-                                        st.session_state.analysis_results = formatted_results
-                                        st.session_state.analysis_running = False
+                                from web.utils.result_store import restore_analysis_results
+                                formatted_results = restore_analysis_results(analysis_id, progress_data)
+                                if formatted_results:
+                                    st.session_state.analysis_results = formatted_results
+                                    st.session_state.analysis_running = False
                             except Exception as e:
                                 st.error(f"恢复分析结果失败: {e}")
 
@@ -236,13 +330,11 @@ def streamlit_auto_refresh_progress(analysis_id: str, refresh_interval: int = 2)
             # 尝试恢复分析结果（如果还没有的话）
             if not st.session_state.get('analysis_results'):
                 try:
-                    from web.utils.analysis_runner import format_analysis_results
-                    raw_results = progress_data.get('raw_results')
-                    if raw_results:
-                        formatted_results = format_analysis_results(raw_results)
-                        if formatted_results:
-                            st.session_state.analysis_results = formatted_results
-                            st.session_state.analysis_running = False
+                    from web.utils.result_store import restore_analysis_results
+                    formatted_results = restore_analysis_results(analysis_id, progress_data)
+                    if formatted_results:
+                        st.session_state.analysis_results = formatted_results
+                        st.session_state.analysis_running = False
                 except Exception as e:
                     st.error(f"恢复分析结果失败: {e}")
 
@@ -254,6 +346,7 @@ def streamlit_auto_refresh_progress(analysis_id: str, refresh_interval: int = 2)
         st.info(f"📊 **进度**: 第 {current_step + 1} 步，共 {total_steps} 步 ({progress_percentage:.1f}%)\n\n"
                f"**当前步骤**: {step_name}\n\n"
                f"**步骤说明**: {step_description}")
+        render_streaming_output(progress_data)
 
     # 时间信息 - 实时计算已用时间
     start_time = progress_data.get('start_time', 0)
@@ -303,6 +396,16 @@ def streamlit_auto_refresh_progress(analysis_id: str, refresh_interval: int = 2)
     return status in ['completed', 'failed']
 
 # 新增：静态进度显示（不会触发页面刷新）
+def render_streaming_output(progress_data: Dict[str, Any]):
+    """显示当前节点正在生成的报告内容"""
+    streaming_output = progress_data.get('streaming_output')
+    if not streaming_output or progress_data.get('status') != 'running':
+        return
+
+    node = streaming_output.get('node', '')
+    with st.expander(f"✍️ {node} 正在生成 ({streaming_output.get('length', 0)} 字)", expanded=True):
+        st.markdown(streaming_output.get('text', ''))
+
 def display_static_progress(analysis_id: str) -> bool:
     """
     显示静态进度（不自动刷新）
@@ -394,14 +497,11 @@ def display_static_progress(analysis_id: str) -> bool:
             # 尝试恢复分析结果（如果还没有的话）
             if not st.session_state.get('analysis_results'):
                 try:
-                    from web.utils.async_progress_tracker import get_progress_by_id
-                    from web.utils.analysis_runner import format_analysis_results
-                    progress_data = get_progress_by_id(analysis_id)
-                    if progress_data and progress_data.get('raw_results'):
-                        formatted_results = format_analysis_results(progress_data['raw_results'])
-                        if formatted_results:
-                            st.session_state.analysis_results = formatted_results
-                            st.session_state.analysis_running = False
+                    from web.utils.result_store import restore_analysis_results
+                    formatted_results = restore_analysis_results(analysis_id)
+                    if formatted_results:
+                        st.session_state.analysis_results = formatted_results
+                        st.session_state.analysis_running = False
                 except Exception as e:
                     st.error(f"恢复分析结果失败: {e}")
 
@@ -411,6 +511,7 @@ def display_static_progress(analysis_id: str) -> bool:
             st.rerun()
     else:
         st.info(f"{status_icon} **当前状态**: {last_message}")
+        render_streaming_output(progress_data)
 
         # 添加刷新控制（仅在运行时显示）
         if status == 'running':
@@ -489,7 +590,6 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
                 default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
                 auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
                 if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                    import time
                     time.sleep(3)  # 等待3秒
                     st.rerun()
                 elif auto_refresh and status in ['completed', 'failed']:
@@ -500,6 +600,24 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
 
     # 解析进度数据（修复字段名称匹配）
     status = progress_data.get('status', 'running')
+
+    # 推送模式：进度由浏览器接收事件更新，页面只需低频刷新以发现分析结束
+    push_url = get_progress_push_url()
+    if push_url and status == 'running':
+        render_progress_push(analysis_id, progress_data, push_url)
+        if show_refresh_controls:
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                if st.button("🔄 刷新进度", key=f"refresh_unified_{analysis_id}"):
+                    st.rerun()
+            with col2:
+                auto_refresh_key = f"auto_refresh_unified_{analysis_id}"
+                default_value = st.session_state.get(auto_refresh_key, True)
+                if st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key):
+                    time.sleep(PUSH_REFRESH_INTERVAL)
+                    st.rerun()
+        return False
+
     current_step = progress_data.get('current_step', 0)
     current_step_name = progress_data.get('current_step_name', '准备阶段')
     progress_percentage = progress_data.get('progress_percentage', 0.0)
@@ -507,7 +625,6 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     # 计算已用时间
     start_time = progress_data.get('start_time', 0)
     estimated_total_time = progress_data.get('estimated_total_time', 0)
-    import time
     if status == 'completed':
         # 已完成的分析使用存储的最终耗时
         elapsed_time = progress_data.get('elapsed_time', 0)
@@ -564,14 +681,11 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
             # 尝试恢复分析结果（如果还没有的话）
             if not st.session_state.get('analysis_results'):
                 try:
-                    from web.utils.async_progress_tracker import get_progress_by_id
-                    from web.utils.analysis_runner import format_analysis_results
-                    progress_data = get_progress_by_id(analysis_id)
-                    if progress_data and progress_data.get('raw_results'):
-                        formatted_results = format_analysis_results(progress_data['raw_results'])
-                        if formatted_results:
-                            st.session_state.analysis_results = formatted_results
-                            st.session_state.analysis_running = False
+                    from web.utils.result_store import restore_analysis_results
+                    formatted_results = restore_analysis_results(analysis_id)
+                    if formatted_results:
+                        st.session_state.analysis_results = formatted_results
+                        st.session_state.analysis_running = False
                 except Exception as e:
                     st.error(f"恢复分析结果失败: {e}")
 
@@ -598,7 +712,6 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
             default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
             auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
             if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                import time
                 time.sleep(3)  # 等待3秒
                 st.rerun()
             elif auto_refresh and status in ['completed', 'failed']:
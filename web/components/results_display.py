@@ -10,11 +10,89 @@ from datetime import datetime
 
 # 导入导出功能
 from utils.report_exporter import render_export_buttons
+from utils.result_store import get_result_store, is_lazy_results
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('web')
 
+# 定义分析模块 - 包含完整的团队决策报告，与CLI端保持一致
+ANALYSIS_MODULES = [
+    {
+        'key': 'market_report',
+        'title': '📈 市场技术分析',
+        'icon': '📈',
+        'description': '技术指标、价格趋势、支撑阻力位分析'
+    },{
+         'key': 'trend_report',
+        'title': '📈 今天大盘分析分析',
+        'icon': '📈',
+        'description': '大盘情况分析'
+    },
+    {
+        'key': 'fundamentals_report',
+        'title': '💰 基本面分析',
+        'icon': '💰',
+        'description': '财务数据、估值水平、盈利能力分析'
+    },
+    {
+        'key': 'concept_report',
+        'title': '💭 热点概念分析',
+        'icon': '💭',
+        'description': '当前热门概念指标'
+    },
+    {
+        'key': 'sentiment_report',
+        'title': '💭 市场情绪分析',
+        'icon': '💭',
+        'description': '投资者情绪、社交媒体情绪指标'
+    },
+    {
+        'key': 'news_report',
+        'title': '📰 新闻事件分析',
+        'icon': '📰',
+        'description': '相关新闻事件、市场动态影响分析'
+    },
+    {
+        'key': 'risk_assessment',
+        'title': '⚠️ 风险评估',
+        'icon': '⚠️',
+        'description': '风险因素识别、风险等级评估'
+    },
+    {
+        'key': 'investment_plan',
+        'title': '📋 投资建议',
+        'icon': '📋',
+        'description': '具体投资策略、仓位管理建议'
+    },
+    # 添加团队决策报告模块
+    {
+        'key': 'investment_debate_state',
+        'title': '🔬 研究团队决策',
+        'icon': '🔬',
+        'description': '多头/空头研究员辩论分析，研究经理综合决策'
+    },
+    {
+        'key': 'trader_investment_plan',
+        'title': '💼 交易团队计划',
+        'icon': '💼',
+        'description': '专业交易员制定的具体交易执行计划'
+    },
+    {
+        'key': 'risk_debate_state',
+        'title': '⚖️ 风险管理团队',
+        'icon': '⚖️',
+        'description': '激进/保守/中性分析师风险评估，投资组合经理最终决策'
+    },
+    {
+        'key': 'final_trade_decision',
+        'title': '🎯 最终交易决策',
+        'icon': '🎯',
+        'description': '综合所有团队分析后的最终投资决策'
+    }
+]
+
+
 def render_results(results):
     """渲染分析结果"""
 
@@ -65,8 +143,11 @@ def render_results(results):
     # 分析配置信息
     render_analysis_info(results)
 
-    # 详细分析报告
-    render_detailed_analysis(state)
+    # 详细分析报告：结果存储中的分析只加载正在查看的章节
+    if is_lazy_results(results):
+        render_lazy_detailed_analysis(results)
+    else:
+        render_detailed_analysis(state)
 
     # 风险提示
     render_risk_warning()
@@ -358,85 +439,9 @@ def render_detailed_analysis(state):
                 st.write(f"- `{key}`: {type(value).__name__} - {str(value)[:100]}")
         st.markdown("---")
     
-    # 定义分析模块 - 包含完整的团队决策报告，与CLI端保持一致
-    analysis_modules = [
-        {
-            'key': 'market_report',
-            'title': '📈 市场技术分析',
-            'icon': '📈',
-            'description': '技术指标、价格趋势、支撑阻力位分析'
-        },{
-             'key': 'trend_report',
-            'title': '📈 今天大盘分析分析',
-            'icon': '📈',
-            'description': '大盘情况分析'
-        },
-        {
-            'key': 'fundamentals_report',
-            'title': '💰 基本面分析',
-            'icon': '💰',
-            'description': '财务数据、估值水平、盈利能力分析'
-        },
-        {
-            'key': 'concept_report',
-            'title': '💭 热点概念分析',
-            'icon': '💭',
-            'description': '当前热门概念指标'
-        },
-        {
-            'key': 'sentiment_report',
-            'title': '💭 市场情绪分析',
-            'icon': '💭',
-            'description': '投资者情绪、社交媒体情绪指标'
-        },
-        {
-            'key': 'news_report',
-            'title': '📰 新闻事件分析',
-            'icon': '📰',
-            'description': '相关新闻事件、市场动态影响分析'
-        },
-        {
-            'key': 'risk_assessment',
-            'title': '⚠️ 风险评估',
-            'icon': '⚠️',
-            'description': '风险因素识别、风险等级评估'
-        },
-        {
-            'key': 'investment_plan',
-            'title': '📋 投资建议',
-            'icon': '📋',
-            'description': '具体投资策略、仓位管理建议'
-        },
-        # 添加团队决策报告模块
-        {
-            'key': 'investment_debate_state',
-            'title': '🔬 研究团队决策',
-            'icon': '🔬',
-            'description': '多头/空头研究员辩论分析，研究经理综合决策'
-        },
-        {
-            'key': 'trader_investment_plan',
-            'title': '💼 交易团队计划',
-            'icon': '💼',
-            'description': '专业交易员制定的具体交易执行计划'
-        },
-        {
-            'key': 'risk_debate_state',
-            'title': '⚖️ 风险管理团队',
-            'icon': '⚖️',
-            'description': '激进/保守/中性分析师风险评估，投资组合经理最终决策'
-        },
-        {
-            'key': 'final_trade_decision',
-            'title': '🎯 最终交易决策',
-            'icon': '🎯',
-            'description': '综合所有团队分析后的最终投资决策'
-        }
-    ]
-    
     # 过滤出有数据的模块
     available_modules = []
-    for module in analysis_modules:
+    for module in ANALYSIS_MODULES:
         if module['key'] in state and state[module['key']]:
             # 检查字典类型的数据是否有实际内容
             if isinstance(state[module['key']], dict):
@@ -458,28 +463,57 @@ def render_detailed_analysis(state):
 
     for i, (tab, module) in enumerate(zip(tabs, available_modules)):
         with tab:
-            # 在内容区域显示图标和描述
-            st.markdown(f"## {module['icon']} {module['title']}")
-            st.markdown(f"*{module['description']}*")
-            st.markdown("---")
-
-            # 格式化显示内容
-            content = state[module['key']]
-            if isinstance(content, str):
-                st.markdown(content)
-            elif isinstance(content, dict):
-                # 特殊处理团队决策报告的字典结构
-                if module['key'] == 'investment_debate_state':
-                    render_investment_debate_content(content)
-                elif module['key'] == 'risk_debate_state':
-                    render_risk_debate_content(content)
-                else:
-                    # 普通字典格式化显示
-                    for key, value in content.items():
-                        st.subheader(key.replace('_', ' ').title())
-                        st.write(value)
-            else:
-                st.write(content)
+            render_module_content(module, state[module['key']])
+
+
+def render_module_content(module, content):
+    """渲染单个分析模块的内容"""
+    # 在内容区域显示图标和描述
+    st.markdown(f"## {module['icon']} {module['title']}")
+    st.markdown(f"*{module['description']}*")
+    st.markdown("---")
+
+    # 格式化显示内容
+    if isinstance(content, str):
+        st.markdown(content)
+    elif isinstance(content, dict):
+        # 特殊处理团队决策报告的字典结构
+        if module['key'] == 'investment_debate_state':
+            render_investment_debate_content(content)
+        elif module['key'] == 'risk_debate_state':
+            render_risk_debate_content(content)
+        else:
+            # 普通字典格式化显示
+            for key, value in content.items():
+                st.subheader(key.replace('_', ' ').title())
+                st.write(value)
+    else:
+        st.write(content)
+
+
+def render_lazy_detailed_analysis(results):
+    """渲染结果存储中的分析报告：用章节选择代替标签页，只加载选中的章节"""
+
+    st.subheader("📋 详细分析报告")
+
+    analysis_id = results['analysis_id']
+    sections = set(results.get('sections', []))
+    available_modules = [module for module in ANALYSIS_MODULES if module['key'] in sections]
+
+    if not available_modules:
+        render_analysis_placeholder()
+        return
+
+    titles = [module['title'] for module in available_modules]
+    selected = st.radio("报告章节", titles, horizontal=True, key=f"report_section_{analysis_id}",
+                        label_visibility="collapsed")
+    module = available_modules[titles.index(selected)]
+
+    content = get_result_store().get_section(analysis_id, module['key'])
+    if content is None:
+        st.warning("⚠️ 该章节内容不存在或已被清理")
+        return
+    render_module_content(module, content)
 
 def render_investment_debate_content(content):
     """渲染研究团队决策内容"""
@@ -97,7 +97,49 @@ def extract_risk_assessment(state):
         logger.info(f"提取风险评估数据时出错: {e}")
         return None
 
-def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, market_type="美股", progress_callback=None):
+# 失败分析的重试记录：相同参数再次提交时沿用失败分析的ID，启用检查点时从断点继续；
+# 记录保存在本地文件中，Web服务重启后仍然有效
+RETRY_RECORD_DIR = "./data/analysis_retry"
+
+
+def _retry_record_key(request):
+    from .job_queue import request_dedup_key
+    return f"retry_{request_dedup_key(request)}"
+
+
+def get_retry_analysis_id(request):
+    """
+    相同参数（股票、市场、日期、分析师、深度、模型）的上一次分析失败时返回其分析ID；
+    未启用检查点时沿用ID没有意义，返回 None
+    """
+    from tradingagents.default_config import DEFAULT_CONFIG
+    if not DEFAULT_CONFIG.get("checkpoint_enabled"):
+        return None
+    try:
+        from .session_store import get_file_session_store
+        record = get_file_session_store(RETRY_RECORD_DIR).get(_retry_record_key(request))
+        return record.get("analysis_id") if record else None
+    except Exception as e:
+        logger.warning(f"⚠️ [分析重试] 读取重试记录失败: {e}")
+        return None
+
+
+def record_analysis_outcome(request, analysis_id, success):
+    """分析失败时记录分析ID供重试沿用，成功后删除记录"""
+    try:
+        import time
+        from .session_store import get_file_session_store
+        store = get_file_session_store(RETRY_RECORD_DIR)
+        key = _retry_record_key(request)
+        if success:
+            store.delete(key)
+        else:
+            store.put(key, {"analysis_id": analysis_id, "timestamp": time.time()})
+    except Exception as e:
+        logger.warning(f"⚠️ [分析重试] 保存重试记录失败: {e}")
+
+
+def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, llm_provider, llm_model, market_type="美股", progress_callback=None, stream_callback=None, analysis_id=None):
     """执行股票分析
 
     Args:
@@ -108,6 +150,8 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         llm_provider: LLM提供商 (dashscope/deepseek/google)
         llm_model: 大模型名称
         progress_callback: 进度回调函数，用于更新UI状态
+        stream_callback: 流式输出回调函数 (node, section, text)，用于实时显示节点生成的报告
+        analysis_id: 分析ID，启用检查点时用于断点续跑
     """
 
     def update_progress(message, step=None, total_steps=None):
@@ -218,6 +262,8 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
     try:
         # 导入必要的模块
         from tradingagents.graph.trading_graph import TradingAgentsGraph
+        from tradingagents.graph.engine_pool import get_engine_pool
+        from tradingagents.graph.streaming import ThrottledStreamHandler
         from tradingagents.default_config import DEFAULT_CONFIG
 
         # 创建配置
@@ -432,9 +478,13 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
 
         logger.debug(f"🔍 [RUNNER DEBUG] 最终传递给分析引擎的股票代码: '{formatted_symbol}'")
 
-        # 初始化交易图
+        # 初始化交易图：从引擎池借出相同配置的已构建实例，没有时新建
         update_progress("🔧 初始化分析引擎...")
-        graph = TradingAgentsGraph(analysts, config=config, debug=False)
+        engine_pool = get_engine_pool() if config.get("engine_pool_enabled", True) else None
+        if engine_pool is not None:
+            graph = engine_pool.acquire(analysts, config, debug=False)
+        else:
+            graph = TradingAgentsGraph(analysts, config=config, debug=False)
 
         # 执行分析
         update_progress(f"📊 开始分析 {formatted_symbol} 股票，这可能需要几分钟时间...")
@@ -443,7 +493,28 @@ def run_stock_analysis(stock_symbol, analysis_date, analysts, research_depth, ll
         logger.debug(f"🔍 [RUNNER DEBUG]   symbol: '{formatted_symbol}'")
         logger.debug(f"🔍 [RUNNER DEBUG]   date: '{analysis_date}'")
 
-        state, decision = graph.propagate(formatted_symbol, analysis_date)
+        # 订阅流式token输出，节流后推送到进度跟踪
+        unsubscribe_stream = None
+        stream_handler = None
+        if stream_callback:
+            stream_handler = ThrottledStreamHandler(
+                lambda event: stream_callback(event.node, event.section, event.text),
+                interval=1.0
+            )
+            unsubscribe_stream = graph.event_bus.subscribe(stream_handler)
+
+        # 绑定数据预获取阶段的运行数据上下文，分析师工具直接复用已获取的行情和基本信息
+        from tradingagents.dataflows.run_data_context import use_run_data_context
+
+        try:
+            with use_run_data_context(preparation_result.data_context):
+                state, decision = graph.propagate(formatted_symbol, analysis_date, analysis_id=analysis_id)
+        finally:
+            if unsubscribe_stream:
+                unsubscribe_stream()
+                stream_handler.flush()
+            if engine_pool is not None:
+                engine_pool.release(graph)
 
         # 调试信息
         logger.debug(f"🔍 [DEBUG] 分析完成，decision类型: {type(decision)}")
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 """
 异步进度跟踪器
-支持Redis和文件两种存储方式，前端定时轮询获取进度
+支持Redis和文件两种存储方式：每次更新追加一条增量事件，完整快照按节流频率写入，
+前端可定时读取快照，也可按游标只拉取新事件
 """
 
 import json
+import re
 import time
 import os
 from typing import Dict, Any, Optional, List
@@ -12,10 +14,29 @@ from datetime import datetime
 import threading
 from pathlib import Path
 
+from .progress_events import (
+    PROGRESS_TTL_SECONDS, START_CURSOR, apply_progress_events,
+    get_progress_redis_client, open_event_log, read_progress_events
+)
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_progress')
 
+# 只写入快照、不进入增量事件的字段（步骤列表不变，分析结果体积大）
+SNAPSHOT_ONLY_FIELDS = ('steps', 'raw_results')
+
+# 可能触发步骤检测的关键词，不含任何关键词的消息直接跳过逐条判断
+_STEP_HINT_PATTERN = re.compile(
+    '|'.join(re.escape(word) for word in (
+        "开始股票分析", "验证", "预获取", "数据准备", "环境", "api", "密钥", "成本", "预估",
+        "配置", "参数", "初始化", "引擎", "模块开始", "工具调用", "模块完成",
+    )),
+    re.IGNORECASE
+)
+
+_MISSING = object()
+
 def safe_serialize(obj):
     """安全序列化对象，处理不可序列化的类型"""
     if hasattr(obj, 'dict'):
@@ -45,6 +66,11 @@ def safe_serialize(obj):
 
 class AsyncProgressTracker:
     """异步进度跟踪器"""
+
+    # 流式输出预览保留的最大字符数
+    STREAM_PREVIEW_CHARS = 2000
+    # 完整快照的最小写入间隔（秒），状态或步骤变化时立即写入
+    SNAPSHOT_INTERVAL = 2.0
     
     def __init__(self, analysis_id: str, analysts: List[str], research_depth: int, llm_provider: str):
         self.analysis_id = analysis_id
@@ -84,16 +110,29 @@ class AsyncProgressTracker:
             # 使用文件存储
             self.progress_file = f"./data/progress_{analysis_id}.json"
             os.makedirs(os.path.dirname(self.progress_file), exist_ok=True)
+
+        # 增量事件流：记录已发出的字段值，每次只追加变化的部分
+        self.event_log = open_event_log(analysis_id, self.redis_client if self.use_redis else None)
+        # 重试失败的分析时沿用原分析ID，清除上一次运行的事件，序号从头开始
+        try:
+            self.event_log.clear()
+        except Exception as e:
+            logger.debug(f"📊 [进度事件] 清除旧事件失败: {e}")
+        self._save_lock = threading.RLock()
+        self._emitted: Dict[str, Any] = {}
+        self._event_seq = 0
+        self._event_cursor = START_CURSOR
+        self._last_snapshot_time = 0.0
+        self._step_keyword_cache: Dict[tuple, Optional[int]] = {}
         
         # 保存初始状态
-        self._save_progress()
+        self._save_progress(force=True)
         
         logger.info(f"📊 [异步进度] 初始化完成: {analysis_id}, 存储方式: {'Redis' if self.use_redis else '文件'}")
 
         # 注册到日志系统进行自动进度更新
         try:
             from .progress_log_handler import register_analysis_tracker
-            import threading
 
             # 使用超时机制避免死锁
             def register_with_timeout():
@@ -360,8 +399,29 @@ class AsyncProgressTracker:
         logger.info(f"📊 [进度更新] {self.analysis_id}: {message[:50]}...")
         logger.debug(f"📊 [进度详情] 步骤{self.current_step + 1}/{len(self.analysis_steps)} ({step_name}), 进度{progress_percentage:.1f}%, 耗时{elapsed_time:.1f}s")
     
+    def update_stream_output(self, node: str, section: Optional[str], text: str):
+        """更新节点的流式输出预览（调用方负责节流）"""
+        preview = text[-self.STREAM_PREVIEW_CHARS:] if len(text) > self.STREAM_PREVIEW_CHARS else text
+
+        self.progress_data.update({
+            'streaming_output': {
+                'node': node,
+                'section': section,
+                'text': preview,
+                'length': len(text),
+                'updated_at': time.time(),
+            },
+            'elapsed_time': time.time() - self.start_time,
+            'last_update': time.time(),
+        })
+
+        self._save_progress()
+        logger.debug(f"📊 [流式输出] {self.analysis_id}: {node} 已生成 {len(text)} 字符")
+
     def _detect_step_from_message(self, message: str) -> Optional[int]:
         """根据消息内容智能检测当前步骤"""
+        if not _STEP_HINT_PATTERN.search(message):
+            return None
         message_lower = message.lower()
 
         # 开始分析阶段 - 只匹配最初的开始消息
@@ -430,11 +490,18 @@ class AsyncProgressTracker:
         if isinstance(keywords, str):
             keywords = [keywords]
 
+        # 步骤列表在初始化后不再变化，查找结果可以缓存
+        cache_key = tuple(keywords)
+        if cache_key in self._step_keyword_cache:
+            return self._step_keyword_cache[cache_key]
+
+        index = None
         for i, step in enumerate(self.analysis_steps):
-            for keyword in keywords:
-                if keyword in step["name"]:
-                    return i
-        return None
+            if any(keyword in step["name"] for keyword in keywords):
+                index = i
+                break
+        self._step_keyword_cache[cache_key] = index
+        return index
 
     def _get_next_step(self, keyword: str) -> Optional[int]:
         """获取指定步骤的下一步"""
@@ -474,27 +541,62 @@ class AsyncProgressTracker:
 
         return remaining
     
-    def _save_progress(self):
-        """保存进度到存储"""
+    def _collect_delta(self) -> Dict[str, Any]:
+        """收集自上次发出事件以来变化的字段"""
+        delta = {}
+        for key, value in self.progress_data.items():
+            if key in SNAPSHOT_ONLY_FIELDS:
+                continue
+            if self._emitted.get(key, _MISSING) != value:
+                delta[key] = value
+        self._emitted.update(delta)
+        return delta
+
+    def _save_progress(self, force: bool = False):
+        """追加增量事件，并按节流频率写入完整快照"""
+        with self._save_lock:
+            delta = self._collect_delta()
+            if delta:
+                self._event_seq += 1
+                try:
+                    self._event_cursor = self.event_log.append({'seq': self._event_seq, 'delta': safe_serialize(delta)})
+                    logger.debug(f"📊 [进度事件] {self.analysis_id} #{self._event_seq}: {', '.join(delta)}")
+                except Exception as e:
+                    logger.warning(f"📊 [进度事件] 追加失败: {e}")
+                    force = True
+
+            # 状态或步骤变化时立即写入快照，其余更新由事件流补齐
+            now = time.time()
+            if (force or 'status' in delta or 'current_step' in delta
+                    or now - self._last_snapshot_time >= self.SNAPSHOT_INTERVAL):
+                self._write_snapshot()
+                self._last_snapshot_time = now
+
+    def _write_snapshot(self):
+        """写入完整进度快照，记录快照对应的事件游标"""
         try:
             current_step_name = self.progress_data.get('current_step_name', '未知')
             progress_pct = self.progress_data.get('progress_percentage', 0)
             status = self.progress_data.get('status', 'running')
 
+            safe_data = safe_serialize(self.progress_data)
+            safe_data['event_seq'] = self._event_seq
+            safe_data['event_cursor'] = self._event_cursor
+            data_json = json.dumps(safe_data, ensure_ascii=False, separators=(',', ':'))
+
             if self.use_redis:
-                # 保存到Redis（安全序列化）
+                # 保存到Redis
                 key = f"progress:{self.analysis_id}"
-                safe_data = safe_serialize(self.progress_data)
-                data_json = json.dumps(safe_data, ensure_ascii=False)
-                self.redis_client.setex(key, 3600, data_json)  # 1小时过期
+                self.redis_client.setex(key, PROGRESS_TTL_SECONDS, data_json)  # 1小时过期
 
                 logger.info(f"📊 [Redis写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
                 logger.debug(f"📊 [Redis详情] 键: {key}, 数据大小: {len(data_json)} 字节")
             else:
-                # 保存到文件（安全序列化）
-                safe_data = safe_serialize(self.progress_data)
-                with open(self.progress_file, 'w', encoding='utf-8') as f:
-                    json.dump(safe_data, f, ensure_ascii=False, indent=2)
+                # 先写临时文件再替换，读取方不会读到写了一半的快照
+                temp_file = f"{self.progress_file}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(data_json)
+                os.replace(temp_file, self.progress_file)
 
                 logger.info(f"📊 [文件写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
                 logger.debug(f"📊 [文件详情] 路径: {self.progress_file}")
@@ -510,7 +612,7 @@ class AsyncProgressTracker:
                     os.makedirs(os.path.dirname(backup_file), exist_ok=True)
                     safe_data = safe_serialize(self.progress_data)
                     with open(backup_file, 'w', encoding='utf-8') as f:
-                        json.dump(safe_data, f, ensure_ascii=False, indent=2)
+                        json.dump(safe_data, f, ensure_ascii=False)
                     logger.info(f"📊 [备用存储] 文件保存成功: {backup_file}")
                 else:
                     # 文件存储失败，尝试简化数据
@@ -524,7 +626,7 @@ class AsyncProgressTracker:
                     }
                     backup_file = f"./data/progress_{self.analysis_id}.json"
                     with open(backup_file, 'w', encoding='utf-8') as f:
-                        json.dump(simplified_data, f, ensure_ascii=False, indent=2)
+                        json.dump(simplified_data, f, ensure_ascii=False)
                     logger.info(f"📊 [备用存储] 简化数据保存成功: {backup_file}")
             except Exception as backup_e:
                 logger.error(f"📊 [异步进度] 备用存储也失败: {backup_e}")
@@ -540,8 +642,8 @@ class AsyncProgressTracker:
         self.progress_data['progress_percentage'] = 100.0
         self.progress_data['remaining_time'] = 0.0
 
-        # 保存分析结果（安全序列化）
-        if results is not None:
+        # 分析结果写入结果存储，快照只记录结果已保存；存储失败时仍把结果放进快照
+        if results is not None and not self._store_results(results):
             try:
                 self.progress_data['raw_results'] = safe_serialize(results)
                 logger.info(f"📊 [异步进度] 保存分析结果: {self.analysis_id}")
@@ -549,7 +651,7 @@ class AsyncProgressTracker:
                 logger.warning(f"📊 [异步进度] 结果序列化失败: {e}")
                 self.progress_data['raw_results'] = str(results)  # 最后的fallback
 
-        self._save_progress()
+        self._save_progress(force=True)
         logger.info(f"📊 [异步进度] 分析完成: {self.analysis_id}")
 
         # 从日志系统注销
@@ -559,12 +661,28 @@ class AsyncProgressTracker:
         except ImportError:
             pass
     
+    def _store_results(self, results: Any) -> bool:
+        """按分析ID保存格式化后的结果，成功返回 True"""
+        try:
+            from .analysis_runner import format_analysis_results
+            from .result_store import get_result_store
+
+            if not isinstance(results, dict) or not results.get('success'):
+                return False
+            summary = get_result_store().save(self.analysis_id, format_analysis_results(results))
+            self.progress_data['results_stored'] = True
+            self.progress_data['result_sections'] = summary.get('sections', [])
+            return True
+        except Exception as e:
+            logger.warning(f"📊 [异步进度] 结果存储失败，结果保存到进度快照: {e}")
+            return False
+
     def mark_failed(self, error_message: str):
         """标记分析失败"""
         self.progress_data['status'] = 'failed'
         self.progress_data['last_message'] = f"分析失败: {error_message}"
         self.progress_data['last_update'] = time.time()
-        self._save_progress()
+        self._save_progress(force=True)
         logger.error(f"📊 [异步进度] 分析失败: {self.analysis_id}, 错误: {error_message}")
 
         # 从日志系统注销
@@ -574,54 +692,50 @@ class AsyncProgressTracker:
         except ImportError:
             pass
 
-def get_progress_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
-    """根据分析ID获取进度"""
-    try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+def _load_progress_snapshot(analysis_id: str) -> Optional[Dict[str, Any]]:
+    """读取最近写入的完整进度快照"""
+    redis_client = get_progress_redis_client()
+    if redis_client is not None:
+        try:
+            data = redis_client.get(f"progress:{analysis_id}")
+            if data:
+                return json.loads(data)
+        except Exception as e:
+            logger.debug(f"📊 [异步进度] Redis读取失败: {e}")
 
-        # 如果Redis启用，先尝试Redis
-        if redis_enabled:
-            try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                key = f"progress:{analysis_id}"
-                data = redis_client.get(key)
-                if data:
-                    return json.loads(data)
-            except Exception as e:
-                logger.debug(f"📊 [异步进度] Redis读取失败: {e}")
+    progress_file = f"./data/progress_{analysis_id}.json"
+    if os.path.exists(progress_file):
+        with open(progress_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return None
 
-        # 尝试文件
-        progress_file = f"./data/progress_{analysis_id}.json"
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
 
-        return None
+def get_progress_by_id(analysis_id: str, cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    根据分析ID获取进度
+
+    Args:
+        analysis_id: 分析ID
+        cursor: 事件游标；不传时返回完整进度（快照合并快照之后的事件），
+            传入时只返回游标之后的增量事件 {'analysis_id', 'events', 'cursor'}
+
+    完整进度中的 event_cursor 可作为下一次增量读取的游标
+    """
+    try:
+        if cursor is not None:
+            events, next_cursor = read_progress_events(analysis_id, cursor)
+            return {'analysis_id': analysis_id, 'events': events, 'cursor': next_cursor}
+
+        progress = _load_progress_snapshot(analysis_id)
+        if progress is None:
+            return None
+
+        # 快照按节流频率写入，补上快照之后的增量事件
+        events, next_cursor = read_progress_events(analysis_id, progress.get('event_cursor') or START_CURSOR)
+        if events:
+            apply_progress_events(progress, events)
+        progress['event_cursor'] = next_cursor
+        return progress
     except Exception as e:
         logger.error(f"📊 [异步进度] 获取进度失败: {analysis_id}, 错误: {e}")
         return None
@@ -641,37 +755,10 @@ def format_time(seconds: float) -> str:
 def get_latest_analysis_id() -> Optional[str]:
     """获取最新的分析ID"""
     try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
-
         # 如果Redis启用，先尝试从Redis获取
-        if redis_enabled:
+        redis_client = get_progress_redis_client()
+        if redis_client is not None:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
                 # 获取所有progress键
                 keys = redis_client.keys("progress:*")
                 if not keys:
@@ -4,7 +4,6 @@
 """
 
 import streamlit as st
-import json
 import time
 import hashlib
 import os
@@ -12,6 +11,8 @@ import uuid
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+from .session_store import get_file_session_store
+
 class FileSessionManager:
     """基于文件的会话管理器"""
     
@@ -19,7 +20,9 @@ class FileSessionManager:
         self.data_dir = Path("./data/sessions")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.max_age_hours = 24  # 会话有效期24小时
-        
+        # 读写先经过进程内缓存，由后台线程写回文件并清理过期会话
+        self.store = get_file_session_store(str(self.data_dir))
+
     def _get_browser_fingerprint(self) -> str:
         """生成浏览器指纹"""
         try:
@@ -28,23 +31,9 @@ class FileSessionManager:
             if hasattr(st.session_state, 'file_session_fingerprint'):
                 return st.session_state.file_session_fingerprint
 
-            # 方法2：查找最近的session文件（24小时内）
-            current_time = time.time()
-            recent_files = []
-
-            for session_file in self.data_dir.glob("*.json"):
-                try:
-                    file_age = current_time - session_file.stat().st_mtime
-                    if file_age < (24 * 3600):  # 24小时内的文件
-                        recent_files.append((session_file, file_age))
-                except:
-                    continue
-
-            if recent_files:
-                # 使用最新的session文件
-                recent_files.sort(key=lambda x: x[1])  # 按文件年龄排序
-                newest_file = recent_files[0][0]
-                fingerprint = newest_file.stem
+            # 方法2：使用最近的session（24小时内），取自存储的内存索引，不扫描目录
+            fingerprint = self.store.latest_key()
+            if fingerprint:
                 # 保存到session_state以便后续使用
                 st.session_state.file_session_fingerprint = fingerprint
                 return fingerprint
@@ -66,20 +55,9 @@ class FileSessionManager:
         return self.data_dir / f"{fingerprint}.json"
     
     def _cleanup_old_sessions(self):
-        """清理过期的会话文件"""
+        """清理过期的会话文件（后台线程会定期执行，通常无需手动调用）"""
         try:
-            current_time = time.time()
-            max_age_seconds = self.max_age_hours * 3600
-            
-            for session_file in self.data_dir.glob("*.json"):
-                try:
-                    # 检查文件修改时间
-                    file_age = current_time - session_file.stat().st_mtime
-                    if file_age > max_age_seconds:
-                        session_file.unlink()
-                except Exception:
-                    continue
-                    
+            self.store.expire()
         except Exception:
             pass  # 清理失败不影响主要功能
     
@@ -88,11 +66,7 @@ class FileSessionManager:
                            form_config: Dict[str, Any] = None):
         """保存分析状态和表单配置"""
         try:
-            # 清理过期文件
-            self._cleanup_old_sessions()
-
             fingerprint = self._get_browser_fingerprint()
-            session_file = self._get_session_file_path(fingerprint)
 
             session_data = {
                 "analysis_id": analysis_id,
@@ -108,9 +82,8 @@ class FileSessionManager:
             if form_config:
                 session_data["form_config"] = form_config
             
-            # 保存到文件
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, ensure_ascii=False, indent=2)
+            # 保存到会话存储，由后台线程写回文件
+            self.store.put(fingerprint, session_data)
 
             # 同时保存到session state
             st.session_state.current_analysis_id = analysis_id
@@ -129,24 +102,9 @@ class FileSessionManager:
         """加载分析状态"""
         try:
             fingerprint = self._get_browser_fingerprint()
-            session_file = self._get_session_file_path(fingerprint)
-
-            # 检查文件是否存在
-            if not session_file.exists():
-                return None
-
-            # 读取会话数据
-            with open(session_file, 'r', encoding='utf-8') as f:
-                session_data = json.load(f)
-
-            # 检查是否过期
-            timestamp = session_data.get("timestamp", 0)
-            if time.time() - timestamp > (self.max_age_hours * 3600):
-                # 过期了，删除文件
-                session_file.unlink()
-                return None
 
-            return session_data
+            # 缓存命中时不读取文件；过期的会话返回 None，由后台线程删除
+            return self.store.get(fingerprint)
             
         except Exception as e:
             st.warning(f"⚠️ 加载会话状态失败: {e}")
@@ -156,11 +114,9 @@ class FileSessionManager:
         """清除分析状态"""
         try:
             fingerprint = self._get_browser_fingerprint()
-            session_file = self._get_session_file_path(fingerprint)
-            
-            # 删除文件
-            if session_file.exists():
-                session_file.unlink()
+
+            # 删除会话（文件由后台线程删除）
+            self.store.delete(fingerprint)
             
             # 清除session state
             keys_to_remove = ['current_analysis_id', 'analysis_running', 'last_stock_symbol', 'last_market_type', 'session_fingerprint']
@@ -182,6 +138,7 @@ class FileSessionManager:
                 "session_file": str(session_file),
                 "file_exists": session_file.exists(),
                 "data_dir": str(self.data_dir),
+                "store_stats": dict(self.store.stats),
                 "session_state_keys": [k for k in st.session_state.keys() if 'analysis' in k.lower() or 'session' in k.lower()]
             }
             
@@ -190,14 +147,10 @@ class FileSessionManager:
             debug_info["total_session_files"] = len(session_files)
             debug_info["session_files"] = [f.name for f in session_files]
             
-            if session_file.exists():
-                try:
-                    with open(session_file, 'r', encoding='utf-8') as f:
-                        session_data = json.load(f)
-                    debug_info["session_data"] = session_data
-                    debug_info["age_hours"] = (time.time() - session_data.get("timestamp", 0)) / 3600
-                except Exception as e:
-                    debug_info["file_error"] = str(e)
+            session_data = self.store.get(fingerprint)
+            if session_data:
+                debug_info["session_data"] = session_data
+                debug_info["age_hours"] = (time.time() - session_data.get("timestamp", 0)) / 3600
             
             return debug_info
             
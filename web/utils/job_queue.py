@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+分析任务队列
+基于 SQLite 的持久化任务队列和多进程工作池：任务按优先级排队，相同请求（股票、日期、分析师、
+研究深度、模型）去重，完成的结果按 TTL 清理；多个API进程或独立的工作进程可以共享同一个队列文件
+
+独立启动工作进程（例如在另一台容器中扩容）：
+    python -m web.utils.job_queue --workers 4
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+
+DEFAULT_DB_PATH = os.getenv("JOB_QUEUE_DB", "./data/jobs/jobs.sqlite")
+# 完成/失败任务的结果保留时长
+DEFAULT_RESULT_TTL_HOURS = float(os.getenv("JOB_RESULT_TTL_HOURS", "24"))
+# 排队任务上限，超过后拒绝新任务
+DEFAULT_MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", "1000"))
+# 运行中任务超过该时长没有心跳，视为工作进程已退出，重新排队
+STALE_JOB_SECONDS = 600
+# 执行任务期间写入心跳的间隔，需远小于 STALE_JOB_SECONDS
+HEARTBEAT_INTERVAL = 30
+MAX_ATTEMPTS = 2
+
+PENDING, RUNNING, COMPLETED, FAILED = "pending", "running", "completed", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    dedup_key TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (dedup_key, status);
+"""
+
+
+class QueueFullError(Exception):
+    """排队任务已达上限"""
+
+
+def request_dedup_key(request: Dict[str, Any]) -> str:
+    """相同的 (股票, 日期, 分析师, 深度, 模型) 请求得到相同的去重键"""
+    identity = {
+        "stock_symbol": str(request.get("stock_symbol", "")).strip().upper(),
+        "market_type": request.get("market_type"),
+        "analysis_date": str(request.get("analysis_date")),
+        "analysts": sorted(request.get("analysts") or []),
+        "research_depth": request.get("research_depth"),
+        "llm_provider": request.get("llm_provider"),
+        "llm_model": request.get("llm_model"),
+    }
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _dumps(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    from web.utils.async_progress_tracker import safe_serialize
+    return json.dumps(safe_serialize(value), ensure_ascii=False, default=str)
+
+
+class JobQueue:
+    """SQLite 持久化任务队列，进程间通过数据库事务协调"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, result_ttl_hours: float = DEFAULT_RESULT_TTL_HOURS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.db_path = db_path
+        self.result_ttl = result_ttl_hours * 3600
+        self.max_pending = max_pending
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每个线程使用独立连接；isolation_level=None 以便手动控制 BEGIN IMMEDIATE
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        return _Transaction(conn)
+
+    # ---- 提交与查询 ----
+
+    def submit(self, request: Dict[str, Any], priority: int = 0) -> Tuple[str, bool]:
+        """
+        提交分析任务
+
+        Returns:
+            (任务ID, 是否复用了已有的相同任务)
+
+        Raises:
+            QueueFullError: 排队任务已达上限
+        """
+        dedup_key = request_dedup_key(request)
+        now = time.time()
+        with self._transaction() as conn:
+            existing = conn.execute(
+                "SELECT id, status, priority FROM jobs WHERE dedup_key = ? AND "
+                "(status IN (?, ?) OR (status = ? AND finished_at >= ?)) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (dedup_key, PENDING, RUNNING, COMPLETED, now - self.result_ttl),
+            ).fetchone()
+            if existing:
+                # 重复请求的优先级更高时提升排队中的任务
+                if existing["status"] == PENDING and priority > existing["priority"]:
+                    conn.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, existing["id"]))
+                return existing["id"], True
+
+            pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFullError(f"排队任务已达上限: {pending}")
+
+            job_id = str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO jobs (id, dedup_key, priority, status, request, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, dedup_key, priority, PENDING, json.dumps(request, ensure_ascii=False, default=str), now),
+            )
+        logger.info(f"📥 [任务队列] 新任务已排队: {job_id} ({request.get('stock_symbol')}, 优先级 {priority})")
+        return job_id, False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """返回任务状态（status / result / progress / request / error），不存在时返回 None"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "request": json.loads(row["request"]),
+            "priority": row["priority"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["error"]:
+            job["error"] = row["error"]
+        if row["status"] == PENDING:
+            job["queue_position"] = self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND (priority > ? OR (priority = ? AND created_at < ?))",
+                (PENDING, row["priority"], row["priority"], row["created_at"]),
+            ).fetchone()[0]
+        return job
+
+    def get_status(self, job_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        """只读取 (状态, 进度JSON)，用于轮询变化"""
+        row = self._connect().execute("SELECT status, progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return (row["status"], row["progress"]) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    # ---- 工作进程 ----
+
+    def claim(self, worker: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """领取优先级最高的排队任务"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, request FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (RUNNING, worker, now, now, row["id"]),
+            )
+        return row["id"], json.loads(row["request"])
+
+    # 以下更新只在任务仍由该工作进程持有时生效：任务被重新排队后，原工作进程不能覆盖新的执行
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        return self._connect().execute(
+            "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = ?",
+            (time.time(), job_id, worker, RUNNING),
+        ).rowcount > 0
+
+    def update_progress(self, job_id: str, worker: str, progress: Dict[str, Any]) -> bool:
+        return self._connect().execute(
+            "UPDATE jobs SET progress = ?, heartbeat = ? WHERE id = ? AND worker = ? AND status = ?",
+            (json.dumps(progress, ensure_ascii=False, default=str), time.time(), job_id, worker, RUNNING),
+        ).rowcount > 0
+
+    def complete(self, job_id: str, worker: str, result: Any) -> bool:
+        return self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, finished_at = ?, heartbeat = ? WHERE id = ? AND worker = ? AND status = ?",
+            (COMPLETED, _dumps(result), time.time(), time.time(), job_id, worker, RUNNING),
+        ).rowcount > 0
+
+    def fail(self, job_id: str, worker: str, error: str, result: Any = None) -> bool:
+        """标记任务失败；失败的任务不参与去重，相同请求再次提交时会重新执行"""
+        return self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, result = ?, finished_at = ?, heartbeat = ? "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (FAILED, error, _dumps(result), time.time(), time.time(), job_id, worker, RUNNING),
+        ).rowcount > 0
+
+    def maintain(self) -> Dict[str, int]:
+        """清理过期结果，并重新排队心跳超时的任务（工作进程崩溃）"""
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (COMPLETED, FAILED, now - self.result_ttl),
+            ).rowcount
+            stale_before = now - STALE_JOB_SECONDS
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat < ? AND attempts < ?",
+                (PENDING, RUNNING, stale_before, MAX_ATTEMPTS),
+            ).rowcount
+            abandoned = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND heartbeat < ?",
+                (FAILED, "工作进程无响应，任务已放弃", now, RUNNING, stale_before),
+            ).rowcount
+        if expired or requeued or abandoned:
+            logger.info(f"🧹 [任务队列] 清理过期结果 {expired} 个，重新排队 {requeued} 个，放弃 {abandoned} 个")
+        return {"expired": expired, "requeued": requeued, "abandoned": abandoned}
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE 写事务，保证多个进程领取任务时互斥"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _store_result(job_id: str, result: Any):
+    """
+    成功的结果另存一份到结果存储，供 /api/results 和页面按章节加载；
+    任务表仍保存 run_stock_analysis 的完整结果，/api/analysis/{id} 的返回格式不变
+    """
+    if not isinstance(result, dict) or not result.get("success"):
+        return
+    try:
+        from web.utils.analysis_runner import format_analysis_results
+        from web.utils.result_store import get_result_store
+        get_result_store().save(job_id, format_analysis_results(result))
+    except Exception as e:
+        logger.warning(f"⚠️ [任务队列] 结果存储失败: {job_id}, {e}")
+
+
+def _heartbeat_loop(queue: JobQueue, job_id: str, worker: str, done: threading.Event):
+    """分析引擎执行期间可能长时间没有进度回调，定期写入心跳，避免任务被误判为超时"""
+    while not done.wait(HEARTBEAT_INTERVAL):
+        try:
+            if not queue.heartbeat(job_id, worker):
+                logger.warning(f"⚠️ [任务队列] 任务已不再由当前工作进程持有: {job_id}")
+                return
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ [任务队列] 写入心跳失败: {job_id}, {e}")
+
+
+def run_job(queue: JobQueue, job_id: str, request: Dict[str, Any], worker: str):
+    """在当前进程中执行一个分析任务"""
+    from web.utils.analysis_runner import run_stock_analysis
+
+    def callback(message, step=None, total_steps=None):
+        queue.update_progress(job_id, worker, {"message": message, "step": step, "total_steps": total_steps})
+
+    done = threading.Event()
+    heartbeat_thread = threading.Thread(target=_heartbeat_loop, args=(queue, job_id, worker, done),
+                                        name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+    heartbeat_thread.start()
+    try:
+        result = run_stock_analysis(
+            stock_symbol=request["stock_symbol"],
+            analysis_date=str(request["analysis_date"]),
+            analysts=request["analysts"],
+            research_depth=request["research_depth"],
+            llm_provider=request["llm_provider"],
+            llm_model=request["llm_model"],
+            market_type=request["market_type"],
+            progress_callback=callback,
+            analysis_id=job_id,
+        )
+        done.set()
+        # 数据准备、参数验证等失败以 success=False 返回而不抛出异常，按失败处理，
+        # 否则会作为已完成任务在结果保留期内被相同请求复用
+        if not isinstance(result, dict) or not result.get("success"):
+            error = (result or {}).get("error") if isinstance(result, dict) else None
+            error = error or "分析未成功完成"
+            if queue.fail(job_id, worker, error, result):
+                logger.error(f"❌ [任务队列] 任务失败: {job_id}, 错误: {error}")
+            else:
+                logger.warning(f"⚠️ [任务队列] 任务已被重新分配，忽略本次失败: {job_id}, 错误: {error}")
+        elif queue.complete(job_id, worker, result):
+            _store_result(job_id, result)
+            logger.info(f"✅ [任务队列] 任务完成: {job_id}")
+        else:
+            logger.warning(f"⚠️ [任务队列] 任务已被重新分配，丢弃本次结果: {job_id}")
+    except Exception as e:
+        done.set()
+        if queue.fail(job_id, worker, str(e)):
+            logger.error(f"❌ [任务队列] 任务失败: {job_id}, 错误: {e}")
+        else:
+            logger.warning(f"⚠️ [任务队列] 任务已被重新分配，忽略本次失败: {job_id}, 错误: {e}")
+    finally:
+        done.set()
+
+
+def _worker_main(db_path: str, poll_interval: float, stop_event):
+    """工作进程主循环：一次执行一个任务"""
+    queue = JobQueue(db_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"👷 [任务队列] 工作进程已启动: {worker}")
+    # 分析在工作进程中执行，在这里后台预加载新闻过滤模型，不阻塞领取任务
+    try:
+        from tradingagents.dataflows.config import get_config
+        if get_config().get("news_model_warmup"):
+            from tradingagents.utils.news_model_registry import warm_up_news_models_in_background
+            warm_up_news_models_in_background()
+    except Exception as e:
+        logger.warning(f"⚠️ [任务队列] 新闻过滤模型预加载失败: {e}")
+    while not stop_event.is_set():
+        try:
+            claimed = queue.claim(worker)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ [任务队列] 领取任务失败: {e}")
+            claimed = None
+        if claimed is None:
+            stop_event.wait(poll_interval)
+            continue
+        run_job(queue, *claimed, worker=worker)
+
+
+class JobWorkerPool:
+    """分析任务工作进程池，并定期维护队列"""
+
+    def __init__(self, queue: JobQueue, workers: Optional[int] = None, poll_interval: float = 1.0,
+                 maintenance_interval: float = 60.0):
+        self.queue = queue
+        self.workers = default_worker_count() if workers is None else workers
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        # spawn：工作进程不继承API进程的线程和事件循环
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._processes: List[multiprocessing.Process] = []
+        self._maintenance_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=_worker_main,
+                args=(self.queue.db_path, self.poll_interval, self._stop_event),
+                name=f"analysis-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._maintenance_thread = threading.Thread(target=self._maintenance_loop, name="job-queue-maintenance", daemon=True)
+        self._maintenance_thread.start()
+        logger.info(f"🚀 [任务队列] 已启动 {self.workers} 个工作进程，队列: {self.queue.db_path}")
+
+    def _maintenance_loop(self):
+        while not self._stop_event.wait(self.maintenance_interval):
+            try:
+                self.queue.maintain()
+            except Exception as e:
+                logger.warning(f"⚠️ [任务队列] 队列维护失败: {e}")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        logger.info(f"🛑 [任务队列] 工作进程已停止")
+
+
+def default_worker_count() -> int:
+    return int(os.getenv("JOB_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="分析任务工作进程")
+    parser.add_argument("--workers", type=int, default=default_worker_count())
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    pool = JobWorkerPool(JobQueue(args.db), workers=args.workers)
+    pool.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+分析进度事件流
+进度跟踪器每次更新只追加一条增量事件（仅包含变化的字段），完整快照按节流频率写入；
+读取方保存游标，每次只拉取游标之后的新事件。支持 Redis Streams 和本地 JSONL 文件两种存储
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('async_progress')
+
+# 事件流与快照的过期时间（秒），与进度快照保持一致
+PROGRESS_TTL_SECONDS = 3600
+# Redis 事件流保留的最大事件数（近似裁剪）
+EVENT_STREAM_MAXLEN = 2000
+# 本地事件日志目录
+EVENT_LOG_DIR = "./data/progress_events"
+
+# 从头读取时使用的游标
+START_CURSOR = "0"
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def get_progress_redis_client():
+    """按环境变量创建并缓存 Redis 连接；未启用或连接失败时返回 None"""
+    global _redis_client
+    if os.getenv('REDIS_ENABLED', 'false').lower() != 'true':
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                try:
+                    import redis
+
+                    redis_password = os.getenv('REDIS_PASSWORD', None)
+                    options = {
+                        'host': os.getenv('REDIS_HOST', 'localhost'),
+                        'port': int(os.getenv('REDIS_PORT', 6379)),
+                        'db': int(os.getenv('REDIS_DB', 0)),
+                        'decode_responses': True,
+                    }
+                    if redis_password:
+                        options['password'] = redis_password
+                    client = redis.Redis(**options)
+                    client.ping()
+                    _redis_client = client
+                except Exception as e:
+                    logger.debug(f"📊 [进度事件] Redis不可用: {e}")
+                    return None
+    return _redis_client
+
+
+class RedisProgressEventLog:
+    """基于 Redis Streams 的进度事件流，游标为 Stream 条目ID"""
+
+    def __init__(self, client, analysis_id: str):
+        self.client = client
+        self.key = f"progress_events:{analysis_id}"
+
+    def append(self, event: Dict[str, Any]) -> str:
+        pipe = self.client.pipeline()
+        pipe.xadd(self.key, {'event': _dumps(event)}, maxlen=EVENT_STREAM_MAXLEN, approximate=True)
+        pipe.expire(self.key, PROGRESS_TTL_SECONDS)
+        entry_id, _ = pipe.execute()
+        return entry_id
+
+    def clear(self):
+        self.client.delete(self.key)
+
+    def read(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], str]:
+        cursor = cursor or START_CURSOR
+        start = '-' if cursor == START_CURSOR else cursor
+        entries = self.client.xrange(self.key, min=start, max='+', count=(limit + 1) if limit else None)
+        events = []
+        for entry_id, fields in entries:
+            # XRANGE 的起点是闭区间，跳过游标本身
+            if entry_id == cursor:
+                continue
+            try:
+                events.append(json.loads(fields['event']))
+            except (KeyError, ValueError):
+                pass
+            cursor = entry_id
+            if limit and len(events) >= limit:
+                break
+        return events, cursor
+
+
+class FileProgressEventLog:
+    """基于本地 JSONL 文件的进度事件流，游标为已读取的字节偏移"""
+
+    def __init__(self, analysis_id: str, directory: str = EVENT_LOG_DIR):
+        self.path = Path(directory) / f"{analysis_id}.jsonl"
+
+    def append(self, event: Dict[str, Any]) -> str:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = (_dumps(event) + "\n").encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(line)
+            return str(f.tell())
+
+    def clear(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def read(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], str]:
+        try:
+            offset = int(cursor or START_CURSOR)
+        except ValueError:
+            offset = 0
+        events = []
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    # 写入方可能尚未写完最后一行，留到下次读取
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue
+                    if limit and len(events) >= limit:
+                        break
+        except FileNotFoundError:
+            pass
+        return events, str(offset)
+
+
+def open_event_log(analysis_id: str, redis_client=None):
+    """Redis 可用时使用 Redis Streams，否则使用本地 JSONL 文件"""
+    if redis_client is not None:
+        return RedisProgressEventLog(redis_client, analysis_id)
+    return FileProgressEventLog(analysis_id)
+
+
+def read_progress_events(analysis_id: str, cursor: Optional[str] = None,
+                         limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    读取游标之后的进度事件
+
+    Returns:
+        (事件列表, 新游标)；每个事件包含 seq（递增序号）和 delta（变化的字段）
+    """
+    redis_client = get_progress_redis_client()
+    if redis_client is not None:
+        try:
+            return RedisProgressEventLog(redis_client, analysis_id).read(cursor, limit)
+        except Exception as e:
+            logger.debug(f"📊 [进度事件] Redis读取失败: {e}")
+    return FileProgressEventLog(analysis_id).read(cursor, limit)
+
+
+def wait_progress_events(analysis_id: str, cursor: Optional[str] = None, timeout: float = 15.0,
+                         poll_interval: float = 0.25) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    阻塞等待游标之后的新事件，超时返回空列表
+    Redis 使用 XREAD BLOCK 等待写入；本地文件只检查文件大小，有新内容时才读取
+    """
+    cursor = cursor or START_CURSOR
+    redis_client = get_progress_redis_client()
+    if redis_client is not None:
+        try:
+            event_log = RedisProgressEventLog(redis_client, analysis_id)
+            start = '0-0' if cursor == START_CURSOR else cursor
+            response = redis_client.xread({event_log.key: start}, block=max(1, int(timeout * 1000)))
+            events = []
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    try:
+                        events.append(json.loads(fields['event']))
+                    except (KeyError, ValueError):
+                        pass
+                    cursor = entry_id
+            return events, cursor
+        except Exception as e:
+            logger.debug(f"📊 [进度事件] Redis等待失败: {e}")
+
+    event_log = FileProgressEventLog(analysis_id)
+    try:
+        offset = int(cursor)
+    except ValueError:
+        offset = 0
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            size = event_log.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size > offset:
+            events, next_cursor = event_log.read(cursor)
+            if events:
+                return events, next_cursor
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return [], cursor
+        time.sleep(min(poll_interval, remaining))
+
+
+def apply_progress_events(progress: Dict[str, Any], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """把增量事件依次合并到进度快照上"""
+    for event in events:
+        delta = event.get('delta')
+        if delta:
+            progress.update(delta)
+        if 'seq' in event:
+            progress['event_seq'] = event['seq']
+    return progress
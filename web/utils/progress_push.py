@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+分析进度推送
+同一分析的所有订阅者共享一个事件读取任务：读取任务等待进度事件流的新事件并分发给各订阅者，
+服务端的读取次数与进度事件数量成正比，与打开页面的人数无关
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from .progress_events import START_CURSOR, read_progress_events, wait_progress_events
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('async_progress')
+
+# 分析结束的状态，推送到这些状态后关闭订阅
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+def is_terminal(events: List[Dict[str, Any]]) -> bool:
+    return any(event.get('delta', {}).get('status') in TERMINAL_STATUSES for event in events)
+
+
+class _Channel:
+    """单个分析的事件读取任务和订阅者队列"""
+
+    def __init__(self, analysis_id: str, cursor: str):
+        self.analysis_id = analysis_id
+        self.cursor = cursor
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ProgressHub:
+    """进度事件订阅中心，需要在事件循环内使用"""
+
+    def __init__(self, wait_timeout: float = 15.0):
+        self.wait_timeout = wait_timeout
+        self._channels: Dict[str, _Channel] = {}
+
+    async def subscribe(self, analysis_id: str, cursor: Optional[str] = None) -> AsyncIterator[Tuple[List[Dict[str, Any]], str]]:
+        """
+        订阅游标之后的进度事件，逐批产出 (事件列表, 新游标)；
+        等待超时产出空列表（可用作心跳），分析结束后停止
+        """
+        cursor = cursor or START_CURSOR
+        events, cursor = await asyncio.to_thread(read_progress_events, analysis_id, cursor)
+        last_seq = max((event.get('seq', 0) for event in events), default=0)
+        if events:
+            yield events, cursor
+            if is_terminal(events):
+                return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel = self._join(analysis_id, cursor, queue)
+        try:
+            # 加入频道前读取任务可能已分发过一部分事件，再补读一次，重复的事件按序号过滤
+            events, cursor = await asyncio.to_thread(read_progress_events, analysis_id, cursor)
+            events = [event for event in events if event.get('seq', 0) > last_seq]
+            if events:
+                last_seq = max(event.get('seq', 0) for event in events)
+                yield events, cursor
+                if is_terminal(events):
+                    return
+
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                events, batch_cursor = batch
+                events = [event for event in events if event.get('seq', 0) > last_seq]
+                if events:
+                    last_seq = max(event.get('seq', 0) for event in events)
+                    cursor = batch_cursor
+                    yield events, cursor
+                    if is_terminal(events):
+                        return
+                elif not batch[0]:
+                    yield [], cursor
+        finally:
+            channel.subscribers.discard(queue)
+
+    def _join(self, analysis_id: str, cursor: str, queue: asyncio.Queue) -> _Channel:
+        channel = self._channels.get(analysis_id)
+        if channel is None or channel.task is None or channel.task.done():
+            channel = _Channel(analysis_id, cursor)
+            self._channels[analysis_id] = channel
+            channel.task = asyncio.create_task(self._pump(channel))
+            logger.debug(f"📊 [进度推送] 开始读取事件: {analysis_id}")
+        channel.subscribers.add(queue)
+        return channel
+
+    async def _pump(self, channel: _Channel):
+        """等待新事件并分发给所有订阅者，没有订阅者或分析结束时退出"""
+        try:
+            while channel.subscribers:
+                events, channel.cursor = await asyncio.to_thread(
+                    wait_progress_events, channel.analysis_id, channel.cursor, self.wait_timeout
+                )
+                for queue in list(channel.subscribers):
+                    queue.put_nowait((events, channel.cursor))
+                if is_terminal(events):
+                    break
+        except Exception as e:
+            logger.warning(f"📊 [进度推送] 读取事件失败: {channel.analysis_id}, {e}")
+        finally:
+            for queue in list(channel.subscribers):
+                queue.put_nowait(None)
+            if self._channels.get(channel.analysis_id) is channel:
+                del self._channels[channel.analysis_id]
+            logger.debug(f"📊 [进度推送] 停止读取事件: {channel.analysis_id}")
@@ -3,12 +3,16 @@
 """
 
 import streamlit as st
-import json
 import time
 import hashlib
 import os
 from typing import Optional, Dict, Any
 
+from .session_store import get_file_session_store, get_redis_session_store
+
+# Redis 不可用时会话文件的保存目录
+FALLBACK_SESSION_DIR = "./data/redis_session_fallback"
+
 class RedisSessionManager:
     """基于Redis的会话管理器"""
     
@@ -17,7 +21,12 @@ class RedisSessionManager:
         self.use_redis = self._init_redis()
         self.session_prefix = "streamlit_session:"
         self.max_age_hours = 24  # 会话有效期24小时
-        
+        # 读写先经过进程内缓存，由后台线程批量写回 Redis（或文件）
+        if self.use_redis:
+            self.store = get_redis_session_store(self.redis_client)
+        else:
+            self.store = get_file_session_store(FALLBACK_SESSION_DIR)
+
     def _init_redis(self) -> bool:
         """初始化Redis连接"""
         try:
@@ -57,6 +66,18 @@ class RedisSessionManager:
             return False
     
     def _get_session_key(self) -> str:
+        """获取会话键，同一浏览器会话内只生成一次"""
+        try:
+            session_key = st.session_state.get('redis_session_key')
+            if session_key:
+                return session_key
+            session_key = self._build_session_key()
+            st.session_state.redis_session_key = session_key
+            return session_key
+        except Exception:
+            return self._build_session_key()
+
+    def _build_session_key(self) -> str:
         """生成会话键"""
         try:
             # 尝试获取Streamlit的session信息
@@ -102,17 +123,9 @@ class RedisSessionManager:
                 session_data["form_config"] = form_config
             
             session_key = self._get_session_key()
-            
-            if self.use_redis:
-                # 保存到Redis，设置过期时间
-                self.redis_client.setex(
-                    session_key,
-                    self.max_age_hours * 3600,  # 过期时间（秒）
-                    json.dumps(session_data)
-                )
-            else:
-                # 保存到文件（fallback）
-                self._save_to_file(session_key, session_data)
+
+            # 保存到会话存储，由后台线程写回Redis（设置过期时间）或文件
+            self.store.put(session_key, session_data)
             
             # 同时保存到session state
             st.session_state.current_analysis_id = analysis_id
@@ -130,17 +143,9 @@ class RedisSessionManager:
         """加载分析状态"""
         try:
             session_key = self._get_session_key()
-            
-            if self.use_redis:
-                # 从Redis加载
-                data = self.redis_client.get(session_key)
-                if data:
-                    return json.loads(data)
-            else:
-                # 从文件加载（fallback）
-                return self._load_from_file(session_key)
-            
-            return None
+
+            # 缓存命中时不访问Redis或文件
+            return self.store.get(session_key)
             
         except Exception as e:
             st.warning(f"⚠️ 加载会话状态失败: {e}")
@@ -151,13 +156,8 @@ class RedisSessionManager:
         try:
             session_key = self._get_session_key()
             
-            if self.use_redis:
-                # 从Redis删除
-                self.redis_client.delete(session_key)
-            else:
-                # 从文件删除（fallback）
-                self._delete_file(session_key)
-            
+            self.store.delete(session_key)
+
             # 清除session state
             keys_to_remove = ['current_analysis_id', 'analysis_running', 'last_stock_symbol', 'last_market_type']
             for key in keys_to_remove:
@@ -167,51 +167,6 @@ class RedisSessionManager:
         except Exception as e:
             st.warning(f"⚠️ 清除会话状态失败: {e}")
     
-    def _save_to_file(self, session_key: str, session_data: Dict[str, Any]):
-        """保存到文件（fallback方案）"""
-        try:
-            import os
-            os.makedirs("./data", exist_ok=True)
-            
-            filename = f"./data/{session_key.replace(':', '_')}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, ensure_ascii=False, indent=2)
-                
-        except Exception as e:
-            st.warning(f"⚠️ 文件保存失败: {e}")
-    
-    def _load_from_file(self, session_key: str) -> Optional[Dict[str, Any]]:
-        """从文件加载（fallback方案）"""
-        try:
-            filename = f"./data/{session_key.replace(':', '_')}.json"
-            if os.path.exists(filename):
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # 检查是否过期
-                timestamp = data.get("timestamp", 0)
-                if time.time() - timestamp < (self.max_age_hours * 3600):
-                    return data
-                else:
-                    # 过期了，删除文件
-                    os.remove(filename)
-            
-            return None
-            
-        except Exception as e:
-            st.warning(f"⚠️ 文件加载失败: {e}")
-            return None
-    
-    def _delete_file(self, session_key: str):
-        """删除文件（fallback方案）"""
-        try:
-            filename = f"./data/{session_key.replace(':', '_')}.json"
-            if os.path.exists(filename):
-                os.remove(filename)
-                
-        except Exception as e:
-            st.warning(f"⚠️ 文件删除失败: {e}")
-    
     def get_debug_info(self) -> Dict[str, Any]:
         """获取调试信息"""
         try:
@@ -221,6 +176,7 @@ class RedisSessionManager:
                 "use_redis": self.use_redis,
                 "session_key": session_key,
                 "redis_connected": False,
+                "store_stats": dict(self.store.stats),
                 "session_state_keys": [k for k in st.session_state.keys() if 'analysis' in k.lower()]
             }
             
@@ -235,11 +191,7 @@ class RedisSessionManager:
                     }
                     
                     # 检查会话数据
-                    data = self.redis_client.get(session_key)
-                    if data:
-                        debug_info["session_data"] = json.loads(data)
-                    else:
-                        debug_info["session_data"] = None
+                    debug_info["session_data"] = self.store.get(session_key)
                         
                 except Exception as e:
                     debug_info["redis_error"] = str(e)
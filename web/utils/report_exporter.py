@@ -13,11 +13,17 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 import tempfile
 import base64
+import hashlib
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('web')
 
+from .result_store import ensure_full_results
+
 # 配置日志 - 确保输出到stdout以便Docker logs可见
 logging.basicConfig(
     level=logging.INFO,
@@ -75,6 +81,41 @@ except ImportError as e:
     logger.info(f"请安装: pip install pypandoc markdown")
 
 
+# 导出缓存目录：同一份报告内容的 Markdown/Word/PDF 只生成一次
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", "./data/export_cache")
+# 后台导出线程数
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+# 设置后把送入pandoc前的Markdown写到该路径，用于排查转换问题
+DEBUG_MARKDOWN_PATH = os.getenv("EXPORT_DEBUG_MARKDOWN")
+# 报告模板变化时递增，使旧缓存失效
+EXPORT_CACHE_VERSION = "1"
+
+_EXPORT_SUFFIXES = {'markdown': 'md', 'docx': 'docx', 'pdf': 'pdf'}
+
+# PDF引擎按优先级排列；None 表示pandoc默认引擎（LaTeX）
+_PDF_ENGINE_CANDIDATES = [
+    ('wkhtmltopdf', 'wkhtmltopdf'),
+    ('weasyprint', 'weasyprint'),
+    (None, 'pdflatex'),
+]
+
+
+def report_content_hash(results: Dict[str, Any]) -> str:
+    """报告内容指纹：结果存储中的分析直接使用保存时的内容摘要，其余按结果内容计算"""
+    digest = results.get('content_hash')
+    if not digest:
+        payload = json.dumps(results, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return f"v{EXPORT_CACHE_VERSION}-{digest}"
+
+
+def probe_pdf_engines() -> list:
+    """探测本机可用的PDF引擎，只在启动时执行一次"""
+    engines = [engine for engine, executable in _PDF_ENGINE_CANDIDATES if shutil.which(executable)]
+    logger.info(f"🔍 可用PDF引擎: {[engine or '默认' for engine in engines] or '无'}")
+    return engines
+
+
 class ReportExporter:
     """报告导出器"""
 
@@ -82,6 +123,11 @@ class ReportExporter:
         self.export_available = EXPORT_AVAILABLE
         self.pandoc_available = PANDOC_AVAILABLE
         self.is_docker = DOCKER_ADAPTER_AVAILABLE and is_docker_environment()
+        self.pdf_engines = probe_pdf_engines() if self.pandoc_available else []
+        self.cache_dir = Path(EXPORT_CACHE_DIR)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
 
         # 记录初始化状态
         logger.info(f"📋 ReportExporter初始化:")
@@ -96,6 +142,74 @@ class ReportExporter:
             logger.info(f"🐳 检测到Docker环境，初始化PDF支持...")
             setup_xvfb_display()
     
+    def _cache_path(self, key: str, format_type: str) -> Path:
+        return self.cache_dir / f"{key}.{_EXPORT_SUFFIXES[format_type]}"
+
+    def _read_cache(self, key: str, format_type: str) -> Optional[bytes]:
+        try:
+            return self._cache_path(key, format_type).read_bytes()
+        except OSError:
+            return None
+
+    def _write_cache(self, key: str, format_type: str, content: bytes):
+        try:
+            path = self._cache_path(key, format_type)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            temp_path.write_bytes(content)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ 写入导出缓存失败: {e}")
+
+    def is_cached(self, results: Dict[str, Any], format_type: str) -> bool:
+        """该报告内容的指定格式是否已生成过"""
+        return format_type in _EXPORT_SUFFIXES and \
+            self._cache_path(report_content_hash(results), format_type).exists()
+
+    def _build(self, results: Dict[str, Any], format_type: str, key: str) -> bytes:
+        """生成指定格式的报告并写入缓存；Word/PDF复用缓存的Markdown"""
+        cached = self._read_cache(key, format_type)
+        if cached is not None:
+            logger.info(f"♻️ 使用缓存的{format_type}报告: {key}")
+            return cached
+
+        full_results = ensure_full_results(results)
+        md_bytes = self._read_cache(key, 'markdown')
+        if md_bytes is None:
+            md_bytes = self.generate_markdown_report(full_results).encode('utf-8')
+            self._write_cache(key, 'markdown', md_bytes)
+        if format_type == 'markdown':
+            return md_bytes
+
+        md_content = md_bytes.decode('utf-8')
+        if format_type == 'docx':
+            content = self.generate_docx_report(full_results, md_content=md_content)
+        else:
+            content = self.generate_pdf_report(full_results, md_content=md_content)
+        if content:
+            self._write_cache(key, format_type, content)
+        return content
+
+    def submit_export(self, results: Dict[str, Any], format_type: str) -> Future:
+        """
+        在后台线程池中生成报告；同一内容同一格式正在生成时复用同一个任务
+        """
+        key = report_content_hash(results)
+        with self._lock:
+            future = self._pending.get((key, format_type))
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="report-export")
+            future = self._executor.submit(self._build, results, format_type, key)
+            self._pending[(key, format_type)] = future
+
+        def _done(_):
+            with self._lock:
+                self._pending.pop((key, format_type), None)
+        future.add_done_callback(_done)
+        return future
+
     def _clean_text_for_markdown(self, text: str) -> str:
         """清理文本中可能导致YAML解析问题的字符"""
         if not text:
@@ -362,8 +476,19 @@ class ReportExporter:
 
         return formatted_content
 
-    def generate_docx_report(self, results: Dict[str, Any]) -> bytes:
-        """生成Word文档格式的报告"""
+    def _write_debug_markdown(self, md_content: str):
+        """设置了 EXPORT_DEBUG_MARKDOWN 时保存送入pandoc前的Markdown"""
+        if not DEBUG_MARKDOWN_PATH:
+            return
+        try:
+            with open(DEBUG_MARKDOWN_PATH, 'w', encoding='utf-8') as f:
+                f.write(md_content)
+            logger.info(f"🔍 实际Markdown内容已保存到: {DEBUG_MARKDOWN_PATH}")
+        except Exception as e:
+            logger.error(f"保存调试文件失败: {e}")
+
+    def generate_docx_report(self, results: Dict[str, Any], md_content: Optional[str] = None) -> bytes:
+        """生成Word文档格式的报告，可传入已生成的Markdown内容"""
 
         logger.info("📄 开始生成Word文档...")
 
@@ -371,10 +496,10 @@ class ReportExporter:
             logger.error("❌ Pandoc不可用")
             raise Exception("Pandoc不可用，无法生成Word文档。请安装pandoc或使用Markdown格式导出。")
 
-        # 首先生成markdown内容
-        logger.info("📝 生成Markdown内容...")
-        md_content = self.generate_markdown_report(results)
-        logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
+        if md_content is None:
+            logger.info("📝 生成Markdown内容...")
+            md_content = self.generate_markdown_report(results)
+            logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
 
         try:
             logger.info("📁 创建临时文件用于docx输出...")
@@ -389,21 +514,8 @@ class ReportExporter:
 
             logger.info("🔄 使用pypandoc将markdown转换为docx...")
 
-            # 调试：保存实际的Markdown内容
-            debug_file = '/app/debug_markdown.md'
-            try:
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-                logger.info(f"🔍 实际Markdown内容已保存到: {debug_file}")
-                logger.info(f"📊 内容长度: {len(md_content)} 字符")
-
-                # 显示前几行内容
-                lines = md_content.split('\n')[:5]
-                logger.info("🔍 前5行内容:")
-                for i, line in enumerate(lines, 1):
-                    logger.info(f"  {i}: {repr(line)}")
-            except Exception as e:
-                logger.error(f"保存调试文件失败: {e}")
+            # 调试：保存实际的Markdown内容（可选）
+            self._write_debug_markdown(md_content)
 
             # 清理内容避免YAML解析问题
             cleaned_content = self._clean_markdown_for_pandoc(md_content)
@@ -436,8 +548,8 @@ class ReportExporter:
             raise Exception(f"生成Word文档失败: {e}")
     
     
-    def generate_pdf_report(self, results: Dict[str, Any]) -> bytes:
-        """生成PDF格式的报告"""
+    def generate_pdf_report(self, results: Dict[str, Any], md_content: Optional[str] = None) -> bytes:
+        """生成PDF格式的报告，可传入已生成的Markdown内容"""
 
         logger.info("📊 开始生成PDF文档...")
 
@@ -445,22 +557,18 @@ class ReportExporter:
             logger.error("❌ Pandoc不可用")
             raise Exception("Pandoc不可用，无法生成PDF文档。请安装pandoc或使用Markdown格式导出。")
 
-        # 首先生成markdown内容
-        logger.info("📝 生成Markdown内容...")
-        md_content = self.generate_markdown_report(results)
-        logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
+        if md_content is None:
+            logger.info("📝 生成Markdown内容...")
+            md_content = self.generate_markdown_report(results)
+            logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
 
-        # 简化的PDF引擎列表，优先使用最可能成功的
-        pdf_engines = [
-            ('wkhtmltopdf', 'HTML转PDF引擎，推荐安装'),
-            ('weasyprint', '现代HTML转PDF引擎'),
-            (None, '使用pandoc默认引擎')  # 不指定引擎，让pandoc自己选择
-        ]
-
-        last_error = None
+        # 只尝试启动时探测到的引擎，上次成功的引擎排在最前
+        pdf_engines = list(self.pdf_engines)
+        last_error = "未找到可用的PDF引擎" if not pdf_engines else None
+        self._write_debug_markdown(md_content)
+        cleaned_content = self._clean_markdown_for_pandoc(md_content)
 
-        for engine_info in pdf_engines:
-            engine, description = engine_info
+        for engine in pdf_engines:
             try:
                 # 创建临时文件用于PDF输出
                 with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
@@ -478,9 +586,6 @@ class ReportExporter:
 
                 logger.info(f"🔧 PDF参数: {extra_args}")
 
-                # 清理内容避免YAML解析问题（与Word导出一致）
-                cleaned_content = self._clean_markdown_for_pandoc(md_content)
-
                 # 使用pypandoc将markdown转换为PDF - 禁用YAML解析
                 pypandoc.convert_text(
                     cleaned_content,
@@ -500,6 +605,8 @@ class ReportExporter:
                     os.unlink(output_file)
 
                     logger.info(f"✅ PDF生成成功，使用引擎: {engine or '默认'}")
+                    if self.pdf_engines and self.pdf_engines[0] != engine:
+                        self.pdf_engines = [engine] + [e for e in self.pdf_engines if e != engine]
                     return pdf_content
                 else:
                     raise Exception("PDF文件生成失败或为空")
@@ -536,52 +643,31 @@ class ReportExporter:
         raise Exception(error_msg)
     
     def export_report(self, results: Dict[str, Any], format_type: str) -> Optional[bytes]:
-        """导出报告为指定格式"""
+        """导出报告为指定格式；相同内容的报告直接返回缓存"""
 
         logger.info(f"🚀 开始导出报告: format={format_type}")
-        logger.info(f"📊 导出状态检查:")
-        logger.info(f"  - export_available: {self.export_available}")
-        logger.info(f"  - pandoc_available: {self.pandoc_available}")
-        logger.info(f"  - is_docker: {self.is_docker}")
 
         if not self.export_available:
             logger.error("❌ 导出功能不可用")
             st.error("❌ 导出功能不可用，请安装必要的依赖包")
             return None
 
-        try:
-            logger.info(f"🔄 开始生成{format_type}格式报告...")
-
-            if format_type == 'markdown':
-                logger.info("📝 生成Markdown报告...")
-                content = self.generate_markdown_report(results)
-                logger.info(f"✅ Markdown报告生成成功，长度: {len(content)} 字符")
-                return content.encode('utf-8')
-
-            elif format_type == 'docx':
-                logger.info("📄 生成Word文档...")
-                if not self.pandoc_available:
-                    logger.error("❌ pandoc不可用，无法生成Word文档")
-                    st.error("❌ pandoc不可用，无法生成Word文档")
-                    return None
-                content = self.generate_docx_report(results)
-                logger.info(f"✅ Word文档生成成功，大小: {len(content)} 字节")
-                return content
-
-            elif format_type == 'pdf':
-                logger.info("📊 生成PDF文档...")
-                if not self.pandoc_available:
-                    logger.error("❌ pandoc不可用，无法生成PDF文档")
-                    st.error("❌ pandoc不可用，无法生成PDF文档")
-                    return None
-                content = self.generate_pdf_report(results)
-                logger.info(f"✅ PDF文档生成成功，大小: {len(content)} 字节")
-                return content
+        if format_type not in _EXPORT_SUFFIXES:
+            logger.error(f"❌ 不支持的导出格式: {format_type}")
+            st.error(f"❌ 不支持的导出格式: {format_type}")
+            return None
 
-            else:
-                logger.error(f"❌ 不支持的导出格式: {format_type}")
-                st.error(f"❌ 不支持的导出格式: {format_type}")
-                return None
+        if format_type in ('docx', 'pdf') and not self.pandoc_available:
+            name = 'Word文档' if format_type == 'docx' else 'PDF文档'
+            logger.error(f"❌ pandoc不可用，无法生成{name}")
+            st.error(f"❌ pandoc不可用，无法生成{name}")
+            return None
+
+        try:
+            # 在后台线程池生成；页面重新运行打断等待时，生成仍会完成并写入缓存
+            content = self.submit_export(results, format_type).result()
+            logger.info(f"✅ {format_type}报告导出成功，大小: {len(content)} 字节")
+            return content
 
         except Exception as e:
             logger.error(f"❌ 导出失败: {str(e)}", exc_info=True)
@@ -856,19 +942,24 @@ def render_export_buttons(results: Dict[str, Any]):
         if st.button("📄 导出 Markdown", help="导出为Markdown格式"):
             logger.info(f"🖱️ [EXPORT] 用户点击Markdown导出按钮 - 股票: {stock_symbol}")
             logger.info(f"🖱️ 用户点击Markdown导出按钮 - 股票: {stock_symbol}")
-            # 1. 保存分模块报告（CLI格式）
-            logger.info("📁 开始保存分模块报告（CLI格式）...")
-            modular_files = save_modular_reports_to_results_dir(results, stock_symbol)
+            # 1. 保存分模块报告（CLI格式）；相同内容已导出过时直接使用缓存，不再重复保存
+            cached = report_exporter.is_cached(results, 'markdown')
+            full_results, modular_files = results, {}
+            if not cached:
+                logger.info("📁 开始保存分模块报告（CLI格式）...")
+                # 结果存储中的分析只保存了摘要，导出时再加载全部章节
+                full_results = ensure_full_results(results)
+                modular_files = save_modular_reports_to_results_dir(full_results, stock_symbol)
 
             # 2. 生成汇总报告（下载用）
-            content = report_exporter.export_report(results, 'markdown')
+            content = report_exporter.export_report(full_results, 'markdown')
             if content:
                 filename = f"{stock_symbol}_analysis_{timestamp}.md"
                 logger.info(f"✅ [EXPORT] Markdown导出成功，文件名: {filename}")
                 logger.info(f"✅ Markdown导出成功，文件名: {filename}")
 
                 # 3. 保存汇总报告到results目录
-                saved_path = save_report_to_results_dir(content, filename, stock_symbol)
+                saved_path = None if cached else save_report_to_results_dir(content, filename, stock_symbol)
 
                 # 4. 显示保存结果
                 if modular_files and saved_path:
@@ -881,6 +972,8 @@ def render_export_buttons(results: Dict[str, Any]):
                         st.write(f"- 汇总报告: `{saved_path}`")
                 elif saved_path:
                     st.success(f"✅ 汇总报告已保存到: {saved_path}")
+                elif cached:
+                    st.success("✅ 报告已生成过，可直接下载")
 
                 st.download_button(
                     label="📥 下载 Markdown",
@@ -901,19 +994,24 @@ def render_export_buttons(results: Dict[str, Any]):
                     logger.info(f"🔄 [EXPORT] 开始Word导出流程...")
                     logger.info("🔄 开始Word导出流程...")
 
-                    # 1. 保存分模块报告（CLI格式）
-                    logger.info("📁 开始保存分模块报告（CLI格式）...")
-                    modular_files = save_modular_reports_to_results_dir(results, stock_symbol)
+                    # 1. 保存分模块报告（CLI格式）；相同内容已导出过时直接使用缓存，不再重复保存
+                    cached = report_exporter.is_cached(results, 'docx')
+                    full_results, modular_files = results, {}
+                    if not cached:
+                        logger.info("📁 开始保存分模块报告（CLI格式）...")
+                        # 结果存储中的分析只保存了摘要，导出时再加载全部章节
+                        full_results = ensure_full_results(results)
+                        modular_files = save_modular_reports_to_results_dir(full_results, stock_symbol)
 
                     # 2. 生成Word汇总报告
-                    content = report_exporter.export_report(results, 'docx')
+                    content = report_exporter.export_report(full_results, 'docx')
                     if content:
                         filename = f"{stock_symbol}_analysis_{timestamp}.docx"
                         logger.info(f"✅ [EXPORT] Word导出成功，文件名: {filename}, 大小: {len(content)} 字节")
                         logger.info(f"✅ Word导出成功，文件名: {filename}, 大小: {len(content)} 字节")
 
                         # 3. 保存Word汇总报告到results目录
-                        saved_path = save_report_to_results_dir(content, filename, stock_symbol)
+                        saved_path = None if cached else save_report_to_results_dir(content, filename, stock_symbol)
 
                         # 4. 显示保存结果
                         if modular_files and saved_path:
@@ -976,18 +1074,23 @@ def render_export_buttons(results: Dict[str, Any]):
                 try:
                     logger.info("🔄 开始PDF导出流程...")
 
-                    # 1. 保存分模块报告（CLI格式）
-                    logger.info("📁 开始保存分模块报告（CLI格式）...")
-                    modular_files = save_modular_reports_to_results_dir(results, stock_symbol)
+                    # 1. 保存分模块报告（CLI格式）；相同内容已导出过时直接使用缓存，不再重复保存
+                    cached = report_exporter.is_cached(results, 'pdf')
+                    full_results, modular_files = results, {}
+                    if not cached:
+                        logger.info("📁 开始保存分模块报告（CLI格式）...")
+                        # 结果存储中的分析只保存了摘要，导出时再加载全部章节
+                        full_results = ensure_full_results(results)
+                        modular_files = save_modular_reports_to_results_dir(full_results, stock_symbol)
 
                     # 2. 生成PDF汇总报告
-                    content = report_exporter.export_report(results, 'pdf')
+                    content = report_exporter.export_report(full_results, 'pdf')
                     if content:
                         filename = f"{stock_symbol}_analysis_{timestamp}.pdf"
                         logger.info(f"✅ PDF导出成功，文件名: {filename}, 大小: {len(content)} 字节")
 
                         # 3. 保存PDF汇总报告到results目录
-                        saved_path = save_report_to_results_dir(content, filename, stock_symbol)
+                        saved_path = None if cached else save_report_to_results_dir(content, filename, stock_symbol)
 
                         # 4. 显示保存结果
                         if modular_files and saved_path:
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+分析结果存储
+已完成的分析按 analysis_id 保存到 SQLite：摘要（股票、日期、决策、配置和报告章节列表）单独一行，
+每个报告章节单独压缩保存，按股票和日期建立索引。页面和API只加载摘要和正在查看的章节，
+完整结果只在导出报告时组装
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+
+DEFAULT_DB_PATH = os.getenv("RESULT_STORE_DB", "./data/results/results.sqlite")
+# 进程内缓存的已解压章节数量
+SECTION_CACHE_SIZE = 64
+
+# 报告章节的显示顺序，与结果页面保持一致
+SECTION_ORDER = [
+    'market_report',
+    'trend_report',
+    'fundamentals_report',
+    'concept_report',
+    'sentiment_report',
+    'news_report',
+    'risk_assessment',
+    'investment_plan',
+    'investment_debate_state',
+    'trader_investment_plan',
+    'risk_debate_state',
+    'final_trade_decision',
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id TEXT PRIMARY KEY,
+    stock_symbol TEXT NOT NULL,
+    analysis_date TEXT,
+    created_at REAL NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_symbol_date ON analyses (stock_symbol, analysis_date);
+CREATE INDEX IF NOT EXISTS idx_analyses_date ON analyses (analysis_date);
+CREATE TABLE IF NOT EXISTS sections (
+    analysis_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (analysis_id, name)
+);
+"""
+
+
+def _has_content(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(v for v in value.values() if v)
+    return bool(value)
+
+
+class ResultStore:
+    """SQLite 分析结果存储，章节内容以 zlib 压缩的 JSON 保存"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每个线程使用独立连接
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def save(self, analysis_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        保存格式化后的分析结果（format_analysis_results 的返回值），返回摘要
+
+        摘要即不含报告正文的结果字典，sections 字段列出可单独加载的章节
+        """
+        from .async_progress_tracker import safe_serialize
+
+        state = results.get('state') or {}
+        names = [name for name in SECTION_ORDER if _has_content(state.get(name))]
+        names += [name for name in state if name not in SECTION_ORDER and _has_content(state.get(name))]
+
+        summary = safe_serialize({key: value for key, value in results.items() if key != 'state'})
+        summary['analysis_id'] = analysis_id
+        summary['sections'] = names
+        stock_symbol = str(results.get('stock_symbol', '')).strip().upper()
+        analysis_date = str(results.get('analysis_date') or '')[:10]
+
+        rows = []
+        digest = hashlib.sha1(json.dumps(summary, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        for name in names:
+            raw = json.dumps(safe_serialize(state[name]), ensure_ascii=False).encode('utf-8')
+            digest.update(name.encode('utf-8'))
+            digest.update(raw)
+            rows.append((analysis_id, name, zlib.compress(raw, 6), len(raw)))
+        # 内容摘要用于导出缓存等场景，无需加载章节即可判断内容是否相同
+        summary['content_hash'] = digest.hexdigest()
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM sections WHERE analysis_id = ?", (analysis_id,))
+            conn.executemany("INSERT INTO sections (analysis_id, name, data, size) VALUES (?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (analysis_id, stock_symbol, analysis_date, created_at, summary) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (analysis_id, stock_symbol, analysis_date, time.time(), json.dumps(summary, ensure_ascii=False)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == analysis_id]:
+                del self._cache[key]
+        stored = sum(len(row[2]) for row in rows)
+        original = sum(row[3] for row in rows)
+        logger.info(f"💾 [结果存储] 已保存分析结果: {analysis_id} ({stock_symbol}, {len(names)} 个章节, "
+                    f"{original} -> {stored} 字节)")
+        return summary
+
+    def get_summary(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """读取分析摘要，不存在时返回 None"""
+        row = self._connect().execute(
+            "SELECT summary FROM analyses WHERE analysis_id = ?", (analysis_id,)
+        ).fetchone()
+        return json.loads(row["summary"]) if row else None
+
+    def get_section(self, analysis_id: str, name: str) -> Any:
+        """读取单个报告章节，不存在时返回 None"""
+        key = (analysis_id, name)
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        row = self._connect().execute(
+            "SELECT data FROM sections WHERE analysis_id = ? AND name = ?", (analysis_id, name)
+        ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(zlib.decompress(row["data"]).decode('utf-8'))
+
+        with self._cache_lock:
+            self._cache[key] = value
+            while len(self._cache) > SECTION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return value
+
+    def load(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """组装包含全部章节的完整结果，用于导出报告"""
+        summary = self.get_summary(analysis_id)
+        if summary is None:
+            return None
+        rows = self._connect().execute(
+            "SELECT name, data FROM sections WHERE analysis_id = ?", (analysis_id,)
+        ).fetchall()
+        data = {row["name"]: row["data"] for row in rows}
+        summary['state'] = {
+            name: json.loads(zlib.decompress(data[name]).decode('utf-8'))
+            for name in summary.get('sections', []) if name in data
+        }
+        return summary
+
+    def find(self, stock_symbol: Optional[str] = None, analysis_date: Optional[str] = None,
+             limit: int = 20) -> List[Dict[str, Any]]:
+        """按股票代码和/或分析日期查询，最新的在前；只返回索引字段"""
+        conditions, params = [], []
+        if stock_symbol:
+            conditions.append("stock_symbol = ?")
+            params.append(stock_symbol.strip().upper())
+        if analysis_date:
+            conditions.append("analysis_date = ?")
+            params.append(str(analysis_date)[:10])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connect().execute(
+            f"SELECT analysis_id, stock_symbol, analysis_date, created_at FROM analyses {where} "
+            f"ORDER BY created_at DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete(self, analysis_id: str):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM sections WHERE analysis_id = ?", (analysis_id,))
+        conn.execute("DELETE FROM analyses WHERE analysis_id = ?", (analysis_id,))
+        conn.execute("COMMIT")
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == analysis_id]:
+                del self._cache[key]
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """获取全局分析结果存储"""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                _result_store = ResultStore()
+    return _result_store
+
+
+def is_lazy_results(results: Optional[Dict[str, Any]]) -> bool:
+    """结果是否为只含摘要、章节需按需加载的形式"""
+    return bool(results) and bool(results.get('analysis_id')) and 'sections' in results and not results.get('state')
+
+
+def restore_analysis_results(analysis_id: str, progress_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    恢复已完成分析的结果摘要；结果存储中没有时，回退到进度快照中的 raw_results（旧版本的分析）
+    """
+    try:
+        summary = get_result_store().get_summary(analysis_id)
+        if summary is not None:
+            summary['state'] = {}
+            return summary
+    except Exception as e:
+        logger.warning(f"⚠️ [结果存储] 读取摘要失败: {analysis_id}, {e}")
+
+    if progress_data is None:
+        from .async_progress_tracker import get_progress_by_id
+        progress_data = get_progress_by_id(analysis_id)
+    raw_results = (progress_data or {}).get('raw_results')
+    if not raw_results:
+        return None
+    from .analysis_runner import format_analysis_results
+    return format_analysis_results(raw_results)
+
+
+def ensure_full_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """摘要形式的结果补齐全部章节，已包含章节内容的结果原样返回"""
+    if not is_lazy_results(results):
+        return results
+    full = get_result_store().load(results['analysis_id'])
+    return full if full is not None else results
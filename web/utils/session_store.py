@@ -0,0 +1,304 @@
+"""
+会话存储
+Redis 或文件后端前加一层有上限的进程内 LRU：读取命中内存时不访问后端，写入先更新内存，
+由后台线程批量写回，过期会话也由后台线程定期清理。Streamlit 每次重新运行不再读写磁盘或网络
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('web')
+
+
+# 进程内缓存的会话数量上限
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "512"))
+# 写回后端的间隔（秒）
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0"))
+# 清理过期会话的间隔（秒）
+SESSION_EXPIRE_INTERVAL = 600
+# 会话有效期（小时）
+SESSION_MAX_AGE_HOURS = 24
+# 后端中不存在的会话在内存中记住的时长（秒），避免反复查询
+MISSING_TTL_SECONDS = 30
+
+_MISSING = object()
+
+
+class FileSessionBackend:
+    """每个会话一个 JSON 文件；启动时扫描一次目录建立修改时间索引"""
+
+    def __init__(self, data_dir: str, max_age_seconds: float):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _path(self, key: str) -> Path:
+        return self.data_dir / f"{key.replace(':', '_')}.json"
+
+    def _scan(self):
+        mtimes = {}
+        for session_file in self.data_dir.glob("*.json"):
+            try:
+                mtimes[session_file.stem] = session_file.stat().st_mtime
+            except OSError:
+                continue
+        with self._lock:
+            self._mtimes = mtimes
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        for key, data in items.items():
+            path = self._path(key)
+            temp_path = path.with_name(f"{path.name}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, path)
+            with self._lock:
+                self._mtimes[path.stem] = time.time()
+
+    def delete_many(self, keys: Iterable[str]):
+        for key in keys:
+            path = self._path(key)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._mtimes.pop(path.stem, None)
+
+    def expire(self) -> int:
+        """删除过期的会话文件，并重建修改时间索引"""
+        self._scan()
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            expired = [stem for stem, mtime in self._mtimes.items() if mtime < cutoff]
+        for stem in expired:
+            try:
+                (self.data_dir / f"{stem}.json").unlink()
+            except OSError:
+                pass
+            with self._lock:
+                self._mtimes.pop(stem, None)
+        return len(expired)
+
+    def latest_key(self) -> Optional[str]:
+        """有效期内最近写入的会话，使用内存索引，不扫描目录"""
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            candidates = [(mtime, stem) for stem, mtime in self._mtimes.items() if mtime >= cutoff]
+        return max(candidates)[1] if candidates else None
+
+    def keys(self):
+        with self._lock:
+            return list(self._mtimes)
+
+
+class RedisSessionBackend:
+    """Redis 字符串键，过期由 Redis TTL 处理"""
+
+    def __init__(self, client, max_age_seconds: float):
+        self.client = client
+        self.max_age_seconds = int(max_age_seconds)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = self.client.get(key)
+        return json.loads(data) if data else None
+
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, data in items.items():
+            pipe.setex(key, self.max_age_seconds, json.dumps(data, ensure_ascii=False, default=str))
+        pipe.execute()
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            self.client.delete(*keys)
+
+    def expire(self) -> int:
+        return 0
+
+    def latest_key(self) -> Optional[str]:
+        return None
+
+
+class SessionStore:
+    """带进程内 LRU、批量写回和后台过期清理的会话存储"""
+
+    def __init__(self, backend, max_entries: int = SESSION_CACHE_SIZE,
+                 flush_interval: float = SESSION_FLUSH_INTERVAL,
+                 max_age_seconds: float = SESSION_MAX_AGE_HOURS * 3600):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.max_age_seconds = max_age_seconds
+        # 值为 (会话数据或 _MISSING, 读取时间)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._deleted: set = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._last_expire = time.time()
+        self.stats = {'hits': 0, 'loads': 0, 'flushes': 0}
+        self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _is_expired(self, data: Dict[str, Any]) -> bool:
+        return time.time() - data.get("timestamp", 0) > self.max_age_seconds
+
+    def _remember(self, key: str, value: Any):
+        self._cache[key] = (value, time.time())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            evicted, _ = self._cache.popitem(last=False)
+            # 尚未写回的会话在淘汰前保留在待写队列中，不会丢失
+            logger.debug(f"[会话存储] 淘汰缓存会话: {evicted}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                value, loaded_at = cached
+                if value is not _MISSING:
+                    self._cache.move_to_end(key)
+                    self.stats['hits'] += 1
+                    if self._is_expired(value):
+                        return None
+                    return value
+                if time.time() - loaded_at < MISSING_TTL_SECONDS:
+                    self.stats['hits'] += 1
+                    return None
+
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ [会话存储] 读取会话失败: {e}")
+            return None
+        with self._lock:
+            self.stats['loads'] += 1
+            # 读取期间有新的写入时以内存中的数据为准
+            if key in self._dirty:
+                value = self._dirty[key]
+            self._remember(key, value if value is not None else _MISSING)
+        if value is None or self._is_expired(value):
+            return None
+        return value
+
+    def put(self, key: str, data: Dict[str, Any]):
+        """写入内存并加入写回队列"""
+        with self._lock:
+            self._remember(key, data)
+            self._dirty[key] = data
+            self._deleted.discard(key)
+        self._wakeup.set()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remember(key, _MISSING)
+            self._dirty.pop(key, None)
+            self._deleted.add(key)
+        self._wakeup.set()
+
+    def latest_key(self) -> Optional[str]:
+        """最近写入的会话键（仅文件后端支持）"""
+        with self._lock:
+            pending = list(self._dirty)
+        if pending:
+            return pending[-1]
+        return self.backend.latest_key()
+
+    def flush(self):
+        """把待写入和待删除的会话批量写回后端"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+        if not dirty and not deleted:
+            return
+        try:
+            if dirty:
+                self.backend.put_many(dirty)
+            if deleted:
+                self.backend.delete_many(deleted)
+            self.stats['flushes'] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ [会话存储] 写回会话失败，稍后重试: {e}")
+            with self._lock:
+                for key, data in dirty.items():
+                    self._dirty.setdefault(key, data)
+                self._deleted |= deleted - set(self._dirty)
+
+    def expire(self):
+        """清理内存和后端中的过期会话"""
+        with self._lock:
+            expired = [key for key, (value, _) in self._cache.items()
+                       if value is not _MISSING and self._is_expired(value)]
+            for key in expired:
+                del self._cache[key]
+        try:
+            removed = self.backend.expire()
+            if removed:
+                logger.info(f"🧹 [会话存储] 清理过期会话 {removed} 个")
+        except Exception as e:
+            logger.debug(f"[会话存储] 清理过期会话失败: {e}")
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(SESSION_EXPIRE_INTERVAL)
+            if self._stopped:
+                break
+            # 合并短时间内的多次写入
+            time.sleep(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if time.time() - self._last_expire >= SESSION_EXPIRE_INTERVAL:
+                self._last_expire = time.time()
+                self.expire()
+
+    def close(self):
+        self._stopped = True
+        self._wakeup.set()
+        self.flush()
+
+
+_stores: Dict[str, SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_file_session_store(data_dir: str = "./data/sessions") -> SessionStore:
+    """获取文件后端的会话存储（每个目录一个实例）"""
+    key = f"file:{os.path.abspath(data_dir)}"
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                backend = FileSessionBackend(data_dir, SESSION_MAX_AGE_HOURS * 3600)
+                backend.expire()
+                _stores[key] = SessionStore(backend)
+    return _stores[key]
+
+
+def get_redis_session_store(redis_client) -> SessionStore:
+    """获取 Redis 后端的会话存储"""
+    key = f"redis:{id(redis_client)}"
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                _stores[key] = SessionStore(RedisSessionBackend(redis_client, SESSION_MAX_AGE_HOURS * 3600))
+    return _stores[key]